@@ -8,9 +8,16 @@ from dataclasses import dataclass
 from dsu.config.settings import AppConfig, seed_registry_from_ini
 from dsu.domain.events import EventBus
 from dsu.domain.registry import DeviceRegistry
+from dsu.net.aio_locator import AsyncLocator
 from dsu.net.controller import DeviceController
 from dsu.net.eludp import ElUDP
+from dsu.net.eludp_reactor import ReactorElUDP
 from dsu.net.locator import Locator
+from dsu.net.metrics import StatsSnapshot, subnet
+from dsu.net.ratelimit import Pacer, local_networks
+from dsu.net.rtt import RttTable
+from dsu.net.scheduler import Scheduler
+from dsu.net.sockstats import SocketCounters
 
 
 @dataclass
@@ -22,17 +29,50 @@ class Application:
     el_udp: ElUDP
     controller: DeviceController
     locator_thread: threading.Thread
+    el_udp_thread: threading.Thread | None = None  # selector engine only
+    pacer: Pacer | None = None  # shared by locator and el_udp; None when disabled
+    scheduler: Scheduler | None = None  # timers of locator, controller and queues
 
     def start(self) -> None:
         seed_registry_from_ini(self.registry, self.config.devices_ini_path)
         if not self.locator_thread.is_alive():
             self.locator_thread.start()
+        if self.el_udp_thread is not None and not self.el_udp_thread.is_alive():
+            self.el_udp_thread.start()
 
     def shutdown(self) -> None:
         self.locator.shutdown()
+        self.el_udp.shutdown()
         self.controller.shutdown()
         if self.locator_thread.is_alive():
             self.locator_thread.join(timeout=2)
+        if self.el_udp_thread is not None and self.el_udp_thread.is_alive():
+            self.el_udp_thread.join(timeout=2)
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
+
+    def socket_stats(self) -> dict[str, SocketCounters]:
+        """Received/dropped datagram counters of every UDP socket."""
+        stats = {"locator": self.locator.socket_stats()}
+        for port, counters in self.el_udp.socket_stats().items():
+            stats[f"eludp:{port}"] = counters
+        return stats
+
+    def command_stats(self, by: str = "cmd") -> dict[object, StatsSnapshot]:
+        """Command latency and retry statistics of queues and clients.
+
+        *by*: "cmd" (LocatorCmd), "device" (serial number), "model" or
+        "subnet" (per-device statistics merged over the registry).
+        """
+        metrics = self.controller.metrics
+        if by == "cmd":
+            return metrics.by_cmd()
+        if by == "device":
+            return metrics.by_device()
+        keys = {"model": lambda dev: dev.model, "subnet": subnet}
+        if by not in keys:
+            raise ValueError(f"unknown grouping: {by!r}")
+        return metrics.group(self.registry.select(), keys[by])
 
     def __enter__(self) -> "Application":
         self.start()
@@ -46,11 +86,28 @@ def create_app(config: AppConfig | None = None) -> Application:
     config = config or AppConfig.from_default()
     events = EventBus()
     registry = DeviceRegistry(events)
-    locator = Locator(registry, events)
-    el_udp = ElUDP()
-    controller = DeviceController(registry, events, locator, el_udp)
+    scheduler = Scheduler()
+    pacer = None
+    if config.rate_limit.enabled:
+        pacer = Pacer(config.rate_limit, local_networks())
+    rtt = RttTable(config.rtt)
+    if config.locator.engine == "asyncio":
+        locator = AsyncLocator(registry, events, config.locator, pacer, rtt)
+    else:
+        locator = Locator(registry, events, config.locator, pacer, scheduler, rtt)
+    el_udp_thread = None
+    if config.el_udp.engine == "selector":
+        el_udp = ReactorElUDP(pacer, config.el_udp)
+        el_udp_thread = threading.Thread(
+            target=el_udp.run, name="eludp reactor", daemon=True
+        )
+    else:
+        el_udp = ElUDP(pacer, config.el_udp)
+    controller = DeviceController(registry, events, locator, el_udp, scheduler,
+                                  liveness=config.liveness, history=config.history)
     locator_thread = threading.Thread(
         target=locator.run, name="locator", daemon=True
     )
     return Application(config, events, registry, locator, el_udp,
-                       controller, locator_thread)
+                       controller, locator_thread, el_udp_thread, pacer,
+                       scheduler)
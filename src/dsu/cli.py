@@ -18,6 +18,13 @@ LOG = logging.getLogger("dsu")
 
 
 def _log_event(event: DevLstEvent, **payload):
+    changes = payload.get("changes")
+    if changes is not None:
+        for dev in changes.appended:
+            LOG.info("%s %s", DevLstEvent.APPEND_DEV.name, dev)
+        for dev in changes.updated:
+            LOG.info("%s %s", DevLstEvent.UPDATE_DEV.name, dev)
+        return
     dev = payload.get("dev")
     if dev is None:
         LOG.info("%s", event.name)
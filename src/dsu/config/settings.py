@@ -14,18 +14,86 @@ from dsu.domain.registry import DeviceRegistry
 @dataclass
 class LocatorConfig:
     port: int = 1770
-    poll_interval: float = 2.0
+    poll_interval: float = 2.0      # minimum steady-state interval, s
+    max_poll_interval: float = 5.0  # keep well below the controller watchdog
+    burst_count: int = 4            # REQUESTs sent on startup / refresh()
+    burst_spacing: float = 0.15     # s between burst REQUESTs
+    poll_jitter: float = 0.1        # ± fraction applied to every delay
+    reply_budget: float = 1000.0    # discovery answers/s the host should absorb
+    poll_mode: str = "broadcast"    # "broadcast" | "directed" (unicast to known devices)
+    sweep_interval: float = 30.0    # directed mode: s between broadcast discovery sweeps
+    rcvbuf: int = 0                 # SO_RCVBUF, bytes; 0 = auto-size from fleet size
+    sndbuf: int = 0                 # SO_SNDBUF, bytes; 0 = OS default
+    engine: str = "threads"  # "threads" | "asyncio"
 
 
 @dataclass
 class ElUdpConfig:
     default_port: int = 1775
+    rcvbuf: int = 0                 # SO_RCVBUF per port socket; 0 = auto-size
+    sndbuf: int = 0                 # SO_SNDBUF per port socket; 0 = OS default
+    engine: str = "threads"  # "threads" | "selector"
+
+
+@dataclass
+class RateLimitConfig:
+    enabled: bool = True
+    interface_rate: float = 2000.0  # frames/s per local interface (0 = unlimited)
+    interface_burst: int = 200
+    device_rate: float = 400.0      # frames/s per device (0 = unlimited)
+    device_burst: int = 32
+    max_delay: float = 0.5          # s; frames that would wait longer are dropped
+    interactive_share: float = 0.5  # part of each rate the interactive lane may take
+
+
+@dataclass
+class FirmwareConfig:
+    window: int = 8             # FW_PACK blocks in flight at start
+    max_window: int = 64
+    ack_timeout: float = 0.5    # s before an unacknowledged block is resent
+    max_retries: int = 5        # retransmissions per block before giving up
+
+
+@dataclass
+class RttConfig:
+    initial_timeout: float = 2.0   # s, before a device's first answer (old fixed value)
+    min_timeout: float = 0.05      # s, floor of the adaptive timeout
+    max_timeout: float = 2.0       # s, ceiling, also for backoff
+    granularity: float = 0.01      # s, least variance margin added to SRTT
+    alpha: float = 0.125           # SRTT gain
+    beta: float = 0.25             # RTTVAR gain
+    k: float = 4.0                 # RTTVAR multiplier
+
+
+@dataclass
+class LivenessConfig:
+    phi_threshold: float = 8.0     # suspicion at which a device is offline (P ~ 1e-8)
+    degraded_phi: float = 3.0      # suspicion at which it is shown as degraded
+    window: int = 64               # poll reply intervals kept per device
+    first_interval: float = 2.0    # s, assumed interval before the second reply
+    min_std: float = 0.5           # s, floor of the interval deviation
+    acceptable_pause: float = 3.0  # s of silence tolerated on top of the mean
+    max_silence: float = 60.0      # s; a device silent this long is offline anyway
+    resolution: float = 0.5        # s per timing-wheel tick
+
+
+@dataclass
+class HistoryConfig:
+    polls: int = 128               # poll outcomes (RTT or missed) kept per device
+    transitions: int = 32          # online/offline transitions kept per device
+    flap_window: float = 600.0     # s over which transitions are counted
+    flap_threshold: int = 4        # transitions in the window that make a device flapping
 
 
 @dataclass
 class AppConfig:
     locator: LocatorConfig = field(default_factory=LocatorConfig)
     el_udp: ElUdpConfig = field(default_factory=ElUdpConfig)
+    rate_limit: RateLimitConfig = field(default_factory=RateLimitConfig)
+    firmware: FirmwareConfig = field(default_factory=FirmwareConfig)
+    rtt: RttConfig = field(default_factory=RttConfig)
+    liveness: LivenessConfig = field(default_factory=LivenessConfig)
+    history: HistoryConfig = field(default_factory=HistoryConfig)
     devices_ini_path: Path | None = None  # None → use packaged defaults.ini
 
     @classmethod
@@ -15,6 +15,8 @@ class DevLstEvent(Enum):
     POLL_RESPONSE = auto()
     CMD_RESPONSE = auto()
     CON_FAIL = auto()
+    CON_DEGRADED = auto()   # payload: dev, phi (suspicion past degraded_phi)
+    BATCH = auto()          # payload: changes=ChangeSet (DeviceRegistry.add_many)
 
 
 def _normalize_events(
@@ -64,6 +66,9 @@ class EventBus:
                 if handler in self._subs[event]:
                     self._subs[event].remove(handler)
 
+    def has_subscribers(self, event: DevLstEvent) -> bool:
+        return bool(self._subs[event])
+
     def emit(self, event: DevLstEvent, **payload) -> None:
         for handler in list(self._subs[event]):
             handler(event, **payload)
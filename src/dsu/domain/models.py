@@ -88,8 +88,20 @@ class Device:
     def from_locator_payload(cls, data: bytes) -> "Device":
         if len(data) != LOCATOR_PAYLOAD_SIZE:
             return cls()
+        return cls.from_summary_fields(_LAYOUT.unpack(data))
+
+    @classmethod
+    def from_locator_payloads(cls, data: bytes) -> list["Device"]:
+        """Decode back-to-back Locator_Summary records (trailing bytes ignored)."""
+        usable = len(data) - len(data) % LOCATOR_PAYLOAD_SIZE
+        view = memoryview(data)[:usable]
+        return [cls.from_summary_fields(f) for f in _LAYOUT.iter_unpack(view)]
+
+    @classmethod
+    def from_summary_fields(cls, fields: tuple) -> "Device":
+        """Build from an unpacked Locator_Summary tuple (see _LAYOUT)."""
         (type_, boot, s_num, mac, fw, btldr, pcb, name,
-         ip, mask, gw, host, port, comment) = _LAYOUT.unpack(data)
+         ip, mask, gw, host, port, comment) = fields
         return cls(
             model=DevModel.get(type_, DevModel[0]),
             boot_mode=DevBootMode.get(boot, ""),
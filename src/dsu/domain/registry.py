@@ -3,16 +3,38 @@
 from __future__ import annotations
 
 import threading
-from collections.abc import Iterator
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
 
 from dsu.domain.events import DevLstEvent, EventBus
 from dsu.domain.models import Device
 
 
+@dataclass
+class ChangeSet:
+    """Aggregated outcome of one `DeviceRegistry.add_many()` call.
+
+    `polled` holds every already-known device that answered (as stored
+    after the call), `updated` the subset whose fields changed.
+    """
+    appended: list[Device] = field(default_factory=list)
+    updated: list[Device] = field(default_factory=list)
+    polled: list[Device] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.appended or self.polled)
+
+    def devices(self) -> list[Device]:
+        """Every device seen in the batch: new ones plus answering known ones."""
+        return self.appended + self.polled
+
+
 class DeviceRegistry:
     def __init__(self, events: EventBus) -> None:
         self._events = events
-        self._devices: list[Device] = []
+        # Keyed by serial number, or by (ip, port) for devices without one;
+        # dict order is insertion order, as with the old list.
+        self._devices: dict[str | tuple[str, int], Device] = {}
         self._lock = threading.Lock()
 
     def __len__(self) -> int:
@@ -21,56 +43,114 @@ class DeviceRegistry:
 
     def __iter__(self) -> Iterator[Device]:
         with self._lock:
-            snapshot = list(self._devices)
+            snapshot = list(self._devices.values())
         return iter(snapshot)
 
     def find_by_serial(self, s_num: str) -> Device | None:
         with self._lock:
-            for d in self._devices:
-                if d.s_num and d.s_num == s_num:
-                    return d
+            d = self._devices.get(s_num)
+        if d is not None and d.s_num and d.s_num == s_num:
+            return d
         return None
 
     def find_by_address(self, addr: tuple[str, int]) -> Device | None:
         with self._lock:
-            for d in self._devices:
+            for d in self._devices.values():
                 if d.addr == addr:
                     return d
         return None
 
+    def select(self, predicate: Callable[[Device], bool] | None = None,
+               **fields) -> list[Device]:
+        """Snapshot of the devices matching *predicate* and every field value.
+
+        ``registry.select(model="CP-18")``,
+        ``registry.select(lambda d: d.ip.startswith("10.1."))``
+        """
+        for name in fields:
+            if name not in Device.__dataclass_fields__:
+                raise TypeError(f"Device has no field {name!r}")
+        return [d for d in self
+                if all(getattr(d, k) == v for k, v in fields.items())
+                and (predicate is None or predicate(d))]
+
     def add(self, dev: Device) -> None:
         if not isinstance(dev, Device):
             return
         with self._lock:
-            existing = self._locate_locked(dev)
+            existing, changed = self._apply_locked(dev)
             if existing is None:
-                self._devices.append(dev)
                 self._events.emit(DevLstEvent.APPEND_DEV, dev=dev)
                 return
 
             # Already present: poll response, plus update if anything changed.
             self._events.emit(DevLstEvent.POLL_RESPONSE, dev=existing)
-            if existing.to_dict() != dev.to_dict():
-                idx = self._devices.index(existing)
-                self._devices[idx] = dev
+            if changed:
                 self._events.emit(DevLstEvent.UPDATE_DEV, dev=dev)
 
+    def add_many(self, devs: Iterable[Device]) -> ChangeSet:
+        """Apply a burst of discovery answers under one lock acquisition.
+
+        Emits a single `DevLstEvent.BATCH` carrying the `ChangeSet` instead
+        of per-device APPEND/POLL/UPDATE events. Returns the same change set.
+        """
+        changes = ChangeSet()
+        with self._lock:
+            for dev in devs:
+                if not isinstance(dev, Device):
+                    continue
+                existing, changed = self._apply_locked(dev)
+                if existing is None:
+                    changes.appended.append(dev)
+                elif changed:
+                    changes.polled.append(dev)
+                    changes.updated.append(dev)
+                else:
+                    changes.polled.append(existing)
+        if changes:
+            self._events.emit(DevLstEvent.BATCH, changes=changes)
+        return changes
+
     def remove(self, dev: Device) -> None:
         with self._lock:
             existing = self._locate_locked(dev)
             if existing is None:
                 return
-            self._devices.remove(existing)
+            del self._devices[self._key(existing)]
         self._events.emit(DevLstEvent.REMOVE_DEV, dev=existing)
 
     def clear(self) -> None:
         with self._lock:
             self._devices.clear()
 
+    def _apply_locked(self, dev: Device) -> tuple[Device | None, bool]:
+        """Insert or replace *dev*. Returns (previous entry, fields changed)."""
+        existing = self._locate_locked(dev)
+        if existing is None:
+            self._devices[self._key(dev)] = dev
+            return None, False
+        if vars(existing) == vars(dev):
+            return existing, False
+        old_key, new_key = self._key(existing), self._key(dev)
+        if old_key == new_key:
+            self._devices[new_key] = dev
+        else:
+            # Rare: keep the entry's position while re-keying it.
+            self._devices = {
+                (new_key if k == old_key else k): (dev if k == old_key else d)
+                for k, d in self._devices.items()
+            }
+        return existing, True
+
     def _locate_locked(self, dev: Device) -> Device | None:
-        for d in self._devices:
-            if d.s_num and dev.s_num and d.s_num == dev.s_num:
-                return d
-            if not dev.s_num and d.addr == dev.addr:
+        if dev.s_num:
+            d = self._devices.get(dev.s_num)
+            return d if d is not None and d.s_num == dev.s_num else None
+        for d in self._devices.values():
+            if d.addr == dev.addr:
                 return d
         return None
+
+    @staticmethod
+    def _key(dev: Device) -> str | tuple[str, int]:
+        return dev.s_num or dev.addr
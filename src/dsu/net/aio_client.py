@@ -0,0 +1,209 @@
+"""Awaitable locator commands for asyncio code.
+
+`CmdQueue` runs one thread per device queue and reports through callbacks.
+`AsyncCommandClient` sends the same `LocatorCmd` frames with the same retry
+policy (`CmdQueue.MAX_ATTEMPT_NUM` attempts, one timeout each), but every
+command is a coroutine:
+
+    reply = await client.read_settings(dev)
+    await client.set_primary(dev, dev.primary_settings_array(values))
+
+Responses are routed by the locator's `PendingTable`, so thousands of
+commands can be in flight from one event loop without a thread each. Only
+one command per (device, command code) can be outstanding, as with
+`CmdQueue`; further calls with the same code wait for their turn.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from dsu.domain.models import Device
+from dsu.net.cmd_queue import CmdQueue, response_result
+from dsu.net.locator import LocatorCmd, LocatorErrorCode, LocatorResult
+from dsu.net.metrics import CommandMetrics
+from dsu.net.rtt import RttTable
+
+
+class CommandError(RuntimeError):
+    """The device answered a command with an error result."""
+
+    def __init__(self, dev: Device, cmd: LocatorCmd, result: LocatorResult,
+                 error: LocatorErrorCode) -> None:
+        super().__init__(f"{cmd.name} on {dev.s_num or dev.ip}: "
+                         f"{result.name} ({error.name})")
+        self.dev = dev
+        self.cmd = cmd
+        self.result = result
+        self.error = error
+
+
+class CommandTimeout(TimeoutError):
+    """No answer after every attempt."""
+
+    def __init__(self, dev: Device, cmd: LocatorCmd, attempts: int) -> None:
+        super().__init__(f"{cmd.name} on {dev.s_num or dev.ip}: "
+                         f"no answer after {attempts} attempts")
+        self.dev = dev
+        self.cmd = cmd
+        self.attempts = attempts
+
+
+@dataclass(frozen=True)
+class CommandReply:
+    cmd: LocatorCmd
+    pack: bytes               # reply payload; empty for result-only commands
+    result: LocatorResult     # OK for data replies
+    attempts: int             # sends it took, the answered one included
+    rtt: float                # s, last send → answer
+
+
+class AsyncCommandClient:
+    """Locator commands as coroutines; usable from any running event loop.
+
+    :param send_pack: callable (cmd, data, dev) -> bool, e.g. `Locator.send_pack`
+    :param pending: the locator's `PendingTable`
+    :param blocking_send: True when *send_pack* may sleep (threaded Locator
+           with a pacer); it is then called from the loop's default executor
+    :param rtt: `RttTable`; when given, commands without an explicit timeout
+           wait for the device's adaptive RTO instead of *timeout*
+    :param metrics: `CommandMetrics` that records latency, waits and retries
+    """
+
+    def __init__(
+        self,
+        send_pack: Callable[[LocatorCmd, bytes, Device], bool],
+        pending,
+        timeout: float = 2.0,
+        attempts: int = CmdQueue.MAX_ATTEMPT_NUM,
+        blocking_send: bool = False,
+        rtt: RttTable | None = None,
+        metrics: CommandMetrics | None = None,
+    ) -> None:
+        self._send_pack = send_pack
+        self._pending = pending
+        self.timeout = timeout
+        self.attempts = attempts
+        self._blocking_send = blocking_send
+        self._rtt = rtt
+        self._metrics = metrics
+        # (s_num, cmd) -> [lock, users]: one outstanding command per key
+        self._slots: dict[tuple[str, LocatorCmd], list] = {}
+
+    async def execute(self, dev: Device, cmd: LocatorCmd, data: bytes = b"",
+                      timeout: float | None = None) -> CommandReply:
+        """Send *cmd* until answered; raises CommandTimeout or CommandError."""
+        key = (dev.s_num, cmd)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = [asyncio.Lock(), 0]
+        slot[1] += 1
+        called = asyncio.get_running_loop().time()
+        try:
+            async with slot[0]:
+                return await self._execute(dev, cmd, data, timeout, called)
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                del self._slots[key]
+
+    async def read_settings(self, dev: Device) -> CommandReply:
+        return await self.execute(dev, LocatorCmd.READ_SETTINGS)
+
+    async def set_primary(self, dev: Device, payload: bytes) -> CommandReply:
+        return await self.execute(dev, LocatorCmd.SET_PRIMARY, payload)
+
+    async def get_map(self, dev: Device) -> CommandReply:
+        return await self.execute(dev, LocatorCmd.GET_MAP)
+
+    async def get_log(self, dev: Device, data: bytes = b"") -> CommandReply:
+        return await self.execute(dev, LocatorCmd.GET_LOG, data)
+
+    async def clear_log(self, dev: Device) -> CommandReply:
+        return await self.execute(dev, LocatorCmd.CLEAR_LOG)
+
+    async def get_user(self, dev: Device, data: bytes = b"") -> CommandReply:
+        return await self.execute(dev, LocatorCmd.GET_USER, data)
+
+    async def set_user(self, dev: Device, data: bytes) -> CommandReply:
+        return await self.execute(dev, LocatorCmd.SET_USER, data)
+
+    # --- internals -------------------------------------------------------
+
+    async def _execute(self, dev: Device, cmd: LocatorCmd, data: bytes,
+                       timeout: float | None, called: float) -> CommandReply:
+        loop = asyncio.get_running_loop()
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.record_wait(dev, cmd, loop.time() - called)
+        answer: asyncio.Future[bytes] = loop.create_future()
+
+        def on_response(_event, _dev, *, pack, **_kwargs) -> None:
+            # Called on the locator's receive thread (or loop).
+            try:
+                loop.call_soon_threadsafe(_resolve, answer, bytes(pack))
+            except RuntimeError:
+                pass  # loop already closed
+
+        self._pending.register(dev.s_num, cmd, on_response)
+        try:
+            adaptive = timeout is None and self._rtt is not None
+            key = dev.s_num or dev.ip
+            for attempt in range(1, self.attempts + 1):
+                if adaptive:
+                    wait = self._rtt.timeout(key)
+                else:
+                    wait = self.timeout if timeout is None else timeout
+                await self._send(cmd, data, dev)
+                sent_at = loop.time()       # after any pacer delay
+                try:
+                    pack = await asyncio.wait_for(asyncio.shield(answer), wait)
+                except TimeoutError:
+                    if adaptive:
+                        self._rtt.backoff(key)
+                    continue
+                rtt = loop.time() - sent_at
+                if self._rtt is not None and attempt == 1:
+                    self._rtt.sample(key, rtt)   # Karn: first sends only
+                try:
+                    reply = self._reply(dev, cmd, pack, attempt, rtt)
+                except CommandError:
+                    if metrics is not None:
+                        metrics.record_failure(dev, cmd, rtt if attempt == 1 else None,
+                                               attempt)
+                    raise
+                if metrics is not None:
+                    metrics.record_reply(dev, cmd, rtt if attempt == 1 else None, attempt)
+                return reply
+            if metrics is not None:
+                metrics.record_timeout(dev, cmd, self.attempts)
+            raise CommandTimeout(dev, cmd, self.attempts)
+        finally:
+            self._pending.unregister(dev.s_num, cmd, on_response)
+            answer.cancel()
+
+    async def _send(self, cmd: LocatorCmd, data: bytes, dev: Device) -> None:
+        # A frame dropped by the pacer is simply not answered: the attempt
+        # times out and is retried like a lost one.
+        if self._blocking_send:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._send_pack, cmd, data, dev)
+        else:
+            self._send_pack(cmd, data, dev)
+
+    @staticmethod
+    def _reply(dev: Device, cmd: LocatorCmd, pack: bytes, attempts: int,
+               rtt: float) -> CommandReply:
+        result = response_result(cmd, pack)
+        if result is None:
+            return CommandReply(cmd, pack, LocatorResult.OK, attempts, rtt)
+        if result[0] != LocatorResult.OK:
+            raise CommandError(dev, cmd, *result)
+        return CommandReply(cmd, b"", result[0], attempts, rtt)
+
+
+def _resolve(future: asyncio.Future, pack: bytes) -> None:
+    if not future.done():
+        future.set_result(pack)
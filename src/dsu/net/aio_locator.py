@@ -0,0 +1,162 @@
+"""Asyncio engine for the locator protocol.
+
+`AsyncLocator` keeps the wire handling and public API of `Locator`
+(`send_pack`, `request`, `refresh`, `DevLstEvent` emissions) but drives the
+socket from an event loop: no receive thread, no poll thread and no busy
+loop. Idle cost is a single blocked `epoll`/`select` call, and shutdown only
+has to wake the loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from dsu.net.locator import Locator
+
+_LOG = logging.getLogger(__name__)
+
+
+class _LocatorProtocol(asyncio.DatagramProtocol):
+    def __init__(self, locator: AsyncLocator) -> None:
+        self._locator = locator
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self._locator._ingest(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        _LOG.debug("locator socket error: %s", exc)
+
+
+class AsyncLocator(Locator):
+    """Locator whose socket and poll timer live on an asyncio event loop.
+
+    Either await `serve()` on an existing loop, or call `run()` from a
+    thread to give the locator a private loop (this is what `Application`
+    does). `shutdown()` is safe to call from any thread.
+    """
+
+    def __init__(self, registry, events, config=None, pacer=None, rtt=None) -> None:
+        super().__init__(registry, events, config, pacer, rtt=rtt)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._transport: asyncio.DatagramTransport | None = None
+        self._stopped: asyncio.Event | None = None
+        self._poll_handle: asyncio.TimerHandle | None = None
+        self._probe_task: asyncio.Task | None = None
+
+    async def serve(self) -> None:
+        """Serve the locator port on the running loop until `shutdown()`."""
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _LocatorProtocol(self), sock=self.sock)
+        self._loop = loop
+        try:
+            if not self.is_shutdown:
+                self._schedule_poll()
+                await self._stopped.wait()
+        finally:
+            if self._poll_handle is not None:
+                self._poll_handle.cancel()
+                self._poll_handle = None
+            if self._probe_task is not None:
+                self._probe_task.cancel()
+                self._probe_task = None
+            self._loop = None
+            self._transport.close()
+            self._transport = None
+            self._registry.clear()
+
+    def run(self) -> None:
+        """Run `serve()` on a private event loop in the calling thread."""
+        asyncio.run(self.serve())
+
+    def refresh(self) -> None:
+        self._refresh_requested = True
+        self.poller.start_burst()
+        self._call_soon(self._schedule_poll)
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self._call_soon(self._stop)
+
+    def probe(self, devs=None) -> None:
+        """Probe known devices from a task paced by the rate limiter.
+
+        Reserving every probe up front would book the interface budget
+        seconds ahead and starve interactive commands, so each probe is
+        reserved only once the previous one is due. A sweep still running
+        when the next tick fires is left to finish.
+        """
+        if self.pacer is None:
+            super().probe(devs)
+            return
+        if self._probe_task is not None and not self._probe_task.done():
+            return
+        targets = list(self._probe_targets(devs))
+        self._probe_task = self._loop.create_task(self._paced_probe(targets))
+
+    async def _paced_probe(self, targets) -> None:
+        sent = 0
+        for addr, key in targets:
+            if self.is_shutdown:
+                break
+            delay = self.pacer.reserve(None, key, addr[0], drop=False)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._transport_send(self.frames.request_frame, addr)
+            self._probe_sent_to(key)
+            sent += 1
+        self.poller.on_probe_sent(sent)
+
+    # --- loop plumbing ---------------------------------------------------
+
+    def _schedule_poll(self) -> None:
+        if self._poll_handle is not None:
+            self._poll_handle.cancel()
+        self._poll_handle = self._loop.call_later(
+            self.poller.next_delay(len(self._registry)), self._on_poll_timer)
+
+    def _on_poll_timer(self) -> None:
+        self._poll_handle = None
+        self._poll_tick()
+        self._schedule_poll()
+
+    def _stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def _sendto(self, pack, addr) -> None:
+        # FrameBuilder reuses its buffer on the next build, so hand the
+        # transport its own copy when the send is deferred to the loop.
+        self._call_soon(self._transport_send, bytes(pack), addr)
+
+    def _sendto_later(self, delay, pack, addr, on_sent=None) -> None:
+        # Never sleep on the loop: let it send the paced frame later.
+        self._call_soon(self._loop_send_later, delay, bytes(pack), addr, on_sent)
+
+    def _loop_send_later(self, delay: float, pack: bytes, addr, on_sent=None) -> None:
+        self._loop.call_later(delay, self._send_now, pack, addr, on_sent)
+
+    def _send_now(self, pack: bytes, addr, on_sent) -> None:
+        if on_sent is not None:
+            on_sent()
+        self._transport_send(pack, addr)
+
+    def _transport_send(self, pack: bytes, addr) -> None:
+        if self._transport is not None:
+            self._transport.sendto(pack, addr)
+
+    def _call_soon(self, fn, *args) -> None:
+        """Run *fn* on the locator loop: inline when already there, else hop."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            fn(*args)
+        else:
+            loop.call_soon_threadsafe(fn, *args)
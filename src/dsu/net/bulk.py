@@ -0,0 +1,141 @@
+"""Fleet-wide command plans with bounded parallelism.
+
+A plan is a list of `PlanStep`s run in order on every selected device;
+devices run concurrently, at most `concurrency` at a time:
+
+    plan = [PlanStep(LocatorCmd.READ_SETTINGS),
+            PlanStep(LocatorCmd.SET_PRIMARY,
+                     lambda dev, replies: dev.primary_settings_array(changes))]
+    result = await BulkScheduler(client, concurrency=64).run(
+        registry.select(model="CP-18"), plan)
+
+A device stops at its first failed step (the rest of the fleet carries on)
+and `BulkResult` collects one `DeviceOutcome` per device.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+from dsu.domain.models import Device
+from dsu.net.aio_client import AsyncCommandClient, CommandError, CommandReply, CommandTimeout
+from dsu.net.locator import LocatorCmd
+from dsu.net.progress import ProgressTracker
+
+_LOG = logging.getLogger(__name__)
+
+# Payload of a step: fixed bytes, or built per device from the replies so far.
+StepData = bytes | Callable[[Device, list[CommandReply]], bytes]
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    cmd: LocatorCmd
+    data: StepData = b""
+    timeout: float | None = None   # per attempt; client default if None
+
+
+@dataclass
+class DeviceOutcome:
+    dev: Device
+    replies: list[CommandReply] = field(default_factory=list)
+    error: Exception | None = None
+    failed_step: int | None = None     # index into the plan
+    queued: float = 0.0                # s spent waiting for a slot
+    elapsed: float = 0.0               # s from first send to last reply
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BulkResult:
+    outcomes: list[DeviceOutcome]
+    elapsed: float                     # s, whole run
+
+    @property
+    def succeeded(self) -> list[DeviceOutcome]:
+        return [o for o in self.outcomes if o.ok]
+
+    @property
+    def failed(self) -> list[DeviceOutcome]:
+        return [o for o in self.outcomes if not o.ok]
+
+    def by_serial(self) -> dict[str, DeviceOutcome]:
+        return {o.dev.s_num: o for o in self.outcomes}
+
+
+class BulkScheduler:
+    """Runs a plan over many devices with at most *concurrency* in progress.
+
+    `tracker` counts finished devices (commands = devices) for progress UIs.
+    """
+
+    def __init__(self, client: AsyncCommandClient, concurrency: int = 64,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._client = client
+        self.concurrency = concurrency
+        self._clock = clock
+        self.tracker = ProgressTracker(clock=clock)
+
+    async def run(self, devices: Iterable[Device], plan: list[PlanStep],
+                  on_done: Callable[[DeviceOutcome], None] | None = None
+                  ) -> BulkResult:
+        """Run *plan* on every device; outcomes keep the order of *devices*."""
+        devices = list(devices)
+        slots = asyncio.Semaphore(self.concurrency)
+        self.tracker.reset()
+        self.tracker.add(len(devices))
+        self.tracker.start()
+        start = self._clock()
+
+        async def one(dev: Device) -> DeviceOutcome:
+            outcome = DeviceOutcome(dev)
+            if not dev.s_num:
+                # Responses are matched by serial number.
+                outcome.error = ValueError(f"{dev.ip}: no serial number")
+                outcome.failed_step = 0
+            else:
+                waiting = self._clock()
+                async with slots:
+                    began = self._clock()
+                    outcome.queued = began - waiting
+                    await self._run_device(outcome, plan)
+                    outcome.elapsed = self._clock() - began
+            self.tracker.advance(0, 1)
+            if on_done is not None:
+                on_done(outcome)
+            return outcome
+
+        outcomes = await asyncio.gather(*(one(d) for d in devices))
+        return BulkResult(list(outcomes), self._clock() - start)
+
+    async def _run_device(self, outcome: DeviceOutcome, plan: list[PlanStep]) -> None:
+        for i, step in enumerate(plan):
+            try:
+                data = step.data(outcome.dev, outcome.replies) \
+                    if callable(step.data) else step.data
+                reply = await self._client.execute(outcome.dev, step.cmd, data,
+                                                   step.timeout)
+            except (CommandError, CommandTimeout, ValueError) as exc:
+                # This device is done (ValueError: its payload could not be
+                # built); the others keep going.
+                outcome.error = exc
+                outcome.failed_step = i
+                return
+            except Exception as exc:  # noqa: BLE001 - recorded in the outcome
+                # A socket error or a broken payload builder fails this
+                # device only; the other outcomes must not be lost.
+                _LOG.exception("bulk step %d on %s failed", i,
+                               outcome.dev.s_num or outcome.dev.ip)
+                outcome.error = exc
+                outcome.failed_step = i
+                return
+            outcome.replies.append(reply)
@@ -1,11 +1,16 @@
+import logging
 import threading
-from enum import Enum, auto
 import time
+from enum import Enum, auto
 
 from dsu.domain.events import DevLstEvent
 from dsu.domain.models import Device
 from dsu.net import locator
 from dsu.net import eludp
+from dsu.net.progress import ProgressTracker
+from dsu.net.scheduler import default_scheduler
+
+_LOG = logging.getLogger(__name__)
 
 
 class QueueResult(Enum):
@@ -17,14 +22,62 @@ class QueueResult(Enum):
     TIMEOUT = auto()
 
 
+# Команды, на которые контроллер отвечает коротким "результатом выполнения"
+RESULT_CMDS = frozenset({locator.LocatorCmd.SET_PRIMARY,
+                         locator.LocatorCmd.EXE_EL_CMD,
+                         locator.LocatorCmd.CLEAR_LOG})
+# Команды, на которые контроллер отвечает пакетом данных
+DATA_CMDS = frozenset({locator.LocatorCmd.READ_SETTINGS,
+                       locator.LocatorCmd.READ_MEM_PROP,
+                       locator.LocatorCmd.READ_MEM_DUMP,
+                       locator.LocatorCmd.GET_MAP,
+                       locator.LocatorCmd.GET_LOG,
+                       locator.LocatorCmd.SET_USER,
+                       locator.LocatorCmd.GET_USER})
+_RESULT_CODES = frozenset(res.value for res in locator.LocatorResult)
+
+
+def decode_cmd_result(pack):
+    """
+    Разбор простого ответа "Результат выполнения команды"
+    :param pack: пакет ответа
+    :return: (LocatorResult, LocatorErrorCode)
+    """
+    result = locator.LocatorResult(pack[0])
+    error_code = locator.LocatorErrorCode.DEFAULT if len(pack) < 2 or result == locator.LocatorResult.OK \
+        else locator.LocatorErrorCode(pack[1])
+    return result, error_code
+
+
+def response_result(cmd, pack):
+    """
+    Определяет, является ли ответ на команду cmd "результатом выполнения"
+    :param cmd: LocatorCmd
+    :param pack: пакет ответа
+    :return: (LocatorResult, LocatorErrorCode) для короткого ответа,
+             None - для ответа с данными
+    """
+    if cmd in RESULT_CMDS:
+        return decode_cmd_result(pack)
+    # READ_SETTINGS при ошибке возвращает результат вместо настроек
+    if cmd == locator.LocatorCmd.READ_SETTINGS and 0 < len(pack) <= 2 \
+            and pack[0] in _RESULT_CODES:
+        return decode_cmd_result(pack)
+    return None
+
+
 class CmdQueue(list):
     """
     Очередь команд контроллеру
+    Команды отправляются по порядку. При depth > 1 ответа могут одновременно
+    ждать до depth команд с разными кодами: ответы сопоставляются по коду
+    команды и обрабатываются в порядке прихода
     """
 
     MAX_ATTEMPT_NUM = 3  # Максимальное количество попыток передать команду
 
-    def __init__(self, dev, events, send_pack, cbs=None, timeout=2):
+    def __init__(self, dev, events, send_pack, cbs=None, timeout=2, pending=None,
+                 scheduler=None, rtt=None, depth=1, metrics=None):
         """
         Инициализация очереди
         :param dev: устройство, которому принадлежит очередь
@@ -32,174 +85,360 @@ class CmdQueue(list):
         :param send_pack: callable (cmd, data) -> None
         :param cbs: callback-функция
         :param timeout: таймаут по умолчанию (у каждой команды может быть свой таймаут)
+        :param pending: PendingTable локатора. Если задана, ответы приходят
+               напрямую в очередь по ключу (s_num, cmd), а не через EventBus
+        :param scheduler: Scheduler для таймеров ожидания ответа
+               (по умолчанию - общий default_scheduler())
+        :param rtt: RttTable. Если задана, команды без собственного таймаута
+               ждут ответа по оценке RTT устройства, а не timeout
+        :param depth: сколько команд с разными кодами может одновременно ждать
+               ответа (1 - строго по очереди: отправка, ответ, следующая команда).
+               Команды с одинаковым кодом всегда выполняются по очереди
+        :param metrics: CommandMetrics для гистограмм RTT, ожидания в очереди
+               и счетчиков повторов, таймаутов и ошибок
         """
         super().__init__()
         self.__shutdown = False
-        self.__response_received = False
-        self.__fail = False
-        self.__timeout = False
-        self.__progress = 0
+        self.__failed = None          # слот первой неуспешной команды
+        self.__running = False
+        self.__finished = False
+        # Прогресс в командах и байтах: O(1) на команду, чтение не сбрасывает
+        self.tracker = ProgressTracker()
+        # Окно отправленных команд: response_processing, timeout и stop меняют
+        # его под этим условием и будят поток очереди
+        self._cond = threading.Condition()
+        self._inflight = {}           # код команды -> слот команды, ждущей ответа
+        # Слоты, которые таймер пометил для повтора: отправляет их поток очереди,
+        # потому что отправка может спать в ограничителе скорости
+        self._resend = []
         if isinstance(dev, Device):
             self.dev = dev
         self._events = events
         self._send_pack = send_pack   # callable (cmd, data) -> None
+        self._pending = pending
         self.cbs = cbs
         self.default_timeout = timeout
+        self.depth = max(1, depth)
+        self._rtt = rtt
+        self._metrics = metrics
+        self._started = 0.0           # запуск очереди, от него считается ожидание
+        self._scheduler = scheduler if scheduler is not None else default_scheduler()
         self.queue_thr = None
-        self.response_timer = None
-        self.attempt_num = 0
-        self.current_cmd = None
+        self.current_cmd = None       # последняя отправленная команда
 
-        self.cnt = 0
-        self.prev_gen_cnt = 0
-
-    def append(self, code, pack=b'', gen=None, timeout=None, pause=0, cbs=None):
+    def append(self, code, pack=b'', gen=None, timeout=None, pause=0, cbs=None,
+               size=None):
         """
         Переопределяет метод append класса list. Добавляет команду в очередь
         Команда не может быть добавлена, если в данный момент очередь исполняется
         :param code: код команды. Для протокола locator - LocatorCmd, для eludp - None
         :param pack: пакет с данными команды
         :param gen: генератор длинных очередей команд
-        :param timeout: таймаут выполнения команды, по умолчанию присваивается self.default_timeout
-        :param pause: пауза после выполнения команды.
+        :param timeout: таймаут выполнения команды, по умолчанию - по оценке RTT устройства
+               (если задана rtt) или self.default_timeout
+        :param pause: пауза после выполнения команды. Следующая команда
+               отправляется только после ответа на эту и паузы
         :param cbs: callback-функция команды, в нее передается ответ контроллера при успешном выполнении команды
                Должна принимать следующие аргументы:
                result: QueueResult (обязательный аргумент)
                **kwargs  (необязательные именованные аргументы)
                     'pack' - пакет с данными
                     'cmd_result' - (result, error_code) короткий ответ "результат выполнения команды"
+        :param size: ожидаемый объем пакетов генератора в байтах (по умолчанию
+               атрибут size генератора, если он есть); уточняется по факту
         :return:
         """
-        if 0 < self.__progress < 100:
+        if self.__running:
             return
-        if timeout is None:
+        if self.__finished:
+            # Новая очередь после завершенной: прогресс начинается заново
+            self.__finished = False
+            self.tracker.reset()
+        if timeout is None and self._rtt is None:
             timeout = self.default_timeout
+        if size is None:
+            size = len(pack) if gen is None else getattr(gen, 'size', 0)
         super().append({'code': code, 'pack': pack, 'gen': gen,
-                        'timeout': timeout, 'pause': pause, 'cbs': cbs})
+                        'timeout': timeout, 'pause': pause, 'cbs': cbs,
+                        'size': size})
+        self.tracker.add(1, size)
 
     def progress(self):
         """
-        Возвращает прогресс очереди в процентах
-        Если прогресс равен 100%, значение сбрасывается сразу после чтения
+        Возвращает прогресс очереди в процентах (по байтам, а без данных - по командам)
+        Чтение не сбрасывает значение
         :return: прогресс
         """
-        progress = self.__progress
-        if progress == 100:
-            self.__progress = 0
-        return progress
+        return self.tracker.snapshot().percent
+
+    def progress_info(self):
+        """
+        Подробный прогресс: (done_bytes, total_bytes, rate, eta) и счетчики команд
+        :return: Progress
+        """
+        return self.tracker.snapshot()
+
+    def subscribe_progress(self, fn):
+        """
+        Подписка на изменения прогресса без опроса
+        :param fn: callable (Progress), вызывается из потока, получившего ответ
+        :return: функция отписки
+        """
+        return self.tracker.subscribe(fn)
 
-    def timeout(self):
+    def timeout(self, slot):
         """
         Вызывается по завершению таймаута ожидания ответа на команду
-        Если количество попыток исполнить команду не превышает MAX_ATTEMPT_NUM, команда повторяется
+        Если количество попыток исполнить команду не превышает MAX_ATTEMPT_NUM, команда
+        помечается для повтора; отправляет ее поток очереди, а не поток таймеров
+        :param slot: слот команды в окне отправленных
         :return:
         """
-        self.attempt_num += 1
-        if self.attempt_num >= CmdQueue.MAX_ATTEMPT_NUM:
-            self.__timeout = True
-            if self.current_cmd['cbs'] is not None:
-                self.current_cmd['cbs'](QueueResult.TIMEOUT)
-        else:
-            self.response_timer = threading.Timer(interval=self.current_cmd['timeout'],
-                                                  function=self.timeout)
-            self.response_timer.name = 'Response timer thread'
-            self.response_timer.start()
-            self._send_pack(
-                self.current_cmd['code'], self.current_cmd['pack'])
-
-    def calc_progress(self):
-        if self.__progress == 1:
-            self.__progress = 2
-
-        gen_num = 0
-        progress = 0
-        for cmd in self:
-            if cmd['gen'] is not None:
-                gen_num += 1
-                break
-        if gen_num == 0:
-            progress = int(100 * (self.index(self.current_cmd) / len(self)))
-        else:
-            if self.current_cmd['gen'] is None:
-                progress += 1
+        cmd = slot['cmd']
+        with self._cond:
+            if slot['result'] is not None or self.__shutdown \
+                    or self._inflight.get(cmd['code']) is not slot:
+                return
+            slot['attempt'] += 1
+            expired = slot['attempt'] >= CmdQueue.MAX_ATTEMPT_NUM
+            if expired:
+                slot['result'] = QueueResult.TIMEOUT
             else:
-                gen_weight = (97 - len(self) + gen_num) // gen_num
-                progress += gen_weight * \
-                    self.current_cmd['gen'].progress() // 100
-        self.__progress = progress if progress > 2 else 2
+                self._resend.append(slot)
+                self._cond.notify_all()
+        if cmd['timeout'] is None:
+            self._rtt.backoff(self._rtt_key())
+        if expired:
+            if self._metrics is not None:
+                self._metrics.record_timeout(self.dev, cmd['code'], slot['attempt'])
+            if cmd['cbs'] is not None:
+                cmd['cbs'](QueueResult.TIMEOUT)
+            self._finish(slot)
+
+    def _rtt_key(self):
+        return self.dev.s_num or self.dev.ip
+
+    def _cmd_timeout(self, cmd):
+        """
+        Таймаут ожидания ответа: заданный командой или текущий RTO устройства
+        :param cmd: команда очереди
+        :return: таймаут, с
+        """
+        if cmd['timeout'] is not None:
+            return cmd['timeout']
+        return self._rtt.timeout(self._rtt_key())
 
     def queue_process(self):
         """
         Цикл отправки очереди команд
         :return:
         """
-        def cmd_process():
-            nonlocal self
-            self.__response_received = self.__fail = self.__timeout = False
-            self.attempt_num = 0
-            self.response_timer = threading.Timer(interval=self.current_cmd['timeout'],
-                                                  function=self.timeout)
-            self.response_timer.name = 'Response timer thread'
-            self.response_timer.start()
-            while not self.__shutdown \
-                    and not self.__response_received \
-                    and not self.__fail \
-                    and not self.__timeout:
-                pass
-            if self.__shutdown:
-                print('Завершение работы')
-                self.response_timer.cancel()
-                self.__progress = 0
-                return False
-            if self.__timeout:
-                print(f"Таймаут исполнения команды {self.current_cmd['code']}")
-                self.cbs(QueueResult.TIMEOUT)
-                self.__progress = 0
-                return False
-            if self.__fail:
-                print(f"Ошибка исполнения команды {self.current_cmd['code']}")
-                self.response_timer.cancel()
-                self.cbs(QueueResult.FAIL)
-                self.__progress = 0
-                return False
-            self.response_timer.cancel()
-            self.calc_progress()
-            return True
-
-        self.__progress = 1
-        for self.current_cmd in self:
-            if self.current_cmd['gen'] is None:
-                self._send_pack(
-                    self.current_cmd['code'], self.current_cmd['pack'])
-                if not cmd_process():
-                    break
-                time.sleep(self.current_cmd['pause'])
-            else:
-                break_queue = False
-                for cmd_pack in self.current_cmd['gen']():
-                    self.current_cmd['pack'] = cmd_pack
-                    self._send_pack(self.current_cmd['code'], cmd_pack)
-                    if not cmd_process():
-                        break_queue = True
-                        break
-                if break_queue:
-                    break
-                time.sleep(self.current_cmd['pause'])
-        else:
-            self.__progress = 100
+        self._started = time.monotonic()
+        self.tracker.start()
+        done = self._send_all() and self._wait(lambda: not self._inflight)
+        with self._cond:
+            failed = self.__failed
+            abandoned = list(self._inflight.values())
+            self._inflight.clear()
+            self._resend.clear()
+        # После ошибки или остановки ответы на остальные команды уже не нужны
+        for slot in abandoned:
+            self._unwatch(slot['cmd']['code'])
+            if slot['timer'] is not None:
+                slot['timer'].cancel()
+        if self.__shutdown:
+            _LOG.debug("queue of %s stopped", self.dev.s_num)
+        elif not done:
+            _LOG.debug("queue of %s: %s on %s", self.dev.s_num,
+                       failed['result'].name, failed['cmd']['code'])
             if self.cbs is not None:
-                self.cbs(QueueResult.OK)
-        self._events.unbind(self.response_processing, DevLstEvent.CMD_RESPONSE)
+                self.cbs(failed['result'])
+        elif self.cbs is not None:
+            self.cbs(QueueResult.OK)
+        self.__running = False
+        self.__finished = True
+        if self._pending is None:
+            self._events.unbind(self.response_processing, DevLstEvent.CMD_RESPONSE)
         self.clear()
 
+    def _send_all(self):
+        """
+        Отправка команд очереди по мере освобождения окна
+        :return: False, если очередь прервана ошибкой или остановкой
+        """
+        for self.current_cmd in self:
+            cmd = self.current_cmd
+            code = cmd['code']
+
+            def free(code=code):
+                return code not in self._inflight and len(self._inflight) < self.depth
+
+            if cmd['gen'] is None:
+                if not self._wait(free):
+                    return False
+                self._record_wait(cmd)
+                self._launch(cmd, cmd['pack'], cmd['size'], 1)
+            else:
+                # Пакеты генератора идут под одним кодом - строго по одному
+                sent = 0
+                for cmd_pack in cmd['gen']():
+                    if not self._wait(free):
+                        return False
+                    if not sent:
+                        self._record_wait(cmd)
+                    self._launch(cmd, cmd_pack, len(cmd_pack), 0)
+                    sent += len(cmd_pack)
+                if not self._wait(lambda code=code: code not in self._inflight):
+                    return False
+                # Объем генератора известен точно только после его исчерпания
+                self.tracker.add(0, sent - cmd['size'])
+                self.tracker.advance(0, 1)
+            if cmd['pause']:
+                if not self._wait(lambda: not self._inflight):
+                    return False
+                self._pause(cmd['pause'])
+        return True
+
+    def _record_wait(self, cmd):
+        """
+        Время от запуска очереди до первой отправки команды
+        :param cmd: команда очереди
+        :return:
+        """
+        if self._metrics is not None:
+            self._metrics.record_wait(self.dev, cmd['code'],
+                                      time.monotonic() - self._started)
+
+    def _launch(self, cmd, pack, size, cmds):
+        """
+        Отправка команды и запуск таймера ожидания ответа
+        :param cmd: команда очереди
+        :param pack: отправляемый пакет (для генератора - очередной)
+        :param size: байт, засчитываемых в прогресс по ответу
+        :param cmds: команд, засчитываемых в прогресс по ответу
+        :return:
+        """
+        slot = {'cmd': cmd, 'pack': pack, 'size': size, 'cmds': cmds,
+                'attempt': 0, 'result': None, 'timer': None,
+                'sent_at': time.monotonic()}
+        # Регистрация до отправки: ответ может прийти раньше, чем send_pack вернется
+        with self._cond:
+            self._inflight[cmd['code']] = slot
+        self._watch(cmd['code'])
+        self._send_pack(cmd['code'], pack)
+        # RTT - от ухода кадра: отправка могла ждать в ограничителе скорости.
+        # Ответ, принятый до возврата send_pack, считается от момента вызова
+        with self._cond:
+            if slot['result'] is None:
+                slot['sent_at'] = time.monotonic()
+        self._arm(slot)
+
+    def _retransmit(self, slot):
+        """
+        Повтор команды, для которой истек таймаут (в потоке очереди)
+        :param slot: слот команды
+        :return:
+        """
+        code = slot['cmd']['code']
+        with self._cond:
+            if slot['result'] is not None or self._inflight.get(code) is not slot:
+                return
+        self._send_pack(code, slot['pack'])
+        self._arm(slot)
+
+    def _arm(self, slot):
+        """
+        Запуск таймера ожидания ответа на отправленную команду
+        :param slot: слот команды
+        :return:
+        """
+        timer = self._scheduler.schedule(self._cmd_timeout(slot['cmd']), self.timeout, slot)
+        with self._cond:
+            slot['timer'] = timer
+            answered = slot['result'] is not None
+        if answered:
+            timer.cancel()
+
+    def _finish(self, slot):
+        """
+        Убирает ответившую или просроченную команду из окна и будит поток очереди
+        :param slot: слот команды
+        :return:
+        """
+        code = slot['cmd']['code']
+        with self._cond:
+            if self._inflight.get(code) is not slot:
+                return
+            del self._inflight[code]
+            if slot['result'] != QueueResult.OK and self.__failed is None:
+                self.__failed = slot
+            self._cond.notify_all()
+        if slot['timer'] is not None:
+            slot['timer'].cancel()
+        self._unwatch(code)
+
+    def _wait(self, predicate):
+        """
+        Ожидание условия над окном отправленных команд
+        Пока условие не выполнено, поток очереди повторяет команды, помеченные
+        таймером: таймеры планировщика не должны ждать отправки
+        :param predicate: условие, проверяется под self._cond
+        :return: False, если очередь остановлена или команда завершилась ошибкой
+        """
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.__shutdown
+                                    or self.__failed is not None
+                                    or self._resend
+                                    or predicate())
+                if self.__shutdown or self.__failed is not None:
+                    return False
+                resend, self._resend = self._resend, []
+                if not resend:
+                    return True
+            for slot in resend:
+                self._retransmit(slot)
+
+    def _pause(self, pause):
+        """
+        Пауза после команды, прерываемая остановкой очереди
+        :param pause: длительность паузы, с
+        :return:
+        """
+        if pause:
+            with self._cond:
+                self._cond.wait_for(lambda: self.__shutdown, timeout=pause)
+
+    def _watch(self, code):
+        """
+        Регистрирует очередь в pending как получателя ответов на команду code.
+        Без pending ничего не делает
+        :param code: код отправляемой команды
+        :return:
+        """
+        if self._pending is not None:
+            self._pending.register(self.dev.s_num, code, self.response_processing)
+
+    def _unwatch(self, code):
+        """
+        Снимает регистрацию, сделанную _watch
+        :param code: код команды
+        :return:
+        """
+        if self._pending is not None:
+            self._pending.unregister(self.dev.s_num, code, self.response_processing)
+
     def run(self):
         """
         Запуск очереди команд
         Очередь запускается в отдельном потоке
         :return:
         """
-        self._events.bind(self.response_processing,
-                          DevLstEvent.CMD_RESPONSE)
+        if self._pending is None:
+            self._events.bind(self.response_processing,
+                              DevLstEvent.CMD_RESPONSE)
+        self.__running = True
+        self.__failed = None
         self.queue_thr = threading.Thread(target=self.queue_process,
                                           name=f"Command queue thread of {self.dev.s_num}")
         self.queue_thr.start()
@@ -209,7 +448,9 @@ class CmdQueue(list):
         Остановка исполнения очереди команд
         :return:
         """
-        self.__shutdown = True
+        with self._cond:
+            self.__shutdown = True
+            self._cond.notify_all()
         self.queue_thr.join()
         self.clear()
 
@@ -217,6 +458,7 @@ class CmdQueue(list):
         """
         Обработчик ответа на команду
         Вызывается по событию DevLstEvent.CMD_RESPONSE (получен ответ на команду)
+        Ответ сопоставляется по коду с одной из ожидающих ответа команд
         :param event: Событие списка устройств
         :param dev: Устройство, вызвывшее событие
         :param kwargs: Набор именованных аргументов
@@ -225,59 +467,52 @@ class CmdQueue(list):
                        'pack' - пакет данных, структура зависит от команды
         :return:
         """
-        if self.current_cmd['gen'] is not None:
-            if self.current_cmd['gen'].cnt - self.prev_gen_cnt > 1:
-                print(
-                    f" > 1 ({self.current_cmd['gen'].cnt - self.prev_gen_cnt})")
-            self.prev_gen_cnt = self.current_cmd['gen'].cnt
         if event != DevLstEvent.CMD_RESPONSE:
             return
         if self.dev != dev:
-            print("Device doesn`t match")
             return
         if 'cmd' not in kwargs.keys():
             return
-        if kwargs['cmd'] != self.current_cmd['code']:
-            print("Cmd doesn`t match", kwargs['cmd'], self.current_cmd['code'])
-            return
+        code = kwargs['cmd']
         pack = kwargs['pack']
         result = None
-        self.cnt += 1
-        if kwargs['cmd'] == locator.LocatorCmd.SET_PRIMARY or \
-           kwargs['cmd'] == locator.LocatorCmd.EXE_EL_CMD or \
-           kwargs['cmd'] == locator.LocatorCmd.CLEAR_LOG:
-            result = self.cmd_result(pack)
-        elif kwargs['cmd'] == locator.LocatorCmd.READ_SETTINGS:
-            if len(pack) <= 2 and pack[0] in [res.value for res in locator.LocatorResult]:
-                result = self.cmd_result(pack)
-            else:
-                self.__response_received = True
-        elif (kwargs['cmd'] == locator.LocatorCmd.READ_MEM_PROP or
-              kwargs['cmd'] == locator.LocatorCmd.READ_MEM_DUMP or
-              kwargs['cmd'] == locator.LocatorCmd.GET_MAP or
-              kwargs['cmd'] == locator.LocatorCmd.GET_LOG or
-              kwargs['cmd'] == locator.LocatorCmd.CLEAR_LOG or
-              kwargs['cmd'] == locator.LocatorCmd.SET_USER or
-              kwargs['cmd'] == locator.LocatorCmd.GET_USER):
-            self.__response_received = True
-        if self.current_cmd['cbs'] is not None:
-            if self.__response_received:
-                if result is None:
-                    self.current_cmd['cbs'](QueueResult.OK, pack=pack)
+        with self._cond:
+            slot = self._inflight.get(code)
+            if slot is not None and slot['result'] is None:
+                result = response_result(code, pack)
+                if result is not None:
+                    slot['result'] = QueueResult.OK if result[0] == locator.LocatorResult.OK \
+                        else QueueResult.FAIL
+                elif code in DATA_CMDS:
+                    slot['result'] = QueueResult.OK
                 else:
-                    self.current_cmd['cbs'](QueueResult.OK, result=result)
-            elif self.__fail:
-                self.current_cmd['cbs'](QueueResult.FAIL, result=result)
-
-    def cmd_result(self, pack):
-        """
-        Обработка простого ответа "Результат выполнения команды"
-        :param pack:
-        :return:
-        """
-        result = locator.LocatorResult(pack[0])
-        error_code = locator.LocatorErrorCode.DEFAULT if len(pack) < 2 or result == locator.LocatorResult.OK \
-            else locator.LocatorErrorCode(pack[1])
-        self.__response_received = (result == locator.LocatorResult.OK)
-        self.__fail = not self.__response_received
-        return result, error_code
+                    return
+                # Правило Карна: ответ на повтор нельзя отнести к конкретной отправке
+                first_send = slot['attempt'] == 0
+            else:
+                slot = None
+        if slot is None:
+            # Повторный ответ или ответ на команду, которую очередь уже не ждет
+            if self._metrics is not None:
+                self._metrics.record_stale(self.dev, code)
+            return
+        rtt = time.monotonic() - slot['sent_at'] if first_send else None
+        if self._rtt is not None and rtt is not None:
+            self._rtt.sample(self._rtt_key(), rtt)
+        if self._metrics is not None:
+            record = self._metrics.record_reply if slot['result'] == QueueResult.OK \
+                else self._metrics.record_failure
+            record(self.dev, code, rtt, slot['attempt'] + 1)
+        cmd = slot['cmd']
+        if cmd['cbs'] is not None:
+            if slot['result'] == QueueResult.FAIL:
+                cmd['cbs'](QueueResult.FAIL, result=result)
+            elif result is None:
+                cmd['cbs'](QueueResult.OK, pack=pack)
+            else:
+                cmd['cbs'](QueueResult.OK, result=result)
+        if slot['result'] == QueueResult.OK:
+            self.tracker.advance(slot['size'], slot['cmds'])
+        # Команда уходит из окна после своего callback-а, чтобы он
+        # отработал раньше перехода к следующей команде
+        self._finish(slot)
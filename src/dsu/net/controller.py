@@ -1,13 +1,19 @@
-"""Per-device controller — owns watchdog timers and packet dispatch."""
+"""Per-device controller — owns device liveness and packet dispatch."""
 
 from __future__ import annotations
 
-import threading
-
+from dsu.config.settings import HistoryConfig, LivenessConfig
 from dsu.domain.events import DevLstEvent, EventBus
 from dsu.domain.models import Device
-
-WATCHDOG_TIMEOUT = 10  # seconds
+from dsu.net.aio_client import AsyncCommandClient
+from dsu.net.aio_locator import AsyncLocator
+from dsu.net.bulk import BulkScheduler
+from dsu.net.cmd_queue import CmdQueue
+from dsu.net.history import LinkHistory
+from dsu.net.liveness import LivenessTracker
+from dsu.net.metrics import CommandMetrics
+from dsu.net.ratelimit import Lane
+from dsu.net.scheduler import Scheduler, default_scheduler
 
 
 class DeviceController:
@@ -23,58 +29,98 @@ class DeviceController:
         events: EventBus,
         locator,              # Locator
         el_udp,               # ElUDP
+        scheduler: Scheduler | None = None,
+        metrics: CommandMetrics | None = None,
+        liveness: LivenessConfig | None = None,
+        history: HistoryConfig | None = None,
     ) -> None:
         self._registry = registry
         self._events = events
         self._locator = locator
         self._el_udp = el_udp
-        self._watchdogs: dict[str, threading.Timer] = {}
-
-        events.bind(self._on_append, DevLstEvent.APPEND_DEV)
-        events.bind(self._on_poll_or_update,
-                    [DevLstEvent.POLL_RESPONSE, DevLstEvent.UPDATE_DEV,
-                     DevLstEvent.CMD_RESPONSE])
+        self._scheduler = scheduler if scheduler is not None else default_scheduler()
+        self.metrics = metrics if metrics is not None else CommandMetrics()
+        # Suspicion (phi) per device instead of a fixed watchdog timeout
+        self.liveness = LivenessTracker(self._on_timeout, liveness, self._scheduler,
+                                        on_degraded=self._on_degraded)
+        # Command responses refresh liveness straight from the locator,
+        # so nothing here depends on CMD_RESPONSE reaching the bus.
+        locator.liveness = self.liveness
+        # Poll RTTs and misses come from the locator, transitions from here
+        self.history = LinkHistory(history)
+        locator.history = self.history
+
+        events.bind(self._on_seen,
+                    [DevLstEvent.APPEND_DEV, DevLstEvent.POLL_RESPONSE,
+                     DevLstEvent.UPDATE_DEV])
         events.bind(self._on_remove, DevLstEvent.REMOVE_DEV)
-
-    def send_locator(self, dev: Device, cmd, data: bytes = b"") -> None:
-        self._locator.send_pack(cmd, data, dev)
-
-    def send_eludp(self, dev: Device, pack: bytes) -> None:
-        self._el_udp.send_pack(dev, pack)
+        events.bind(self._on_batch, DevLstEvent.BATCH)
+
+    def send_locator(self, dev: Device, cmd, data: bytes = b"",
+                     lane: Lane = Lane.BULK) -> bool:
+        """False when the rate limiter dropped the frame.
+
+        Operator actions pass `Lane.INTERACTIVE` to go ahead of bulk traffic.
+        """
+        return bool(self._locator.send_pack(cmd, data, dev, lane=lane))
+
+    def send_eludp(self, dev: Device, pack: bytes, lane: Lane = Lane.BULK) -> bool:
+        """False when the rate limiter dropped the packet."""
+        return bool(self._el_udp.send_pack(dev, pack, lane=lane))
+
+    def make_queue(self, dev: Device, cbs=None, timeout: float = 2,
+                   depth: int = 1) -> CmdQueue:
+        """Command queue for *dev* whose responses are routed by the locator.
+
+        With *depth* > 1 up to that many commands with distinct codes await
+        their replies at once; keep 1 where a command depends on the previous.
+        """
+        return CmdQueue(
+            dev, self._events,
+            lambda cmd, data: self.send_locator(dev, cmd, data),
+            cbs=cbs, timeout=timeout, pending=self._locator.pending,
+            scheduler=self._scheduler, rtt=self._locator.rtt, depth=depth,
+            metrics=self.metrics,
+        )
+
+    def make_client(self, timeout: float = 2) -> AsyncCommandClient:
+        """Awaitable command API over the same locator and pending table."""
+        return AsyncCommandClient(
+            self._locator.send_pack, self._locator.pending, timeout=timeout,
+            # the threaded locator sleeps out pacer delays in send_pack
+            blocking_send=(self._locator.pacer is not None
+                           and not isinstance(self._locator, AsyncLocator)),
+            rtt=self._locator.rtt, metrics=self.metrics,
+        )
+
+    def make_bulk(self, concurrency: int = 64, timeout: float = 2) -> BulkScheduler:
+        """Fleet-wide plan runner, at most *concurrency* devices at a time."""
+        return BulkScheduler(self.make_client(timeout), concurrency)
 
     def shutdown(self) -> None:
-        for timer in self._watchdogs.values():
-            timer.cancel()
-        self._watchdogs.clear()
+        self.liveness.close()
 
-    # --- watchdog --------------------------------------------------------
+    # --- liveness --------------------------------------------------------
 
-    def _on_append(self, _event, *, dev: Device, **_kwargs) -> None:
-        self._restart_watchdog(dev)
+    def _on_seen(self, event, *, dev: Device, **_kwargs) -> None:
+        self.liveness.touch(dev)
+        if event == DevLstEvent.APPEND_DEV:
+            self.history.record_state(dev.s_num or dev.ip, True)
 
-    def _on_poll_or_update(self, _event, *, dev: Device, **_kwargs) -> None:
-        self._restart_watchdog(dev)
+    def _on_batch(self, _event, *, changes, **_kwargs) -> None:
+        touch = self.liveness.touch
+        for dev in changes.devices():
+            touch(dev)
+        for dev in changes.appended:
+            self.history.record_state(dev.s_num or dev.ip, True)
 
     def _on_remove(self, _event, *, dev: Device, **_kwargs) -> None:
-        timer = self._watchdogs.pop(self._key(dev), None)
-        if timer is not None:
-            timer.cancel()
-
-    def _restart_watchdog(self, dev: Device) -> None:
-        key = self._key(dev)
-        existing = self._watchdogs.pop(key, None)
-        if existing is not None:
-            existing.cancel()
-        timer = threading.Timer(WATCHDOG_TIMEOUT, self._on_timeout, args=(dev,))
-        timer.name = f"watchdog:{key}"
-        timer.daemon = True
-        timer.start()
-        self._watchdogs[key] = timer
+        self.liveness.forget(dev)
+
+    def _on_degraded(self, dev: Device, phi: float) -> None:
+        self._events.emit(DevLstEvent.CON_DEGRADED, dev=dev, phi=phi)
 
     def _on_timeout(self, dev: Device) -> None:
+        self.history.record_state(dev.s_num or dev.ip, False)
         self._events.emit(DevLstEvent.CON_FAIL, dev=dev)
         self._registry.remove(dev)
-
-    @staticmethod
-    def _key(dev: Device) -> str:
-        return dev.s_num or f"{dev.ip}:{dev.port}"
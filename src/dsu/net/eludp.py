@@ -2,7 +2,10 @@ import socket
 from enum import Enum
 
 import threading
+from dsu.config.settings import ElUdpConfig
 from dsu.domain.models import Device
+from dsu.net.ratelimit import Lane
+from dsu.net.sockstats import SocketStats, auto_rcvbuf
 
 
 class ElCmd(Enum):
@@ -17,9 +20,14 @@ class ElCmd(Enum):
 class ElUDP(object):
     """ Адресный протокол обмена с устройствами """
 
-    def __init__(self):
+    def __init__(self, pacer=None, config=None):
         self.__shutdown = False
         self.buff_size = 1024
+        self.pacer = pacer  # Pacer или None - без ограничения скорости
+        self.config = config or ElUdpConfig()
+        # Счетчики и размеры буферов сокетов: ключ - port, значение - SocketStats
+        self.sock_stats = {}
+        self._rcvbuf_target = 0
 
         # Сокеты представлены в виде словаря:
         #   ключ - port
@@ -31,13 +39,24 @@ class ElUDP(object):
         #   значение - кортеж (socket,
         #                      список callback-функций [cbs]
         #                      )
+        # Изменяется только под self._lock (bind/unbind)
         self.devices = {}
+        self._lock = threading.Lock()
+
+        # Таблица диспетчеризации приема: ключ (ip-адрес, port),
+        # значение - кортеж callback-функций. Не изменяется на месте:
+        # bind/unbind подменяют словарь целиком (copy-on-write), поэтому
+        # потоки приема читают его без блокировки
+        self._routes = {}
 
     def close(self):
-        for s in self.sockets.values():
-            s[0].close()
-        self.sockets.clear()
-        self.devices.clear()
+        with self._lock:
+            # Через _close_port: движок сам останавливает прием на сокете
+            for port in list(self.sockets):
+                self._close_port(port)
+            self.sock_stats.clear()
+            self.devices.clear()
+            self._routes = {}
 
     def bind(self, dev, cbs):
         """
@@ -49,25 +68,92 @@ class ElUDP(object):
         if not isinstance(dev, Device):
             return
 
-        if dev.addr in self.devices.keys():
-            if cbs in self.devices[dev.addr][1]:
-                return
+        with self._lock:
+            if dev.addr in self.devices.keys():
+                if cbs in self.devices[dev.addr][1]:
+                    return
+                else:
+                    self.devices[dev.addr][1].append(cbs)
             else:
-                self.devices[dev.addr][1].append(cbs)
-        else:
-            self.devices[dev.addr] = [None, [cbs]]
-
-        if dev.port not in self.sockets:
-            # Если у добавленного устройства новый порт, начинаем его прослушивать
-            self.sockets[dev.addr[1]] = (socket.socket(socket.AF_INET, socket.SOCK_DGRAM),
-                                         threading.Thread(target=self.listening_port,
-                                                          args=(dev.addr[1],),
-                                                          name=f'Listening port {dev.addr[1]}'))
-            self.sockets[dev.addr[1]][0].bind(('', dev.addr[1]))
-            self.sockets[dev.addr[1]][0].settimeout(0.1)
-            self.sockets[dev.addr[1]][1].start()
-        # присваиваем устройству сокет
-        self.devices[dev.addr][0] = self.sockets[dev.addr[1]][0]
+                if dev.addr[1] not in self.sockets:
+                    # Если у добавленного устройства новый порт, начинаем его прослушивать.
+                    # Устройство заносится в devices только после успешного открытия порта:
+                    # OSError (порт занят) оставляет таблицы без изменений
+                    self._open_port(dev.addr[1])
+                # присваиваем устройству сокет
+                self.devices[dev.addr] = [self.sockets[dev.addr[1]][0], [cbs]]
+            self._publish(dev.addr)
+            if not self.config.rcvbuf and \
+                    auto_rcvbuf(len(self.devices)) > self._rcvbuf_target:
+                self._size_buffers()
+
+    def _open_port(self, port):
+        """
+        Открывает сокет на порту и запускает поток его прослушивания
+        :param port:
+        :return:
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(('', port))
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(0.1)
+        thread = threading.Thread(target=self.listening_port,
+                                  args=(port,),
+                                  name=f'Listening port {port}')
+        self.sockets[port] = (sock, thread)
+        self._track(port, sock)
+        thread.start()
+
+    def _track(self, port, sock):
+        """
+        Заводит счетчики сокета порта и задает размеры его буферов
+        :param port:
+        :param sock:
+        :return: SocketStats сокета
+        """
+        stats = self.sock_stats[port] = SocketStats(sock)
+        rcvbuf = self.config.rcvbuf or auto_rcvbuf(len(self.devices))
+        self._rcvbuf_target = max(self._rcvbuf_target, rcvbuf)
+        stats.size(rcvbuf, self.config.sndbuf)
+        return stats
+
+    def _size_buffers(self):
+        """
+        Увеличивает буферы приема всех сокетов по текущему числу устройств
+        :return:
+        """
+        self._rcvbuf_target = auto_rcvbuf(len(self.devices))
+        for stats in self.sock_stats.values():
+            stats.size(self._rcvbuf_target, self.config.sndbuf)
+
+    def socket_stats(self):
+        """
+        Счетчики принятых/потерянных датаграмм по портам
+        :return: словарь port -> SocketCounters
+        """
+        return {port: stats.counters() for port, stats in list(self.sock_stats.items())}
+
+    def _close_port(self, port):
+        """
+        Прекращает прослушивание порта
+        :param port:
+        :return:
+        """
+        sock, thread = self.sockets.pop(port)
+        self.sock_stats.pop(port, None)
+        # Ожидающий recv держит сокет открытым в ядре, и повторный bind на
+        # тот же порт получил бы EADDRINUSE. Будим поток пустой датаграммой
+        # самому себе и дожидаемся, пока он закроет сокет
+        try:
+            sock.sendto(b'', ('127.0.0.1', port))
+        except OSError:
+            pass
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        sock.close()
 
     def listening_port(self, port):
         """
@@ -76,16 +162,46 @@ class ElUDP(object):
         :param port:
         :return:
         """
-        while not self.__shutdown:
+        sock = self.sockets[port][0]
+        stats = self.sock_stats[port]
+        # Поток завершается, когда порт закрыт через unbind (сокет убран из sockets)
+        while not self.__shutdown and self.sockets.get(port, (None,))[0] is sock:
             try:
-                data, addr = self.sockets[port][0].recvfrom(self.buff_size)
-                for dev_addr in self.devices.keys():
-                    if dev_addr == addr:
-                        for func in self.devices[dev_addr][1]:
-                            func(data)
+                data, addr = stats.recv(self.buff_size)
             except TimeoutError:
                 continue
-        self.sockets[port][0].close()
+            except OSError:
+                # сокет закрыт
+                break
+            if self.sockets.get(port, (None,))[0] is not sock:
+                break
+            stats.received += 1
+            self._dispatch(data, addr)
+        sock.close()
+
+    def _dispatch(self, data, addr):
+        """
+        Вызывает callback-функции, подписанные на устройство с адресом addr
+        :param data: принятый пакет
+        :param addr: адрес отправителя
+        :return:
+        """
+        for func in self._routes.get(addr, ()):
+            func(data)
+
+    def _publish(self, addr):
+        """
+        Публикует новый снимок таблицы диспетчеризации для адреса addr
+        Вызывается под self._lock
+        :param addr: (ip-адрес, port)
+        :return:
+        """
+        routes = dict(self._routes)
+        if addr in self.devices:
+            routes[addr] = tuple(self.devices[addr][1])
+        else:
+            routes.pop(addr, None)
+        self._routes = routes
 
     def unbind(self, dev, cbs=None):
         """
@@ -98,35 +214,45 @@ class ElUDP(object):
         if not isinstance(dev, Device):
             return
 
-        if dev.addr in self.devices.keys():
-            if cbs is None:
-                self.devices.pop(dev.addr)
-            else:
-                if cbs not in self.devices[dev.addr][1]:
-                    return
-                self.devices[dev.addr][1].remove(cbs)
-                if len(self.devices[dev.addr][1]) == 0:
+        with self._lock:
+            if dev.addr in self.devices.keys():
+                if cbs is None:
                     self.devices.pop(dev.addr)
+                else:
+                    if cbs not in self.devices[dev.addr][1]:
+                        return
+                    self.devices[dev.addr][1].remove(cbs)
+                    if len(self.devices[dev.addr][1]) == 0:
+                        self.devices.pop(dev.addr)
+                self._publish(dev.addr)
 
-        # Проверяем: остались ли устройства с тем же портом, если нет, удаляем порт из списка прослушивания
-        for dev_addr in self.devices.keys():
-            if dev_addr[1] == dev.addr[1]:
-                return
-        self.sockets[dev.addr[1]].close()
-        self.sockets.pop(dev.addr[1])
+            # Проверяем: остались ли устройства с тем же портом, если нет, удаляем порт из списка прослушивания
+            for dev_addr in self.devices.keys():
+                if dev_addr[1] == dev.addr[1]:
+                    return
+            if dev.addr[1] in self.sockets:
+                self._close_port(dev.addr[1])
 
-    def send_pack(self, dev, pack):
+    def send_pack(self, dev, pack, device_pacing=True, lane=Lane.BULK):
         """
         Отправляет пакет на устройство
 
         :param dev: устройство Device
         :param pack: передаваемый пакет
-        :return:
+        :param device_pacing: False - не применять лимит устройства (только
+               лимит интерфейса), когда темп уже задан подтверждениями
+        :param lane: Lane.INTERACTIVE - действие оператора, не ждет массовый трафик
+        :return: False, если пакет отброшен ограничителем скорости
         """
         if not isinstance(dev, Device):
-            return
+            return False
+        if self.pacer is not None:
+            key = (dev.s_num or dev.ip) if device_pacing else None
+            if not self.pacer.acquire(dev=key, ip=dev.ip, lane=lane):
+                return False
 
         self.devices[dev.addr][0].sendto(pack, dev.addr)
+        return True
 
     def run(self):
         """
@@ -137,8 +263,15 @@ class ElUDP(object):
             pass
         for s in self.sockets.values():
             s[1].join()
-        self.sockets.clear()
-        self.devices.clear()
+        with self._lock:
+            self.sockets.clear()
+            self.sock_stats.clear()
+            self.devices.clear()
+            self._routes = {}
+
+    @property
+    def is_shutdown(self) -> bool:
+        return self.__shutdown
 
     def shutdown(self):
         """
@@ -0,0 +1,162 @@
+"""Selector-based reactor engine for the addressed (ElUDP) protocol.
+
+`ElUDP` opens one socket and one polling thread per device port. With
+mixed port assignments that is dozens of threads waking ten times a second
+for nothing. `ReactorElUDP` keeps the same bind/unbind/send_pack API but
+owns every port socket from a single `selectors` loop that blocks without
+a timeout until a socket is readable or the reactor is woken.
+"""
+
+from __future__ import annotations
+
+import selectors
+import socket
+import threading
+from collections import deque
+
+from dsu.net.eludp import ElUDP
+from dsu.net.sockstats import SocketStats
+
+
+class ReactorElUDP(ElUDP):
+    """ElUDP whose port sockets are multiplexed on one selector thread.
+
+    `bind`/`unbind` may be called from any thread: registrations are queued
+    and applied by the loop between `select()` calls, so the selector is
+    only ever touched from `run()`. A port unbound and bound again before
+    the loop got to close it reuses the still-open socket, so the rebind
+    never races the deferred close into EADDRINUSE.
+    """
+
+    def __init__(self, pacer=None, config=None) -> None:
+        super().__init__(pacer, config)
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._pending: deque = deque()
+        self._pending_lock = threading.Lock()
+        # port -> (socket, SocketStats) unbound but not yet closed by the loop
+        self._closing: dict[int, tuple[socket.socket, SocketStats]] = {}
+        self._loop_thread: threading.Thread | None = None
+
+    # --- ElUDP hooks -----------------------------------------------------
+
+    def _open_port(self, port: int) -> None:
+        closing = self._closing.pop(port, None)
+        if closing is not None:
+            # Still bound and registered: cancel the pending close.
+            sock, stats = closing
+            self.sockets[port] = (sock, None)
+            self.sock_stats[port] = stats
+            return
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(('', port))
+        except OSError:
+            sock.close()
+            raise
+        sock.setblocking(False)
+        self.sockets[port] = (sock, None)
+        stats = self._track(port, sock)
+        self._post(self._register, sock, stats)
+
+    def _close_port(self, port: int) -> None:
+        sock, _ = self.sockets.pop(port)
+        self._closing[port] = (sock, self.sock_stats.pop(port))
+        self._post(self._unregister, port, sock)
+
+    def close(self) -> None:
+        super().close()
+        if self._loop_thread is None or not self._loop_thread.is_alive():
+            # No loop to hand the unregistrations to: apply them here.
+            self._apply_pending()
+
+    # --- loop ------------------------------------------------------------
+
+    def run(self) -> None:
+        """Reactor loop. Blocks in select() with no timeout while idle."""
+        self._loop_thread = threading.current_thread()
+        try:
+            while not self.is_shutdown:
+                self._apply_pending()
+                for key, _mask in self._selector.select():
+                    if key.fileobj is self._wake_r:
+                        self._drain_wakeups()
+                    else:
+                        self._read_ready(key.fileobj, key.data)
+        finally:
+            self._apply_pending()
+            for key in list(self._selector.get_map().values()):
+                if key.fileobj is not self._wake_r:
+                    key.fileobj.close()
+            self._selector.close()
+            self._wake_r.close()
+            self._wake_w.close()
+            with self._lock:
+                self._closing.clear()
+                self.sockets.clear()
+                self.sock_stats.clear()
+                self.devices.clear()
+                self._routes = {}
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self._wakeup()
+
+    def _read_ready(self, sock: socket.socket, stats: SocketStats) -> None:
+        # Drain everything queued on the socket before going back to select().
+        while True:
+            try:
+                data, addr = stats.recv(self.buff_size)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            stats.received += 1
+            self._dispatch(data, addr)
+
+    # --- cross-thread registration ---------------------------------------
+
+    def _post(self, fn, *args) -> None:
+        with self._pending_lock:
+            self._pending.append((fn, args))
+        self._wakeup()
+
+    def _apply_pending(self) -> None:
+        while True:
+            with self._pending_lock:
+                if not self._pending:
+                    return
+                fn, args = self._pending.popleft()
+            fn(*args)
+
+    def _register(self, sock: socket.socket, stats: SocketStats) -> None:
+        if sock.fileno() >= 0:
+            self._selector.register(sock, selectors.EVENT_READ, stats)
+
+    def _unregister(self, port: int, sock: socket.socket) -> None:
+        with self._lock:
+            if self._closing.get(port, (None,))[0] is not sock:
+                return  # rebound in the meantime, the socket stays in use
+            del self._closing[port]
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+    def _wakeup(self) -> None:
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            # Buffer full (a wakeup is already pending) or already closed.
+            pass
+
+    def _drain_wakeups(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
@@ -0,0 +1,81 @@
+"""Locator frame builder with precompiled templates.
+
+A locator frame is a 27-byte LOCATOR_Header (password, byte-reversed serial,
+ver, cmd, len), the command data and a one-byte checksum that makes the sum
+of all frame bytes zero modulo 256.
+
+The constant broadcast REQUEST frame is built once. For addressed frames
+the 24-byte password+serial prefix and its byte sum are cached per serial
+number, so building a frame is one `struct.pack_into` into a reused
+per-thread buffer plus a C-level `sum()` over the data.
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+from enum import Enum
+
+LOCATOR_PASSWORD = b'12345678'
+BROADCAST_SERIAL = b'\xff' * 16
+HEADER_SIZE = 27
+MAX_DATA = 255
+
+_PREFIX_SIZE = 24
+_TAIL = struct.Struct('<BBB')  # ver, cmd, len
+
+
+class FrameBuilder:
+    """Builds locator frames; safe to share between threads.
+
+    `build()` returns a memoryview into a per-thread buffer that is
+    overwritten by the next `build()` on the same thread: send it (or copy
+    it) before building another frame.
+    """
+
+    def __init__(self, ver: int = 1) -> None:
+        self.ver = ver
+        self._prefixes: dict[str, tuple[bytes, int]] = {}
+        self._local = threading.local()
+        self._broadcast = self._prefix_for('')
+        request = bytearray(HEADER_SIZE + 1)
+        self._fill(request, self._broadcast, 0x01, b'')
+        self.request_frame = bytes(request)
+
+    def build(self, cmd, data=b'', s_num: str | None = None) -> memoryview:
+        """Frame *cmd* with *data* for serial *s_num* (None/'' → broadcast)."""
+        if isinstance(cmd, Enum):
+            cmd = cmd.value
+        if not s_num and cmd == 0x01 and not data:
+            return memoryview(self.request_frame)
+        if len(data) > MAX_DATA:
+            raise ValueError(f"locator data too long: {len(data)} > {MAX_DATA}")
+        prefix = self._prefixes.get(s_num) if s_num else self._broadcast
+        if prefix is None:
+            prefix = self._prefix_for(s_num)
+        buf = getattr(self._local, 'buf', None)
+        if buf is None:
+            buf = self._local.buf = bytearray(HEADER_SIZE + MAX_DATA + 1)
+        size = self._fill(buf, prefix, cmd, data)
+        return memoryview(buf)[:size]
+
+    def forget(self, s_num: str) -> None:
+        """Drop the cached header prefix of a device."""
+        self._prefixes.pop(s_num, None)
+
+    def _fill(self, buf: bytearray, prefix: tuple[bytes, int], cmd: int, data) -> int:
+        head, head_sum = prefix
+        n = len(data)
+        buf[:_PREFIX_SIZE] = head
+        _TAIL.pack_into(buf, _PREFIX_SIZE, self.ver, cmd, n)
+        buf[HEADER_SIZE:HEADER_SIZE + n] = data
+        buf[HEADER_SIZE + n] = -(head_sum + self.ver + cmd + n + sum(data)) & 0xff
+        return HEADER_SIZE + n + 1
+
+    def _prefix_for(self, s_num: str) -> tuple[bytes, int]:
+        serial = bytes.fromhex(s_num)[:16].ljust(16, b'\0') if s_num else BROADCAST_SERIAL
+        head = LOCATOR_PASSWORD + serial[::-1]
+        prefix = (head, sum(head))
+        if s_num:
+            self._prefixes[s_num] = prefix
+        return prefix
@@ -0,0 +1,219 @@
+"""ACK-clocked sliding-window firmware transfer over ElUDP.
+
+The image is cut into `Firmware` packets (one FW_INFO, then FW_PACK blocks
+tagged with their word offset). FW_INFO goes out alone; the blocks are then
+kept `window` at a time in flight. Each block is acknowledged by its word
+offset, only blocks whose acknowledgement is overdue are retransmitted, and
+the window follows AIMD: +1/window per acknowledged block, halved on loss.
+
+Acknowledgement format: the device answers every FW_INFO/FW_PACK packet
+with a datagram that echoes the command byte, followed (for FW_PACK) by the
+little-endian 16-bit word offset of the block. A different wire format only
+needs another `parse_ack`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from dsu.config.settings import FirmwareConfig
+from dsu.net.eludp import ElCmd
+from dsu.net.progress import ProgressTracker
+
+_FW_INFO = ElCmd.FW_INFO.value[0]
+_FW_PACK = ElCmd.FW_PACK.value[0]
+
+BlockKey = tuple[int, int]   # (cmd, word offset)
+
+
+class TransferError(RuntimeError):
+    """A block stayed unacknowledged after `max_retries` retransmissions."""
+
+
+@dataclass(frozen=True)
+class TransferStats:
+    total_bytes: int      # firmware payload bytes acknowledged
+    elapsed: float        # s, first send → last acknowledgement
+    bytes_per_s: float
+    sent: int             # packets put on the wire, retransmissions included
+    retransmits: int
+    window: float         # window size at the end of the transfer
+
+
+def parse_ack(data: bytes) -> BlockKey | None:
+    """Map an ElUDP answer to the key of the packet it acknowledges."""
+    if not data:
+        return None
+    if data[0] == _FW_INFO:
+        return _FW_INFO, 0
+    if data[0] == _FW_PACK and len(data) >= 3:
+        return _FW_PACK, int.from_bytes(data[1:3], 'little')
+    return None
+
+
+def packet_key(pack: bytes) -> BlockKey:
+    """Key of an outgoing `Firmware` packet (same shape as `parse_ack`)."""
+    if pack[0] == _FW_PACK:
+        return _FW_PACK, int.from_bytes(pack[1:3], 'little')
+    return pack[0], 0
+
+
+def _payload_size(pack: bytes) -> int:
+    return len(pack) - 3 if pack[0] == _FW_PACK else 0
+
+
+class FirmwareTransfer:
+    """Flash one device. `run()` blocks the calling thread until done.
+
+    :param el_udp: ElUDP instance the device answers on
+    :param dev: target Device
+    :param packets: iterable of packets, e.g. a `Firmware` object
+    :param on_progress: callable (done_bytes, total_bytes), called from the
+           ElUDP receive thread on every new acknowledgement
+
+    `tracker` adds rate and ETA: subscribe to it for `Progress` updates.
+    """
+
+    def __init__(
+        self,
+        el_udp,
+        dev,
+        packets: Iterable[bytes],
+        config: FirmwareConfig | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+        parse: Callable[[bytes], BlockKey | None] = parse_ack,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config = config or FirmwareConfig()
+        self._el_udp = el_udp
+        self._dev = dev
+        self._packets: dict[BlockKey, bytes] = {}
+        for pack in packets:
+            pack = bytes(pack)
+            self._packets[packet_key(pack)] = pack
+        self.total_bytes = sum(_payload_size(p) for p in self._packets.values())
+        self.tracker = ProgressTracker(clock=clock)
+        self.tracker.add(len(self._packets), self.total_bytes)
+        self._on_progress = on_progress
+        self._parse = parse
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._queue: deque[BlockKey] = deque()
+        # key -> [last send time, attempts]; ordered by last send time
+        self._inflight: OrderedDict[BlockKey, list] = OrderedDict()
+        self._window = float(self.config.window)
+        self._last_cut = float('-inf')
+        self._done_bytes = 0
+        self._sent = 0
+        self._retransmits = 0
+
+    @property
+    def window(self) -> float:
+        return self._window
+
+    def run(self) -> TransferStats:
+        """Send the whole image; raises TransferError if the device stops answering."""
+        self._el_udp.bind(self._dev, self._on_datagram)
+        try:
+            start = self._clock()
+            self.tracker.start()
+            info = [k for k in self._packets if k[0] != _FW_PACK]
+            blocks = [k for k in self._packets if k[0] == _FW_PACK]
+            # The device has to accept FW_INFO before any block.
+            self._transfer(info, window=1)
+            self._transfer(blocks)
+            elapsed = self._clock() - start
+        finally:
+            self._el_udp.unbind(self._dev, self._on_datagram)
+        return TransferStats(
+            total_bytes=self._done_bytes,
+            elapsed=elapsed,
+            bytes_per_s=self._done_bytes / elapsed if elapsed > 0 else 0.0,
+            sent=self._sent,
+            retransmits=self._retransmits,
+            window=self._window,
+        )
+
+    # --- sender ------------------------------------------------------------
+
+    def _transfer(self, keys: list[BlockKey], window: int | None = None) -> None:
+        with self._cond:
+            self._queue.extend(keys)
+        while True:
+            with self._cond:
+                if not self._queue and not self._inflight:
+                    return
+                now = self._clock()
+                to_send = self._collect(now, window)
+                if not to_send:
+                    self._cond.wait(self._next_deadline(now) - now)
+                    continue
+            for key in to_send:
+                self._send(self._packets[key])
+
+    def _collect(self, now: float, window: int | None) -> list[BlockKey]:
+        """Overdue blocks plus new ones that fit in the window (lock held)."""
+        cfg = self.config
+        to_send = []
+        for key, entry in list(self._inflight.items()):
+            if now - entry[0] < cfg.ack_timeout:
+                break
+            if entry[1] > cfg.max_retries:
+                raise TransferError(
+                    f"no ack for block at word offset {key[1]} "
+                    f"after {cfg.max_retries} retransmissions")
+            self._on_loss(now)
+            entry[0] = now
+            entry[1] += 1
+            self._inflight.move_to_end(key)
+            self._retransmits += 1
+            to_send.append(key)
+        limit = window if window is not None else int(self._window)
+        while self._queue and len(self._inflight) < limit:
+            key = self._queue.popleft()
+            self._inflight[key] = [now, 1]
+            to_send.append(key)
+        return to_send
+
+    def _next_deadline(self, now: float) -> float:
+        if not self._inflight:
+            return now
+        oldest = next(iter(self._inflight.values()))
+        return oldest[0] + self.config.ack_timeout
+
+    def _on_loss(self, now: float) -> None:
+        # One cut per timeout period: a burst of losses is one congestion event.
+        if now - self._last_cut >= self.config.ack_timeout:
+            self._window = max(1.0, self._window / 2)
+            self._last_cut = now
+
+    def _send(self, pack: bytes) -> None:
+        # The window already bounds what is in flight towards the device,
+        # so only the per-interface budget applies.
+        # A packet dropped by the interface limiter stays in flight and is
+        # retransmitted on its ack timeout like a lost one.
+        if self._el_udp.send_pack(self._dev, pack, device_pacing=False):
+            self._sent += 1
+
+    # --- receiver ----------------------------------------------------------
+
+    def _on_datagram(self, data: bytes) -> None:
+        key = self._parse(data)
+        if key is None:
+            return
+        with self._cond:
+            if self._inflight.pop(key, None) is None:
+                return  # duplicate or stray ack
+            size = _payload_size(self._packets[key])
+            self._done_bytes += size
+            done = self._done_bytes
+            self._window = min(float(self.config.max_window),
+                               self._window + 1.0 / self._window)
+            self._cond.notify()
+        self.tracker.advance(size, 1)
+        if self._on_progress is not None:
+            self._on_progress(done, self.total_bytes)
@@ -0,0 +1,229 @@
+"""Per-device connection-quality history in fixed-size ring buffers.
+
+For each device (serial number, or ip without one) `LinkHistory` keeps
+
+* the outcome of its last `HistoryConfig.polls` polls: the reply RTT, or NaN
+  when the poll went unanswered (a probe or sweep with no reply before the
+  next one);
+* its last `HistoryConfig.transitions` online/offline transitions.
+
+Every series is a pair of `array`s (monotonic time and value) used as a
+ring, so a device costs the same memory whether it has been watched for a
+minute or a month: with the defaults about 2 KB, 10 MB for 5000 devices.
+
+Queries answer the questions monitoring would otherwise be needed for:
+
+    history.flapping()                    # keys with >= 4 transitions in 10 min
+    history.worst(10, by="loss")          # LinkStats of the lossiest links
+    history.stats("0102...").rtt_p95
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from array import array
+from collections.abc import Callable, Hashable, Iterator
+from dataclasses import dataclass
+
+from dsu.config.settings import HistoryConfig
+
+
+class Ring:
+    """The last *size* (time, value) pairs; *typecode* is that of the values."""
+
+    __slots__ = ("_next", "count", "times", "values")
+
+    def __init__(self, typecode: str, size: int) -> None:
+        self.times = array("d", bytes(8 * size))
+        self.values = array(typecode, bytes(array(typecode).itemsize * size))
+        self._next = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, t: float, value) -> None:
+        i = self._next
+        self.times[i] = t
+        self.values[i] = value
+        self._next = (i + 1) % len(self.times)
+        if self.count < len(self.times):
+            self.count += 1
+
+    def items(self, since: float | None = None) -> Iterator[tuple[float, object]]:
+        """Pairs oldest first, optionally only those at or after *since*."""
+        size = len(self.times)
+        start = (self._next - self.count) % size
+        for n in range(self.count):
+            i = (start + n) % size
+            if since is None or self.times[i] >= since:
+                yield self.times[i], self.values[i]
+
+    def last(self):
+        return self.values[(self._next - 1) % len(self.times)] if self.count else None
+
+
+class _Device:
+    __slots__ = ("polls", "transitions")
+
+    def __init__(self, cfg: HistoryConfig) -> None:
+        self.polls = Ring("f", cfg.polls)            # RTT s; NaN = missed poll
+        self.transitions = Ring("B", cfg.transitions)  # 1 online, 0 offline
+
+
+@dataclass(frozen=True)
+class LinkStats:
+    key: Hashable
+    polls: int                 # polls in the history, missed ones included
+    missed: int
+    loss: float                # missed / polls
+    rtt_p50: float | None      # s, over answered polls
+    rtt_p95: float | None
+    rtt_p99: float | None
+    transitions: int           # online/offline changes within the flap window
+    online: bool | None        # last recorded state; None if never recorded
+    flapping: bool
+
+
+def quantile(values: list[float], q: float) -> float | None:
+    """Nearest-rank *q* quantile of sorted *values* (None if empty)."""
+    if not values:
+        return None
+    return values[min(max(math.ceil(q * len(values)) - 1, 0), len(values) - 1)]
+
+
+class LinkHistory:
+    """Poll outcomes and state transitions per device; thread-safe."""
+
+    def __init__(self, config: HistoryConfig | None = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.config = config or HistoryConfig()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._devices: dict[Hashable, _Device] = {}
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._devices
+
+    # --- recording (any thread) ------------------------------------------
+
+    def record_rtt(self, key: Hashable, rtt: float) -> None:
+        """A poll of *key* answered after *rtt* s."""
+        with self._lock:
+            self._device(key).polls.append(self._clock(), rtt)
+
+    def record_missed(self, key: Hashable) -> None:
+        """A poll of *key* went unanswered."""
+        with self._lock:
+            self._device(key).polls.append(self._clock(), math.nan)
+
+    def record_state(self, key: Hashable, online: bool) -> None:
+        """*key* came online or went offline; repeats of the last state are ignored."""
+        with self._lock:
+            ring = self._device(key).transitions
+            if ring.last() != online:
+                ring.append(self._clock(), online)
+
+    # --- queries -----------------------------------------------------------
+
+    def stats(self, key: Hashable, window: float | None = None) -> LinkStats | None:
+        """Summary of *key*; transitions are counted over *window* s
+        (`HistoryConfig.flap_window` by default)."""
+        window = self.config.flap_window if window is None else window
+        with self._lock:
+            dev = self._devices.get(key)
+            if dev is None:
+                return None
+            return self._stats(key, dev, self._clock() - window)
+
+    def all_stats(self, window: float | None = None) -> dict[Hashable, LinkStats]:
+        window = self.config.flap_window if window is None else window
+        with self._lock:
+            since = self._clock() - window
+            return {key: self._stats(key, dev, since)
+                    for key, dev in self._devices.items()}
+
+    def rtt_quantile(self, key: Hashable, q: float) -> float | None:
+        """*q* quantile of the answered polls' RTT of *key*, s."""
+        with self._lock:
+            dev = self._devices.get(key)
+            if dev is None:
+                return None
+            return quantile(self._rtts(dev), q)
+
+    def transitions(self, key: Hashable,
+                    since: float | None = None) -> list[tuple[float, bool]]:
+        """(monotonic time, online) of the recorded transitions of *key*."""
+        with self._lock:
+            dev = self._devices.get(key)
+            if dev is None:
+                return []
+            return [(t, bool(v)) for t, v in dev.transitions.items(since)]
+
+    def flapping(self, window: float | None = None,
+                 threshold: int | None = None) -> list[Hashable]:
+        """Keys with at least *threshold* transitions in the last *window* s,
+        most transitions first."""
+        window = self.config.flap_window if window is None else window
+        threshold = self.config.flap_threshold if threshold is None else threshold
+        with self._lock:
+            since = self._clock() - window
+            counts = [(sum(1 for _ in dev.transitions.items(since)), key)
+                      for key, dev in self._devices.items()]
+        counts = [(n, key) for n, key in counts if n >= threshold]
+        counts.sort(key=lambda c: c[0], reverse=True)
+        return [key for _, key in counts]
+
+    def worst(self, n: int = 10, by: str = "loss",
+              window: float | None = None) -> list[LinkStats]:
+        """The *n* worst links by "loss", "rtt_p95", "rtt_p99" or "transitions".
+
+        Links without RTT samples are left out of the RTT rankings.
+        """
+        if by not in ("loss", "rtt_p95", "rtt_p99", "transitions"):
+            raise ValueError(f"unknown ranking: {by!r}")
+        stats = [s for s in self.all_stats(window).values()
+                 if getattr(s, by) is not None]
+        stats.sort(key=lambda s: getattr(s, by), reverse=True)
+        return stats[:n]
+
+    def forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._devices.pop(key, None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._devices = {}
+
+    # --- internals ---------------------------------------------------------
+
+    def _device(self, key: Hashable) -> _Device:
+        dev = self._devices.get(key)
+        if dev is None:
+            dev = self._devices[key] = _Device(self.config)
+        return dev
+
+    @staticmethod
+    def _rtts(dev: _Device) -> list[float]:
+        return sorted(v for _, v in dev.polls.items() if not math.isnan(v))
+
+    def _stats(self, key: Hashable, dev: _Device, since: float) -> LinkStats:
+        rtts = self._rtts(dev)
+        polls = len(dev.polls)
+        missed = polls - len(rtts)
+        transitions = sum(1 for _ in dev.transitions.items(since))
+        last = dev.transitions.last()
+        return LinkStats(
+            key=key, polls=polls, missed=missed,
+            loss=missed / polls if polls else 0.0,
+            rtt_p50=quantile(rtts, 0.5), rtt_p95=quantile(rtts, 0.95),
+            rtt_p99=quantile(rtts, 0.99),
+            transitions=transitions,
+            online=None if last is None else bool(last),
+            flapping=transitions >= self.config.flap_threshold,
+        )
@@ -0,0 +1,283 @@
+"""Device liveness: phi-accrual suspicion over one timing wheel.
+
+Every reply from a device refreshes its last-seen monotonic timestamp.
+Poll replies (the heartbeats) also feed a window of the device's reply
+intervals. Instead of a fixed timeout, each device gets a suspicion level
+
+    phi = -log10(P(a reply comes even later than now))
+
+with the interval modelled as a normal distribution fitted to the window
+(Hayashibara et al., "The phi accrual failure detector"). A device whose
+replies are steady is declared offline soon after it stops answering. A
+device behind a lossy bridge, whose intervals vary, gets proportionally
+more slack. Past `degraded_phi` the device is reported degraded
+(CON_DEGRADED), and past `phi_threshold` it is offline.
+
+Expiry is found by a hashed timing wheel driven by one `Scheduler` timer.
+Each device sits in the slot of the tick when its suspicion would cross
+the next level if it stayed silent. When a slot comes due, only its
+devices are checked and, unless they expire, moved to their next slot.
+A reply is a couple of stores with no timer churn, and a tick does not
+scan the whole fleet.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from array import array
+from collections.abc import Callable, Hashable
+from enum import Enum
+from statistics import NormalDist
+
+from dsu.config.settings import LivenessConfig
+from dsu.domain.models import Device
+from dsu.net.scheduler import Scheduler, TimerHandle, default_scheduler
+
+_LOG = logging.getLogger(__name__)
+
+
+def device_key(dev: Device) -> Hashable:
+    return dev.s_num or f"{dev.ip}:{dev.port}"
+
+
+class Health(Enum):
+    ONLINE = "online"
+    DEGRADED = "degraded"     # suspicion past degraded_phi
+    OFFLINE = "offline"       # past phi_threshold, or not tracked
+
+
+class ArrivalWindow:
+    """The last *size* reply intervals of one device, with running sums."""
+
+    __slots__ = ("_intervals", "_next", "count", "last", "total", "total_sq")
+
+    def __init__(self, size: int) -> None:
+        self._intervals = array("d", bytes(8 * size))
+        self._next = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.last: float | None = None
+
+    def add(self, now: float) -> None:
+        """Record a heartbeat at *now*."""
+        if self.last is not None:
+            interval = now - self.last
+            old = self._intervals[self._next]
+            if self.count == len(self._intervals):
+                self.total -= old
+                self.total_sq -= old * old
+            else:
+                self.count += 1
+            self._intervals[self._next] = interval
+            self._next = (self._next + 1) % len(self._intervals)
+            self.total += interval
+            self.total_sq += interval * interval
+        self.last = now
+
+    def stats(self, cfg: LivenessConfig) -> tuple[float, float]:
+        """(mean, standard deviation) of the intervals, s."""
+        if not self.count:
+            # Before the second reply: the assumed interval, a quarter of it as spread
+            mean, std = cfg.first_interval, cfg.first_interval / 4
+        else:
+            mean = self.total / self.count
+            std = math.sqrt(max(self.total_sq / self.count - mean * mean, 0.0))
+        return mean, max(std, cfg.min_std)
+
+
+class LivenessTracker:
+    """Suspicion per device; calls *on_expire(dev)* once a device is offline.
+
+    :param on_degraded: called as (dev, phi) when a device becomes degraded
+    """
+
+    def __init__(
+        self,
+        on_expire: Callable[[Device], None],
+        config: LivenessConfig | None = None,
+        scheduler: Scheduler | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_degraded: Callable[[Device, float], None] | None = None,
+    ) -> None:
+        self.config = cfg = config or LivenessConfig()
+        self._on_expire = on_expire
+        self._on_degraded = on_degraded
+        self._scheduler = scheduler if scheduler is not None else default_scheduler()
+        self._res = cfg.resolution
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seen: dict[Hashable, float] = {}        # key -> last reply
+        self._windows: dict[Hashable, ArrivalWindow] = {}
+        self._devs: dict[Hashable, Device] = {}
+        self._degraded: set[Hashable] = set()          # already reported
+        # Silence, in standard deviations past mean + pause, of each level
+        normal = NormalDist()
+        self._z_offline = normal.inv_cdf(1 - 10 ** -cfg.phi_threshold)
+        self._z_degraded = normal.inv_cdf(1 - 10 ** -cfg.degraded_phi)
+        # One set of keys per tick; a slot is reused every len(wheel) ticks,
+        # and entries found there early are simply moved on.
+        self._wheel: list[set[Hashable]] = [
+            set() for _ in range(max(math.ceil(cfg.max_silence / self._res) + 1, 2))]
+        self._origin = clock()
+        self._tick = 0                                  # last processed tick
+        self._timer: TimerHandle | None = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._devs)
+
+    def __contains__(self, dev: Device) -> bool:
+        return device_key(dev) in self._devs
+
+    def touch(self, dev: Device, heartbeat: bool = True) -> None:
+        """Record a reply from *dev* (starts tracking it if new).
+
+        :param heartbeat: False for replies outside the poll cadence (command
+               responses): they prove the device alive but are not intervals
+        """
+        key = device_key(dev)
+        now = self._clock()
+        window = self._windows.get(key)
+        if window is not None and key in self._devs:
+            # A store racing with expiry leaves only a stray entry;
+            # the next touch then registers the device again.
+            self._seen[key] = now
+            if heartbeat:
+                window.add(now)
+            if key in self._degraded:
+                self._degraded.discard(key)
+            return
+        with self._lock:
+            if self._closed:
+                return
+            window = ArrivalWindow(self.config.window)
+            window.add(now)
+            self._windows[key] = window
+            self._seen[key] = now
+            self._devs[key] = dev
+            self._wheel[self._slot(now + self._silence(window, self._z_degraded))].add(key)
+            if self._timer is None:
+                self._timer = self._scheduler.schedule(self._res, self.sweep)
+
+    def forget(self, dev: Device) -> None:
+        """Stop tracking *dev* (its wheel entry is dropped when it comes due)."""
+        key = device_key(dev)
+        with self._lock:
+            self._drop(key)
+
+    def last_seen(self, dev: Device) -> float | None:
+        """Monotonic time of the last reply from *dev*."""
+        return self._seen.get(device_key(dev))
+
+    def phi(self, dev: Device) -> float:
+        """Current suspicion of *dev*; inf when it is not tracked."""
+        key = device_key(dev)
+        seen, window = self._seen.get(key), self._windows.get(key)
+        if seen is None or window is None:
+            return math.inf
+        silence = self._clock() - seen
+        if silence >= self.config.max_silence:
+            return math.inf
+        mean, std = window.stats(self.config)
+        y = (silence - mean - self.config.acceptable_pause) / std
+        later = 0.5 * math.erfc(y / math.sqrt(2))
+        return -math.log10(later) if later > 0 else math.inf
+
+    def health(self, dev: Device) -> Health:
+        phi = self.phi(dev)
+        if phi >= self.config.phi_threshold:
+            return Health.OFFLINE
+        if phi >= self.config.degraded_phi:
+            return Health.DEGRADED
+        return Health.ONLINE
+
+    def timeout(self, dev: Device) -> float | None:
+        """Silence after which *dev* would be declared offline, s."""
+        window = self._windows.get(device_key(dev))
+        return None if window is None else self._silence(window, self._z_offline)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._seen.clear()
+            self._windows.clear()
+            self._devs.clear()
+            self._degraded.clear()
+            for slot in self._wheel:
+                slot.clear()
+
+    def sweep(self) -> None:
+        """Process the ticks that came due; runs on the scheduler thread."""
+        now = self._clock()
+        expired, degraded = [], []
+        with self._lock:
+            if self._closed:
+                return
+            target = int((now - self._origin) / self._res)
+            # after a long stall every slot is due once
+            first = max(self._tick + 1, target - len(self._wheel) + 1)
+            for tick in range(first, target + 1):
+                slot = self._wheel[tick % len(self._wheel)]
+                due = list(slot)
+                slot.clear()
+                for key in due:
+                    self._check(key, now, expired, degraded)
+            self._tick = max(self._tick, target)
+            # idle while nothing is tracked; the next new device restarts it
+            self._timer = self._scheduler.schedule(self._res, self.sweep) \
+                if self._devs else None
+        for dev in degraded:
+            try:
+                self._on_degraded(dev, self.phi(dev))
+            except Exception:  # noqa: BLE001 - a handler must not stop the sweep
+                _LOG.exception("liveness degraded handler raised")
+        for dev in expired:
+            try:
+                self._on_expire(dev)
+            except Exception:  # noqa: BLE001 - a handler must not stop the sweep
+                _LOG.exception("liveness expiry handler raised")
+
+    # --- internals ---------------------------------------------------------
+
+    def _check(self, key, now, expired, degraded) -> None:
+        seen, window = self._seen.get(key), self._windows.get(key)
+        if seen is None or window is None or key not in self._devs:
+            return                                      # forgotten
+        offline_at = seen + self._silence(window, self._z_offline)
+        if offline_at <= now:
+            expired.append(self._devs[key])
+            self._drop(key)
+            return
+        if key not in self._degraded:
+            degraded_at = seen + self._silence(window, self._z_degraded)
+            if degraded_at > now:
+                self._wheel[self._slot(degraded_at)].add(key)
+                return
+            if self._on_degraded is not None:
+                degraded.append(self._devs[key])
+            self._degraded.add(key)
+        self._wheel[self._slot(offline_at)].add(key)
+
+    def _silence(self, window: ArrivalWindow, z: float) -> float:
+        """Silence at which suspicion reaches the level of *z*, s."""
+        mean, std = window.stats(self.config)
+        return min(mean + self.config.acceptable_pause + z * std,
+                   self.config.max_silence)
+
+    def _drop(self, key) -> None:
+        self._seen.pop(key, None)
+        self._windows.pop(key, None)
+        self._devs.pop(key, None)
+        self._degraded.discard(key)
+
+    def _slot(self, deadline: float) -> int:
+        # The first tick at or after *deadline*, never the one being processed.
+        tick = max(math.ceil((deadline - self._origin) / self._res), self._tick + 1)
+        return tick % len(self._wheel)
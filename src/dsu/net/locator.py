@@ -1,15 +1,37 @@
+import select
 import socket
+import struct
 
 import threading
+import time
 import netifaces
+from dsu.config.settings import LocatorConfig
 from dsu.domain.events import DevLstEvent
-from dsu.domain.models import Device
+from dsu.domain.models import LOCATOR_PAYLOAD_SIZE, Device
+from dsu.net.frames import HEADER_SIZE, LOCATOR_PASSWORD, FrameBuilder
+from dsu.net.pending import PendingTable
+from dsu.net.poll import PollMetrics, PollScheduler
+from dsu.net.ratelimit import Lane
+from dsu.net.rtt import RttTable
+from dsu.net.sockstats import SocketCounters, SocketStats, auto_rcvbuf
 from enum import Enum
 
+try:
+    from dsu_native import decode_locator_summaries
+except ImportError:  # native module not built — fall back to struct
+    decode_locator_summaries = None
+
 REQUEST_TIMEOUT = 0.2
 CMD_TIMEOUT = 1
 POLL_INTERVAL = 2
 
+# Заголовок LOCATOR_Header: password[8], s_num[16], ver, cmd, len
+_HEADER_TAIL = struct.Struct('<BBB')  # ver, cmd, len по смещению 24
+
+# Сколько пакетов вычитывается из сокета за один проход приема
+MAX_BURST = 4096
+_MSG_DONTWAIT = getattr(socket, 'MSG_DONTWAIT', 0)  # нет в Windows
+
 
 class LocatorCmd(Enum):
     """ Набор команд широковещательного протокола """
@@ -39,78 +61,348 @@ class LocatorErrorCode(Enum):
     DEFAULT = 0xff
 
 
+_CMD_BY_CODE = {c.value: c for c in LocatorCmd}
+
+
 class Locator(object):
     """ Широковещательный протокол обмена с устройствами """
 
-    def __init__(self, registry, events):
+    def __init__(self, registry, events, config=None, pacer=None, scheduler=None,
+                 rtt=None):
         self.__shutdown = False
+        self._shutdown_event = threading.Event()
         self._registry = registry
         self._events = events
+        self.config = config or LocatorConfig()
+        self.poller = PollScheduler(self.config)
+        self.pending = PendingTable()
+        self.pacer = pacer            # Pacer или None - без ограничения скорости
+        # Общий Scheduler приложения: опрос и отложенная отправка идут по его
+        # таймерам. Без него опрос работает в собственном потоке (poll)
+        self.scheduler = scheduler
+        # Оценки RTT по устройствам: ответы на опрос и команды задают таймауты
+        self.rtt = rtt or RttTable()
+        self._probe_sent = {}        # ключ устройства -> время адресной пробы
+        # Текущий широковещательный опрос: (время отправки REQUEST или None,
+        # ключи ответивших). Кортеж заменяется целиком, поэтому поток приема
+        # никогда не видит время одного опроса с ответившими на другой
+        self._sweep = (None, set())
+        self._refresh_requested = False  # следующий REQUEST - по запросу оператора
+        # LivenessTracker контроллера: ответ на команду отмечает устройство живым
+        self.liveness = None
+        # LinkHistory контроллера: RTT и пропуски опроса по устройствам
+        self.history = None
+        self._poll_lock = threading.Lock()
+        self._poll_handle = None
+        self._poll_gen = 0
         ai = [netifaces.ifaddresses(nif).get(socket.AF_INET)
               for nif in netifaces.interfaces()]
         self.ai = [j for i in ai if i is not None for j in i]
+        self._local_addrs = frozenset(ai['addr'] for ai in self.ai)
         self.current_ai = None
         self.buff_size = 1024
+        self._buf = bytearray(self.buff_size)
+        self._view = memoryview(self._buf)
         self.ver = 1
-        self.port = 1770
+        self.port = self.config.port
         self.port2 = 1760
-        self.pack = bytearray([])
+        self.frames = FrameBuilder(self.ver)
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         self.sock.bind(('', self.port))
+        self.sock_stats = SocketStats(self.sock)
+        self._rcvbuf_target = 0
+        self._size_buffers()
         self.sock_thr = None
-        self.poll_timer = None
         self.poll_thr = None
+        self._poll_wakeup = threading.Event()
 
     def listening_port(self):
         """Прослушивание порта широковещательных команд """
         while not self.__shutdown:
             try:
-                data, addr = self.sock.recvfrom(self.buff_size)
-                if addr[0] in [ai['addr'] for ai in self.ai]:
-                    continue
-                header = self.check_header(data)
-                if len(data) != header['len'] + 28:
-                    print(f"Неверная длина пакета: {data}")
-                if header['cmd'] == LocatorCmd.REQUEST:
-                    self._registry.add(Device.from_locator_payload(data[27:-1]))
-                elif header['cmd'] in LocatorCmd:
-                    self._on_response(header, data[27:-1])
+                n, addr = self.sock_stats.recv_into(self._buf)
+            except OSError:
+                break
+            if self.__shutdown:
+                # разбужен из run() через shutdown(SHUT_RD)
+                break
+            self._ingest(self._view[:n], addr)
+
+    def _ingest(self, data, addr):
+        """Handle *data* plus everything already queued behind it as one burst.
+
+        Discovery answers from the whole burst reach the registry through a
+        single `add_many()` call.
+        """
+        found = bytearray()
+        received = 1
+        self._on_datagram(data, addr, found)
+        for _ in range(MAX_BURST):
+            try:
+                n, addr = self._recv_nowait()
             except OSError:
+                # BlockingIOError: очередь пуста; прочие - сокет закрыт
                 break
+            received += 1
+            self._on_datagram(self._view[:n], addr, found)
+        self.sock_stats.received += received
+        if found:
+            devices = self._decode_summaries(found)
+            changes = self._registry.add_many(devices)
+            self.poller.on_replies(len(devices), len(changes.appended))
+            self._sample_rtt(changes.devices())
+            if changes.appended and not self.config.rcvbuf and \
+                    auto_rcvbuf(len(self._registry)) > self._rcvbuf_target:
+                self._size_buffers()
+
+    def _sample_rtt(self, devices):
+        """
+        RTT по ответам на опрос: от адресной пробы устройства или, для первого
+        ответа на широковещательный REQUEST, от момента его отправки
+        :param devices: ответившие устройства
+        :return:
+        """
+        now = time.monotonic()
+        sweep, answered = self._sweep
+        history = self.history
+        for dev in devices:
+            key = dev.s_num or dev.ip
+            sent = self._probe_sent.pop(key, None)
+            if sweep is not None and key not in answered:
+                answered.add(key)
+                if sent is None:
+                    sent = sweep
+            if sent is not None:
+                self.rtt.sample(key, now - sent)
+                if history is not None:
+                    history.record_rtt(key, now - sent)
+
+    def _size_buffers(self):
+        """
+        Размер буферов сокета: из конфигурации или по размеру парка устройств,
+        чтобы ответы всех устройств на один REQUEST помещались в буфер приема
+        """
+        rcvbuf = self.config.rcvbuf or auto_rcvbuf(len(self._registry))
+        self._rcvbuf_target = rcvbuf
+        self.sock_stats.size(rcvbuf, self.config.sndbuf)
+
+    def socket_stats(self) -> SocketCounters:
+        """Received/dropped datagrams and effective buffer sizes of the socket."""
+        return self.sock_stats.counters()
 
-    def _on_response(self, header, pack):
-        dev = self._registry.find_by_serial(header["s_num"])
+    @staticmethod
+    def _decode_summaries(buf):
+        """Decode a contiguous run of Locator_Summary payloads in one call."""
+        if decode_locator_summaries is None:
+            return Device.from_locator_payloads(buf)
+        return [Device.from_summary_fields(f)
+                for f in decode_locator_summaries(buf)]
+
+    def _recv_nowait(self):
+        if _MSG_DONTWAIT:
+            return self.sock_stats.recv_into(self._buf, _MSG_DONTWAIT)
+        if not select.select([self.sock], [], [], 0)[0]:
+            raise BlockingIOError
+        return self.sock_stats.recv_into(self._buf)
+
+    def _on_datagram(self, data, addr, found):
+        """Handle one datagram received on the locator port (any engine).
+
+        *data* may be a view into the reusable receive buffer: the header is
+        parsed in place and only a command response payload is copied out,
+        since that one outlives the call. Discovery answer payloads are
+        appended to the *found* buffer for batch decoding.
+        """
+        if addr[0] in self._local_addrs:
+            return
+        header = self.parse_header(data)
+        if header is None:
+            return
+        s_num, cmd, length = header
+        if len(data) != length + HEADER_SIZE + 1:
+            print(f"Неверная длина пакета: {bytes(data)}")
+            return
+        if not self.verify_sum(data):
+            print(f"Неверная контрольная сумма пакета: {bytes(data)}")
+            return
+        if cmd == LocatorCmd.REQUEST:
+            if length == LOCATOR_PAYLOAD_SIZE:
+                found += data[HEADER_SIZE:-1]
+        else:
+            self._on_response(s_num.hex(), cmd, bytes(data[HEADER_SIZE:-1]))
+
+    def _on_response(self, s_num, cmd, pack):
+        """
+        Ответ на команду передается напрямую ожидающей очереди (pending)
+        и трекеру живости, а на шину событий - только если на CMD_RESPONSE
+        кто-то подписан
+        """
+        observed = self._events.has_subscribers(DevLstEvent.CMD_RESPONSE)
+        if not observed and not self.pending and self.liveness is None:
+            return
+        dev = self._registry.find_by_serial(s_num)
         if dev is None:
             return
-        if header["cmd"] != LocatorCmd.REQUEST:
+        if self.liveness is not None:
+            self.liveness.touch(dev, heartbeat=False)
+        self.pending.dispatch(s_num, cmd, dev, pack)
+        if observed:
             self._events.emit(
                 DevLstEvent.CMD_RESPONSE,
                 dev=dev,
-                cmd=header["cmd"],
+                cmd=cmd,
                 pack=pack,
             )
 
     def poll(self):
         """
-        Циклически опрашивает устройства в сети с интервалом POLL_INTERVAL
+        Циклически опрашивает устройства в сети.
+        Интервал между запросами выбирает PollScheduler.
+        С общим Scheduler-ом поток только исполняет такты опроса, а будит его
+        таймер планировщика: рассылка с паузами ограничителя скорости не
+        занимает поток таймеров
         :return:
         """
         while not self.__shutdown:
-            self.poll_timer = threading.Timer(
-                interval=POLL_INTERVAL, function=self.request)
-            self.poll_timer.name = 'Locator poll timer thread'
-            self.poll_timer.start()
-            self.poll_timer.join()
+            if self.scheduler is None:
+                delay = self.poller.next_delay(len(self._registry))
+                fired = not self._poll_wakeup.wait(delay)
+            else:
+                fired = self._poll_wakeup.wait()
+            self._poll_wakeup.clear()
+            if fired and not self.__shutdown:
+                self._poll_tick()
+                if self.scheduler is not None:
+                    self._schedule_poll()
+
+    def _schedule_poll(self):
+        """Arm the next poll tick on the shared scheduler, replacing a pending one."""
+        with self._poll_lock:
+            if self._poll_handle is not None:
+                self._poll_handle.cancel()
+            self._poll_gen += 1
+            self._poll_handle = self.scheduler.schedule(
+                self.poller.next_delay(len(self._registry)),
+                self._on_poll_timer, self._poll_gen)
+
+    def _on_poll_timer(self, gen):
+        with self._poll_lock:
+            # refresh() re-armed the timer while this tick was being dispatched
+            if gen != self._poll_gen or self.__shutdown:
+                return
+            self._poll_handle = None
+        # The tick itself runs on the poll thread, never on the timer thread.
+        self._poll_wakeup.set()
+
+    def _poll_tick(self):
+        """Broadcast sweep or, in directed mode, unicast probes to known devices."""
+        if self.poller.sweep_due():
+            self.request()
+        else:
+            self.probe()
 
     def request(self):
         """
         Подает команду опроса всем устройствам в локальной сети
         :return:
         """
-        self.send_pack(LocatorCmd.REQUEST)
-        if self.poll_timer is not None:
-            self.poll_timer.cancel()
+        # Опрос не отбрасывается ограничителем, а только растягивается.
+        # Первый REQUEST после Refresh идет в интерактивной полосе
+        lane = Lane.INTERACTIVE if self._refresh_requested else Lane.BULK
+        self._refresh_requested = False
+        # Итоги предыдущего опроса подводятся до отправки: ответы на новый
+        # REQUEST могут прийти раньше, чем send_pack вернется
+        previous, self._sweep = self._sweep, (None, set())
+        self._record_missed_sweep(*previous)
+        self.send_pack(LocatorCmd.REQUEST, droppable=False, lane=lane,
+                       on_sent=self._sweep_started)
+        self.poller.on_request_sent(
+            sum(1 for ai in self.ai if 'broadcast' in ai))
+
+    def probe(self, devs=None):
+        """
+        Unicast liveness probe: the broadcast REQUEST frame sent to the last
+        known address of each device (by default every device in the registry,
+        including ones seeded from defaults.ini). Probes are never dropped by
+        the pacer: a large fleet is spread over the interval instead
+        :param devs: устройства для опроса
+        :return:
+        """
+        sent = 0
+        for addr, key in self._probe_targets(devs):
+            if self.__shutdown:
+                break
+            # _sendto_later спит до отправки, поэтому ограничитель никогда не
+            # резервирует больше одного кадра вперед
+            if self._send(self.frames.request_frame, addr, dev=key, drop=False):
+                self._probe_sent_to(key)
+                sent += 1
+        self.poller.on_probe_sent(sent)
+
+    def _probe_sent_to(self, key):
+        """
+        Запоминает время пробы; проба, оставшаяся без ответа до следующей,
+        записывается в историю как пропуск опроса
+        :param key: ключ устройства
+        :return:
+        """
+        if self.history is not None and key in self._probe_sent:
+            self.history.record_missed(key)
+        self._probe_sent[key] = time.monotonic()
+
+    def _sweep_started(self):
+        """
+        Время опроса - уход первого кадра REQUEST, а не вызов request():
+        задержка ограничителя скорости не попадает в RTT
+        :return:
+        """
+        sent, answered = self._sweep
+        if sent is None:
+            self._sweep = (time.monotonic(), answered)
+
+    def _record_missed_sweep(self, sent, answered):
+        """
+        Устройства, не ответившие на предыдущий широковещательный REQUEST,
+        записываются в историю как пропуск опроса
+        :param sent: время отправки предыдущего REQUEST (None - опроса не было)
+        :param answered: ключи ответивших на него
+        :return:
+        """
+        if self.history is None or sent is None:
+            return
+        for dev in list(self._registry):
+            key = dev.s_num or dev.ip
+            if key not in answered:
+                self.history.record_missed(key)
+
+    def _probe_targets(self, devs=None):
+        """(address, pacer key) of every device with a known address."""
+        for dev in (self._registry if devs is None else devs):
+            if not dev.ip or dev.ip == '0.0.0.0':
+                continue
+            yield (dev.ip, self.port), dev.s_num or dev.ip
+
+    def poll_metrics(self) -> PollMetrics:
+        """Convergence time and request/reply rates of discovery polling."""
+        return self.poller.metrics()
+
+    @staticmethod
+    def parse_header(buf):
+        """
+        Разбирает заголовок без копирования буфера
+        :param buf: bytes, bytearray или memoryview с пакетом
+        :return: кортеж (s_num, cmd, len) или None, если заголовок некорректен;
+                 s_num - memoryview серийного номера в порядке отображения
+        """
+        view = memoryview(buf)
+        if len(view) < HEADER_SIZE or view[:8] != LOCATOR_PASSWORD:
+            return None
+        _ver, code, length = _HEADER_TAIL.unpack_from(view, 24)
+        cmd = _CMD_BY_CODE.get(code)
+        if cmd is None:
+            return None
+        return view[23:7:-1], cmd, length
 
     @staticmethod
     def check_header(ba):
@@ -123,12 +415,14 @@ class Locator(object):
         'cmd': команда,
         'len': длина пакета с данными
         """
-        if ba[:8].decode('cp1251') != '12345678':
+        header = Locator.parse_header(ba)
+        if header is None:
             return {'s_num': None, 'ver': None, 'cmd': None, 'len': 0}
-        return {'s_num': ba[23:7:-1].hex(),
+        s_num, cmd, length = header
+        return {'s_num': s_num.hex(),
                 'ver': ba[24],
-                'cmd': LocatorCmd(ba[25]),
-                'len': ba[26]}
+                'cmd': cmd,
+                'len': length}
 
     @staticmethod
     def subnet(addr, mask='255.255.255.0'):
@@ -145,7 +439,13 @@ class Locator(object):
             s -= b
         return s & 0xff
 
-    def send_pack(self, cmd, data=b'', dev=None):
+    @staticmethod
+    def verify_sum(buf):
+        """ Проверяет контрольную сумму принятого пакета (последний байт) """
+        return sum(memoryview(buf)) & 0xff == 0
+
+    def send_pack(self, cmd, data=b'', dev=None, droppable=True, lane=Lane.BULK,
+                  on_sent=None):
         """
         Посылает команду заданному устройству
         Если устройство не задано, команда отправляется всем устройствам в локальной сети
@@ -153,10 +453,12 @@ class Locator(object):
         :param cmd: команда
         :param data: данные команды
         :param dev: устройство, которому адресована команда
-        :return:
+        :param droppable: False - ограничитель только задерживает кадр, но не отбрасывает
+        :param lane: Lane.INTERACTIVE - действие оператора, не ждет массовый трафик
+        :param on_sent: вызывается без аргументов непосредственно перед уходом
+               кадра в сеть (для каждого интерфейса)
+        :return: False, если кадр не ушел ни через один интерфейс
         """
-        s_n = bytes.fromhex(dev.s_num) if isinstance(
-            dev, Device) else bytes([0xff]*16)
         """
         Заголовок команды определяется следующей структурой языка Си
         typedef struct
@@ -167,29 +469,69 @@ class Locator(object):
             uint8_t         cmd;
             uint8_t         len;
         } LOCATOR_Header;
+        Кадр собирает FrameBuilder из кэшированного заголовка устройства
         """
-        if isinstance(cmd, Enum):
-            cmd = cmd.value
-        self.pack = bytearray('12345678', encoding='cp1251')
-        self.pack += s_n[::-1]
-        self.pack.append(self.ver)
-        self.pack.append(cmd)
-        self.pack.append(len(data))
-        self.pack += data
-        self.pack.append(self.check_sum(self.pack))
+        s_num = dev.s_num if isinstance(dev, Device) else None
+        pack = self.frames.build(cmd, data, s_num)
+        sent = False
         for ai in self.ai:
             # Skip interfaces without broadcast (e.g., loopback)
             if 'broadcast' not in ai:
                 continue
             if not self.__shutdown:
-                self.sock.sendto(self.pack, (ai['broadcast'], self.port))
+                sent |= self._send(pack, (ai['broadcast'], self.port),
+                                   iface=ai['broadcast'], dev=s_num,
+                                   drop=droppable, lane=lane, on_sent=on_sent)
+        return sent
+
+    def _send(self, pack, addr, iface=None, dev=None, drop=True, lane=Lane.BULK,
+              on_sent=None):
+        """
+        Отправка кадра через ограничитель скорости (pacer)
+        :param pack: кадр
+        :param addr: адрес назначения
+        :param iface: ключ интерфейса (broadcast-адрес), для unicast - None
+        :param dev: ключ устройства или None для широковещательных кадров
+        :param drop: False - кадр только задерживается, даже дольше max_delay
+        :param lane: полоса приоритета кадра (Lane)
+        :param on_sent: вызывается непосредственно перед уходом кадра в сеть:
+               ответ может быть принят раньше, чем отправка вернется
+        :return: False, если кадр отброшен ограничителем
+        """
+        delay = 0 if self.pacer is None else \
+            self.pacer.reserve(iface, dev, addr[0], drop, lane)
+        if delay is None:
+            return False
+        if delay > 0:
+            self._sendto_later(delay, pack, addr, on_sent)
+        else:
+            if on_sent is not None:
+                on_sent()
+            self._sendto(pack, addr)
+        return True
+
+    def _sendto_later(self, delay, pack, addr, on_sent=None):
+        """Send after *delay* seconds; the thread engine simply sleeps."""
+        time.sleep(delay)
+        if on_sent is not None:
+            on_sent()
+        self._sendto(pack, addr)
+
+    def _sendto(self, pack, addr):
+        """Put one frame on the wire. Engines override this to own the socket."""
+        self.sock.sendto(pack, addr)
 
     def refresh(self) -> None:
-        """Send a one-shot REQUEST broadcast (used by manual Refresh in UI)."""
-        try:
-            self.request()
-        except Exception:
-            pass
+        """Start a discovery burst right away (used by manual Refresh in UI).
+
+        Its first REQUEST goes out in the interactive lane, ahead of bulk traffic.
+        """
+        self._refresh_requested = True
+        self.poller.start_burst()
+        if self.scheduler is not None and self.poll_thr is not None:
+            self._schedule_poll()
+        else:
+            self._poll_wakeup.set()
 
     def run(self):
         """
@@ -202,18 +544,34 @@ class Locator(object):
         self.poll_thr = threading.Thread(
             target=self.poll, name='Locator poll thread')
         self.poll_thr.start()
-        self.request()
-        while not self.__shutdown:
+        if self.scheduler is not None:
+            self._schedule_poll()
+        self._shutdown_event.wait()
+        # close() не прерывает recv в другом потоке: будим его shutdown-ом
+        try:
+            self.sock.shutdown(socket.SHUT_RD)
+        except OSError:
+            # Linux отвечает ENOTCONN для UDP, но ожидающий recv просыпается
             pass
         self.sock.close()
         self.sock_thr.join()
-        self.poll_timer.cancel()
+        self._poll_wakeup.set()
         self.poll_thr.join()
+        with self._poll_lock:
+            if self._poll_handle is not None:
+                self._poll_handle.cancel()
+                self._poll_handle = None
         self._registry.clear()
 
+    @property
+    def is_shutdown(self) -> bool:
+        return self.__shutdown
+
     def shutdown(self):
         """
         Прерывает основной цикл потока широковещательного протокола
         :return:
         """
         self.__shutdown = True
+        self._shutdown_event.set()
+        self._poll_wakeup.set()
@@ -0,0 +1,242 @@
+"""Latency histograms and retry counters for locator commands.
+
+`CommandMetrics` collects, per `LocatorCmd` and per device:
+
+* a round-trip time histogram (first sends only, like the RTT estimator:
+  the answer to a retransmission cannot be attributed to one send);
+* queue wait: from the moment a command could have gone out (queue start,
+  or the call to `AsyncCommandClient.execute`) to its first send;
+* commands, sends, timeouts, error results and stale replies.
+
+Histograms have fixed buckets stored in `array`s, so recording is a bisect
+and an increment with no lock and no allocation. Concurrent writers to the
+same bucket can, rarely, lose an increment; readers copy the counters and
+never block the receive path.
+
+Per-device statistics can be merged by any attribute of the device, which
+is how slow models or subnets show up:
+
+    app.command_stats(by="model")["CP-18"].rtt_p95
+"""
+
+from __future__ import annotations
+
+import ipaddress
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Hashable, Iterable
+from dataclasses import dataclass
+
+from dsu.domain.models import Device
+
+# Bucket upper bounds, s; one more bucket counts everything above the last.
+BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+# Indexes into CommandStats.counters
+_COMMANDS, _SENDS, _TIMEOUTS, _FAILURES, _STALE = range(5)
+
+
+class Histogram:
+    """Counts of values per fixed bucket, plus their sum."""
+
+    __slots__ = ("bounds", "counts", "total")
+
+    def __init__(self, bounds: tuple[float, ...] = BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = array("Q", bytes(8 * (len(bounds) + 1)))
+        self.total = array("d", [0.0])
+
+    def record(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total[0] += value
+
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def merge(self, other: Histogram) -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.total[0] += other.total[0]
+
+    def copy(self) -> Histogram:
+        h = Histogram(self.bounds)
+        h.merge(self)
+        return h
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the *q* quantile (None if empty).
+
+        Values past the last bound report `inf`.
+        """
+        n = self.count()
+        if not n:
+            return None
+        rank = q * n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def mean(self) -> float | None:
+        n = self.count()
+        return self.total[0] / n if n else None
+
+
+class CommandStats:
+    """Histograms and counters of one command code or one device."""
+
+    __slots__ = ("counters", "rtt", "wait")
+
+    def __init__(self, bounds: tuple[float, ...] = BUCKETS) -> None:
+        self.rtt = Histogram(bounds)
+        self.wait = Histogram(bounds)
+        self.counters = array("Q", bytes(8 * 5))
+
+    def merge(self, other: CommandStats) -> None:
+        self.rtt.merge(other.rtt)
+        self.wait.merge(other.wait)
+        for i, n in enumerate(other.counters):
+            self.counters[i] += n
+
+    def snapshot(self) -> StatsSnapshot:
+        rtt, wait = self.rtt.copy(), self.wait.copy()
+        c = self.counters.tolist()
+        return StatsSnapshot(
+            commands=c[_COMMANDS], sends=c[_SENDS],
+            retries=max(c[_SENDS] - c[_COMMANDS], 0),
+            timeouts=c[_TIMEOUTS], failures=c[_FAILURES], stale=c[_STALE],
+            rtt_mean=rtt.mean(), rtt_p50=rtt.quantile(0.5),
+            rtt_p95=rtt.quantile(0.95), rtt_p99=rtt.quantile(0.99),
+            wait_mean=wait.mean(), wait_p95=wait.quantile(0.95),
+            rtt_buckets=tuple(rtt.counts),
+        )
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    commands: int              # finished commands (answered, failed or timed out)
+    sends: int                 # frames sent for them, retransmissions included
+    retries: int
+    timeouts: int              # commands with no answer after every attempt
+    failures: int              # commands answered with an error result
+    stale: int                 # replies nobody was waiting for any more
+    rtt_mean: float | None     # s; quantiles are bucket upper bounds
+    rtt_p50: float | None
+    rtt_p95: float | None
+    rtt_p99: float | None
+    wait_mean: float | None
+    wait_p95: float | None
+    rtt_buckets: tuple[int, ...]   # counts per BUCKETS bound, then overflow
+
+
+def device_key(dev: Device) -> Hashable:
+    """Key of per-device statistics (serial number, or ip without one)."""
+    return dev.s_num or dev.ip
+
+
+def subnet(dev: Device) -> str:
+    """Network of the device, by its own mask (/24 when it has none)."""
+    mask = dev.mask if dev.mask != "0.0.0.0" else "255.255.255.0"
+    try:
+        return str(ipaddress.IPv4Interface(f"{dev.ip}/{mask}").network)
+    except ValueError:
+        return dev.ip
+
+
+class CommandMetrics:
+    """Command statistics keyed by `LocatorCmd` and by device; thread-safe."""
+
+    def __init__(self, bounds: tuple[float, ...] = BUCKETS) -> None:
+        self.bounds = bounds
+        self._by_cmd: dict[Hashable, CommandStats] = {}
+        self._by_dev: dict[Hashable, CommandStats] = {}
+
+    # --- recording (any thread) ------------------------------------------
+
+    def record_wait(self, dev: Device, cmd, wait: float) -> None:
+        """*wait* s passed before the command's first send."""
+        for stats in self._stats(dev, cmd):
+            stats.wait.record(wait)
+
+    def record_reply(self, dev: Device, cmd, rtt: float | None, sends: int) -> None:
+        """Command answered with data or OK after *sends* frames.
+
+        *rtt* is None when the answer followed a retransmission.
+        """
+        self._finish(dev, cmd, rtt, sends, None)
+
+    def record_failure(self, dev: Device, cmd, rtt: float | None, sends: int) -> None:
+        """Command answered with an error result."""
+        self._finish(dev, cmd, rtt, sends, _FAILURES)
+
+    def record_timeout(self, dev: Device, cmd, sends: int) -> None:
+        """No answer after *sends* frames."""
+        self._finish(dev, cmd, None, sends, _TIMEOUTS)
+
+    def record_stale(self, dev: Device, cmd) -> None:
+        """A reply arrived for a command no longer waited for."""
+        for stats in self._stats(dev, cmd):
+            stats.counters[_STALE] += 1
+
+    # --- queries -----------------------------------------------------------
+
+    def by_cmd(self) -> dict[Hashable, StatsSnapshot]:
+        return {cmd: s.snapshot() for cmd, s in list(self._by_cmd.items())}
+
+    def by_device(self) -> dict[Hashable, StatsSnapshot]:
+        return {key: s.snapshot() for key, s in list(self._by_dev.items())}
+
+    def cmd(self, cmd) -> StatsSnapshot | None:
+        stats = self._by_cmd.get(cmd)
+        return None if stats is None else stats.snapshot()
+
+    def device(self, dev: Device) -> StatsSnapshot | None:
+        stats = self._by_dev.get(device_key(dev))
+        return None if stats is None else stats.snapshot()
+
+    def group(self, devices: Iterable[Device],
+              key: Callable[[Device], Hashable]) -> dict[Hashable, StatsSnapshot]:
+        """Per-device statistics of *devices* merged by *key(dev)*.
+
+        Devices without statistics are skipped.
+        """
+        merged: dict[Hashable, CommandStats] = {}
+        for dev in devices:
+            stats = self._by_dev.get(device_key(dev))
+            if stats is None:
+                continue
+            group = merged.get(key(dev))
+            if group is None:
+                group = merged[key(dev)] = CommandStats(self.bounds)
+            group.merge(stats)
+        return {k: s.snapshot() for k, s in merged.items()}
+
+    def reset(self) -> None:
+        self._by_cmd = {}
+        self._by_dev = {}
+
+    # --- internals ---------------------------------------------------------
+
+    def _stats(self, dev: Device, cmd) -> tuple[CommandStats, CommandStats]:
+        # setdefault is atomic: racing first records share one entry
+        by_cmd = self._by_cmd.get(cmd)
+        if by_cmd is None:
+            by_cmd = self._by_cmd.setdefault(cmd, CommandStats(self.bounds))
+        key = device_key(dev)
+        by_dev = self._by_dev.get(key)
+        if by_dev is None:
+            by_dev = self._by_dev.setdefault(key, CommandStats(self.bounds))
+        return by_cmd, by_dev
+
+    def _finish(self, dev: Device, cmd, rtt: float | None, sends: int,
+                outcome: int | None) -> None:
+        for stats in self._stats(dev, cmd):
+            c = stats.counters
+            c[_COMMANDS] += 1
+            c[_SENDS] += sends
+            if outcome is not None:
+                c[outcome] += 1
+            if rtt is not None:
+                stats.rtt.record(rtt)
@@ -0,0 +1,66 @@
+"""Pending-request table for locator command responses.
+
+Instead of broadcasting every response on the event bus and letting each
+`CmdQueue` discard the ones that are not its own, a waiter registers under
+(serial number, command) and the locator hands the response straight to it.
+
+Several waiters may send the same command to one device (two queues, or a
+queue and an async client). They wait in FIFO order: each response goes to
+the oldest waiter, which unregisters once it has its answer, and the next
+response goes to the one after it.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+
+from dsu.domain.events import DevLstEvent
+
+# Same call shape as an EventBus handler: handler(event, dev, cmd=..., pack=...)
+ResponseHandler = Callable[..., None]
+
+
+class PendingTable:
+    """Maps (s_num, cmd) to the handlers waiting for that response, oldest first."""
+
+    def __init__(self) -> None:
+        # Tuples are replaced, never mutated, so dispatch() reads them unlocked
+        self._waiters: dict[tuple[str, object], tuple[ResponseHandler, ...]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of (s_num, cmd) keys with at least one waiter."""
+        return len(self._waiters)
+
+    def register(self, s_num: str, cmd, handler: ResponseHandler) -> None:
+        """Queue *handler* for responses to *cmd* from device *s_num*."""
+        with self._lock:
+            key = (s_num, cmd)
+            waiters = self._waiters.get(key, ())
+            if handler not in waiters:
+                self._waiters[key] = (*waiters, handler)
+
+    def unregister(self, s_num: str, cmd, handler: ResponseHandler | None = None) -> None:
+        """Drop *handler* from the key, or every waiter of it when None."""
+        with self._lock:
+            key = (s_num, cmd)
+            waiters = self._waiters.get(key, ())
+            rest = () if handler is None else tuple(h for h in waiters if h != handler)
+            if rest:
+                self._waiters[key] = rest
+            else:
+                self._waiters.pop(key, None)
+
+    def get(self, s_num: str, cmd) -> ResponseHandler | None:
+        """The handler the next response would go to."""
+        waiters = self._waiters.get((s_num, cmd))
+        return waiters[0] if waiters else None
+
+    def dispatch(self, s_num: str, cmd, dev, pack: bytes) -> bool:
+        """Deliver a response to the oldest waiter. False when nobody waits."""
+        waiters = self._waiters.get((s_num, cmd))
+        if not waiters:
+            return False
+        waiters[0](DevLstEvent.CMD_RESPONSE, dev, cmd=cmd, pack=pack)
+        return True
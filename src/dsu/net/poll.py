@@ -0,0 +1,154 @@
+"""Adaptive scheduling of locator discovery broadcasts.
+
+Replaces the fixed `POLL_INTERVAL` cadence with three behaviours:
+
+* a short burst of REQUESTs at startup and after `refresh()`, so discovery
+  converges in a fraction of a second;
+* a steady-state interval stretched with fleet size and the observed number
+  of answers per poll, so large fleets do not flood the host;
+* multiplicative jitter, so several DSU instances on one segment drift apart
+  instead of broadcasting in lockstep.
+
+In ``"directed"`` poll mode steady-state ticks probe known devices by
+unicast and a broadcast sweep only goes out every `sweep_interval` seconds
+(and for every burst slot).
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from dsu.config.settings import LocatorConfig
+
+_WINDOW = 60.0  # seconds covered by the per-minute rates
+_EWMA_ALPHA = 0.25
+
+
+@dataclass(frozen=True)
+class PollMetrics:
+    interval: float                   # current steady-state interval, s
+    convergence_time: float | None    # last burst start → last new device, s
+    requests_per_minute: float        # REQUEST frames put on the wire
+    replies_per_minute: float         # discovery answers received
+    bursting: bool
+    probes_per_minute: float = 0.0    # unicast liveness probes (directed mode)
+
+
+class PollScheduler:
+    """Decides how long the locator waits before its next REQUEST.
+
+    Thread-safe: replies are reported from the receive path while delays
+    are taken by the poll loop and bursts are triggered from the UI.
+    """
+
+    def __init__(
+        self,
+        config: LocatorConfig,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self._cfg = config
+        self._clock = clock
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._burst_left = 0
+        self._burst_started = 0.0
+        self._last_new: float | None = None
+        self._replies_ewma = 0.0
+        self._interval = config.poll_interval
+        self._requests: deque[tuple[float, int]] = deque()
+        self._probes: deque[tuple[float, int]] = deque()
+        self._replies: deque[tuple[float, int]] = deque()
+        self._last_sweep = float('-inf')
+        self._sweep_pending = False
+        self.start_burst()
+
+    def start_burst(self) -> None:
+        """Send the next `burst_count` requests back to back (refresh/startup)."""
+        with self._lock:
+            self._burst_left = self._cfg.burst_count
+            self._burst_started = self._clock()
+            self._last_new = None
+
+    def next_delay(self, fleet_size: int = 0) -> float:
+        """Seconds until the next REQUEST. Consumes one burst slot if any."""
+        with self._lock:
+            if self._burst_left > 0:
+                first = self._burst_left == self._cfg.burst_count
+                self._burst_left -= 1
+                self._sweep_pending = True
+                return 0.0 if first else self._jitter(self._cfg.burst_spacing)
+            self._interval = self._steady_interval(fleet_size)
+            return self._jitter(self._interval)
+
+    def sweep_due(self) -> bool:
+        """True when the next tick must broadcast rather than probe by unicast."""
+        with self._lock:
+            if self._cfg.poll_mode != "directed" or self._sweep_pending:
+                return True
+            return self._clock() - self._last_sweep >= self._cfg.sweep_interval
+
+    def on_request_sent(self, frames: int = 1) -> None:
+        with self._lock:
+            now = self._clock()
+            self._requests.append((now, frames))
+            self._last_sweep = now
+            self._sweep_pending = False
+            self._prune(now)
+
+    def on_probe_sent(self, frames: int) -> None:
+        with self._lock:
+            now = self._clock()
+            self._probes.append((now, frames))
+            self._prune(now)
+
+    def on_replies(self, total: int, new: int = 0) -> None:
+        """Record one ingested burst of *total* answers, *new* of them unknown."""
+        if total <= 0:
+            return
+        with self._lock:
+            now = self._clock()
+            self._replies.append((now, total))
+            self._prune(now)
+            if new:
+                self._last_new = now
+            if self._burst_left == 0:
+                self._replies_ewma += _EWMA_ALPHA * (total - self._replies_ewma)
+
+    def metrics(self) -> PollMetrics:
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            convergence = None
+            if self._last_new is not None:
+                convergence = self._last_new - self._burst_started
+            return PollMetrics(
+                interval=self._interval,
+                convergence_time=convergence,
+                requests_per_minute=sum(n for _, n in self._requests) * 60.0 / _WINDOW,
+                replies_per_minute=sum(n for _, n in self._replies) * 60.0 / _WINDOW,
+                bursting=self._burst_left > 0,
+                probes_per_minute=sum(n for _, n in self._probes) * 60.0 / _WINDOW,
+            )
+
+    # --- internals (lock held) -------------------------------------------
+
+    def _steady_interval(self, fleet_size: int) -> float:
+        expected = max(fleet_size, self._replies_ewma)
+        interval = expected / self._cfg.reply_budget if self._cfg.reply_budget else 0.0
+        return min(max(interval, self._cfg.poll_interval), self._cfg.max_poll_interval)
+
+    def _jitter(self, delay: float) -> float:
+        j = self._cfg.poll_jitter
+        return delay * (1.0 - j + 2.0 * j * self._rng())
+
+    def _prune(self, now: float) -> None:
+        horizon = now - _WINDOW
+        for q in (self._requests, self._probes, self._replies):
+            while q and q[0][0] < horizon:
+                q.popleft()
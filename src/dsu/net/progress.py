@@ -0,0 +1,135 @@
+"""O(1) progress accounting for command queues and firmware transfers.
+
+A `ProgressTracker` keeps running totals of commands and bytes: growing the
+work (`add`) and completing it (`advance`) are constant-time updates, and
+`snapshot()` reads them without side effects. The transfer rate is an
+exponentially weighted average of the rate over successive `interval`
+windows, so the ETA follows a link that speeds up or slows down instead of
+averaging the whole run, and bursts of acknowledgements do not make it jump.
+
+Subscribers get a `Progress` on every `advance()`, on the calling thread.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+_LOG = logging.getLogger(__name__)
+
+ProgressListener = Callable[["Progress"], None]
+
+
+@dataclass(frozen=True)
+class Progress:
+    done_cmds: int
+    total_cmds: int
+    done_bytes: int
+    total_bytes: int
+    rate: float            # bytes/s, smoothed
+    eta: float | None      # s until done; None while the rate is unknown
+
+    @property
+    def percent(self) -> int:
+        """Byte-based percentage; by command count when there are no bytes."""
+        if self.total_bytes > 0:
+            return min(100, self.done_bytes * 100 // self.total_bytes)
+        if self.total_cmds > 0:
+            return min(100, self.done_cmds * 100 // self.total_cmds)
+        return 0
+
+
+class ProgressTracker:
+    """Counts commands and bytes; safe to update from any thread.
+
+    :param smoothing: EWMA weight of the newest rate sample (0..1]
+    :param interval: s, shortest window a rate sample is taken over
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 smoothing: float = 0.3, interval: float = 0.25) -> None:
+        self._clock = clock
+        self._alpha = smoothing
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._listeners: list[ProgressListener] = []
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._done_cmds = self._total_cmds = 0
+            self._done_bytes = self._total_bytes = 0
+            self._rate = 0.0
+            self._stamp: float | None = None   # start of the current window
+            self._window_bytes = 0
+
+    def add(self, cmds: int = 1, nbytes: int = 0) -> None:
+        """Grow the work still to do (negative values correct an estimate)."""
+        with self._lock:
+            self._total_cmds += cmds
+            self._total_bytes = max(self._total_bytes + nbytes, self._done_bytes)
+
+    def start(self) -> None:
+        """Mark the moment the first byte goes out (rate is measured from here)."""
+        with self._lock:
+            self._stamp = self._clock()
+
+    def advance(self, nbytes: int = 0, cmds: int = 0) -> None:
+        """Record completed work and notify subscribers."""
+        with self._lock:
+            now = self._clock()
+            if self._stamp is None:
+                self._stamp = now
+            self._window_bytes += nbytes
+            dt = now - self._stamp
+            if dt >= self._interval:
+                sample = self._window_bytes / dt
+                self._rate = sample if not self._rate else \
+                    self._rate + self._alpha * (sample - self._rate)
+                self._stamp = now
+                self._window_bytes = 0
+            self._done_bytes += nbytes
+            self._done_cmds += cmds
+            self._total_bytes = max(self._total_bytes, self._done_bytes)
+            self._total_cmds = max(self._total_cmds, self._done_cmds)
+            snap = self._snapshot()
+            listeners = list(self._listeners)
+        for fn in listeners:
+            try:
+                fn(snap)
+            except Exception:  # noqa: BLE001 - one listener must not break the others
+                _LOG.exception("progress listener raised")
+
+    def snapshot(self) -> Progress:
+        with self._lock:
+            return self._snapshot()
+
+    def subscribe(self, fn: ProgressListener) -> Callable[[], None]:
+        """Call *fn(progress)* on every update; returns an unsubscribe callable."""
+        with self._lock:
+            self._listeners.append(fn)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if fn in self._listeners:
+                    self._listeners.remove(fn)
+        return unsubscribe
+
+    def _snapshot(self) -> Progress:
+        rate = self._rate
+        if not rate and self._stamp is not None:
+            # No full window yet: provisional rate of the partial one.
+            dt = self._clock() - self._stamp
+            rate = self._window_bytes / dt if dt > 0 else 0.0
+        left = self._total_bytes - self._done_bytes
+        if left <= 0 and self._done_cmds >= self._total_cmds:
+            eta = 0.0
+        elif rate > 0:
+            eta = left / rate
+        else:
+            eta = None
+        return Progress(self._done_cmds, self._total_cmds, self._done_bytes,
+                        self._total_bytes, rate, eta)
@@ -0,0 +1,206 @@
+"""Token-bucket pacing for outbound locator and ElUDP frames.
+
+Every frame takes a token from the bucket of the local interface it leaves
+through and, when addressed, from the bucket of its device. A frame that
+finds a bucket empty is delayed until a token is due. A command frame that
+would have to wait longer than `max_delay` is dropped rather than queued
+without limit, and the drop is reported to the caller (`send_pack` returns
+False). Discovery REQUESTs and unicast probes are reserved with
+``drop=False``: they are only ever delayed, so a large fleet is paced over
+the poll interval instead of losing the same tail devices on every tick.
+
+Frames go out in one of two lanes. Bulk frames (command queues, fleet
+jobs, firmware, polling) reserve tokens first come, first served, so a busy
+bucket holds a backlog of future slots. Interactive frames (an operator's
+click, a manual refresh) do not queue behind that backlog: they are paced
+only by an interactive bucket at `interactive_share` of the rate, and the
+tokens they use push the bulk backlog back. Interactive latency therefore
+stays flat while fleet jobs run, and bulk traffic keeps at least the rest
+of the rate however busy the operator is.
+
+`Pacer.reserve()` only does the accounting and returns the delay, so each
+engine can wait in its own way: threads sleep, the asyncio locator defers
+the send with `call_later`.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import socket
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterable
+from dataclasses import dataclass
+from enum import Enum
+
+import netifaces
+
+from dsu.config.settings import RateLimitConfig
+
+DEFAULT_IFACE = "default"
+
+
+class Lane(Enum):
+    """Priority class of an outbound frame."""
+    INTERACTIVE = "interactive"   # operator actions: never wait behind bulk
+    BULK = "bulk"                 # queues, fleet jobs, firmware, polling
+
+
+@dataclass(frozen=True)
+class PacerStats:
+    queued: int       # frames submitted to the limiter
+    delayed: int      # frames that had to wait for a token
+    dropped: int      # frames rejected because the wait exceeded max_delay
+    delay_total: float  # s, summed over delayed frames
+    interactive: int = 0  # frames submitted in the interactive lane
+
+
+class TokenBucket:
+    """Classic token bucket; tokens may go negative to reserve future slots."""
+
+    __slots__ = ("burst", "rate", "stamp", "tokens")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.stamp = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0.0 when unlimited)."""
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1.0
+
+
+def local_networks() -> list[ipaddress.IPv4Network]:
+    """IPv4 networks of the host's interfaces (used to map unicast to an iface)."""
+    nets = []
+    for nif in netifaces.interfaces():
+        for ai in netifaces.ifaddresses(nif).get(socket.AF_INET, []):
+            if 'addr' in ai and 'netmask' in ai:
+                nets.append(ipaddress.IPv4Network(
+                    f"{ai['addr']}/{ai['netmask']}", strict=False))
+    return nets
+
+
+class Pacer:
+    """Per-interface and per-device token buckets; safe to share between threads."""
+
+    def __init__(
+        self,
+        config: RateLimitConfig | None = None,
+        networks: Iterable[ipaddress.IPv4Network] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config = config or RateLimitConfig()
+        self._networks = list(networks)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ifaces: dict[str, TokenBucket] = {}
+        self._devices: dict[Hashable, TokenBucket] = {}
+        self._iface_of: dict[str, str] = {}
+        # Buckets of the interactive lane, same keys at interactive_share of the rate
+        self._ifaces_hi: dict[str, TokenBucket] = {}
+        self._devices_hi: dict[Hashable, TokenBucket] = {}
+        self._queued = self._delayed = self._dropped = self._interactive = 0
+        self._delay_total = 0.0
+
+    def reserve(self, iface: str | None = None, dev: Hashable | None = None,
+                ip: str | None = None, drop: bool = True,
+                lane: Lane = Lane.BULK) -> float | None:
+        """Account for one frame. Returns the delay before sending, or None to drop.
+
+        :param iface: local interface key (broadcast address); derived from *ip* if None
+        :param dev: device key for the per-device bucket (None for broadcasts)
+        :param ip: destination address of a unicast frame
+        :param drop: False for frames that must go out however long they wait
+        :param lane: `Lane.INTERACTIVE` frames skip the bulk backlog
+        """
+        cfg = self.config
+        if not cfg.enabled:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._queued += 1
+            if iface is None:
+                iface = self.interface_of(ip) if ip else DEFAULT_IFACE
+            buckets = [self._bucket(self._ifaces, iface, cfg.interface_rate,
+                                    cfg.interface_burst, now)]
+            if dev is not None:
+                buckets.append(self._bucket(self._devices, dev, cfg.device_rate,
+                                            cfg.device_burst, now))
+            if lane is Lane.INTERACTIVE:
+                self._interactive += 1
+                share = cfg.interactive_share
+                gates = [self._bucket(self._ifaces_hi, iface,
+                                      cfg.interface_rate * share,
+                                      cfg.interface_burst, now)]
+                if dev is not None:
+                    gates.append(self._bucket(self._devices_hi, dev,
+                                              cfg.device_rate * share,
+                                              cfg.device_burst, now))
+                # The shared buckets are still charged (the bulk backlog moves
+                # back), but only the interactive ones decide the wait
+                for b in buckets:
+                    b.wait_time(now)
+            else:
+                gates = buckets
+            wait = max(b.wait_time(now) for b in gates)
+            if drop and wait > cfg.max_delay:
+                self._dropped += 1
+                return None
+            for b in buckets:
+                b.take()
+            if gates is not buckets:
+                for b in gates:
+                    b.take()
+            if wait > 0:
+                self._delayed += 1
+                self._delay_total += wait
+            return wait
+
+    def acquire(self, iface: str | None = None, dev: Hashable | None = None,
+                ip: str | None = None, drop: bool = True,
+                lane: Lane = Lane.BULK) -> bool:
+        """Blocking `reserve()`: sleeps out the delay. False if the frame is dropped."""
+        wait = self.reserve(iface, dev, ip, drop, lane)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def interface_of(self, ip: str) -> str:
+        """Local network that *ip* belongs to, or DEFAULT_IFACE."""
+        key = self._iface_of.get(ip)
+        if key is None:
+            key = DEFAULT_IFACE
+            try:
+                addr = ipaddress.IPv4Address(ip)
+            except ValueError:
+                addr = None
+            for net in self._networks:
+                if addr is not None and addr in net:
+                    key = str(net.broadcast_address)
+                    break
+            self._iface_of[ip] = key
+        return key
+
+    def stats(self) -> PacerStats:
+        with self._lock:
+            return PacerStats(self._queued, self._delayed, self._dropped,
+                              self._delay_total, self._interactive)
+
+    @staticmethod
+    def _bucket(table: dict, key, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = table.get(key)
+        if bucket is None:
+            bucket = table[key] = TokenBucket(rate, burst, now)
+        return bucket
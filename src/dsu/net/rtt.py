@@ -0,0 +1,108 @@
+"""Per-device round-trip time estimation and retransmission timeouts.
+
+The estimator follows TCP (RFC 6298): a smoothed RTT and an RTT variance,
+updated from every unambiguous round trip, give the timeout
+
+    RTO = SRTT + max(granularity, K * RTTVAR)
+
+clamped to [min_timeout, max_timeout]. A timeout doubles the device's RTO
+(exponential backoff) until the next valid sample brings it back down.
+Samples from retransmitted commands are ignored (Karn's rule): the answer
+cannot be attributed to one of the sends.
+
+A device that has never answered gets `initial_timeout`, the fixed value
+the command queues used before, so behaviour only changes once there is
+evidence for it.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Hashable
+from dataclasses import dataclass
+
+from dsu.config.settings import RttConfig
+
+
+@dataclass(frozen=True)
+class RttStats:
+    srtt: float | None     # s; None before the first sample
+    rttvar: float | None
+    rto: float             # s, current retransmission timeout
+    samples: int
+
+
+class RttEstimator:
+    """SRTT/RTTVAR of one device. Not thread-safe; `RttTable` locks around it."""
+
+    __slots__ = ("_cfg", "rto", "rttvar", "samples", "srtt")
+
+    def __init__(self, config: RttConfig) -> None:
+        self._cfg = config
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self.rto = config.initial_timeout
+        self.samples = 0
+
+    def sample(self, rtt: float) -> None:
+        cfg = self._cfg
+        rtt = max(rtt, 0.0)
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += cfg.beta * (abs(self.srtt - rtt) - self.rttvar)
+            self.srtt += cfg.alpha * (rtt - self.srtt)
+        self.samples += 1
+        self.rto = self._clamp(self.srtt + max(cfg.granularity, cfg.k * self.rttvar))
+
+    def backoff(self) -> None:
+        self.rto = self._clamp(self.rto * 2)
+
+    def _clamp(self, rto: float) -> float:
+        return min(max(rto, self._cfg.min_timeout), self._cfg.max_timeout)
+
+
+class RttTable:
+    """Estimators keyed by device (serial number, or ip without one)."""
+
+    def __init__(self, config: RttConfig | None = None) -> None:
+        self.config = config or RttConfig()
+        self._lock = threading.Lock()
+        self._devices: dict[Hashable, RttEstimator] = {}
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def sample(self, key: Hashable, rtt: float) -> None:
+        """Feed one round trip of a first (not retransmitted) send."""
+        with self._lock:
+            est = self._devices.get(key)
+            if est is None:
+                est = self._devices[key] = RttEstimator(self.config)
+            est.sample(rtt)
+
+    def timeout(self, key: Hashable) -> float:
+        """Timeout for the next send to *key*."""
+        est = self._devices.get(key)
+        return self.config.initial_timeout if est is None else est.rto
+
+    def backoff(self, key: Hashable) -> float:
+        """Double the timeout of *key* after an unanswered send; returns it."""
+        with self._lock:
+            est = self._devices.get(key)
+            if est is None:
+                est = self._devices[key] = RttEstimator(self.config)
+            est.backoff()
+            return est.rto
+
+    def stats(self, key: Hashable) -> RttStats:
+        with self._lock:
+            est = self._devices.get(key)
+            if est is None:
+                return RttStats(None, None, self.config.initial_timeout, 0)
+            return RttStats(est.srtt, est.rttvar, est.rto, est.samples)
+
+    def forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._devices.pop(key, None)
@@ -0,0 +1,127 @@
+"""One timer thread for the whole application.
+
+`threading.Timer` starts an OS thread per timer. Command timeouts, retries,
+watchdogs and poll ticks instead go into one heap served by a single
+thread; `schedule()` returns a handle whose `cancel()` is O(1) (cancelled
+entries are discarded when they reach the top of the heap).
+
+Callbacks run on the scheduler thread and must not block: anything slow
+should be handed to another thread or scheduled in smaller steps.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+_LOG = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """A scheduled call; `cancel()` before it fires to drop it."""
+
+    __slots__ = ("_args", "_fn", "cancelled", "when")
+
+    def __init__(self, when: float, fn: Callable, args: tuple) -> None:
+        self.when = when
+        self._fn = fn
+        self._args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._fn = None
+        self._args = ()
+
+    def _run(self) -> None:
+        fn, args = self._fn, self._args
+        if fn is None:
+            return
+        self.cancel()  # fired handles report as done
+        fn(*args)
+
+
+class Scheduler:
+    """Heap of timers on one daemon thread, started by the first `schedule()`."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 name: str = "dsu timers") -> None:
+        self._clock = clock
+        self._name = name
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._shutdown = False
+
+    def __len__(self) -> int:
+        """Timers waiting to fire (cancelled ones included until discarded)."""
+        return len(self._heap)
+
+    def schedule(self, delay: float, fn: Callable, *args) -> TimerHandle:
+        """Call ``fn(*args)`` on the scheduler thread after *delay* seconds."""
+        handle = TimerHandle(self._clock() + max(delay, 0.0), fn, args)
+        with self._cond:
+            if self._shutdown:
+                handle.cancel()
+                return handle
+            heapq.heappush(self._heap, (handle.when, next(self._seq), handle))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name,
+                                                daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is handle:
+                self._cond.notify()
+        return handle
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the thread; pending timers are dropped."""
+        with self._cond:
+            self._shutdown = True
+            for _, _, handle in self._heap:
+                handle.cancel()
+            self._heap.clear()
+            self._cond.notify()
+            thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._shutdown:
+                        return
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    when, _, handle = self._heap[0]
+                    if handle.cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    delay = when - self._clock()
+                    if delay <= 0:
+                        heapq.heappop(self._heap)
+                        break
+                    self._cond.wait(delay)
+            try:
+                handle._run()
+            except Exception:  # noqa: BLE001 - keep serving the other timers
+                _LOG.exception("timer callback failed")
+
+
+_default: Scheduler | None = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler() -> Scheduler:
+    """Process-wide scheduler for objects created without an `Application`."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Scheduler(name="dsu default timers")
+        return _default
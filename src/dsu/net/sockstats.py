@@ -0,0 +1,116 @@
+"""Kernel socket buffer sizing and receive/drop accounting for UDP sockets.
+
+A discovery REQUEST is answered by every controller within a few
+milliseconds; with the default receive buffer the kernel silently drops
+whatever does not fit. `auto_rcvbuf()` sizes the buffer from the fleet size
+and `SocketStats` reads the kernel's cumulative drop counter, which Linux
+attaches to received datagrams once `SO_RXQ_OVFL` is enabled.
+
+On platforms without `SO_RXQ_OVFL` or `recvmsg` (Windows) the helpers fall
+back to plain `recvfrom` and `dropped` stays None ("unknown").
+"""
+
+from __future__ import annotations
+
+import logging
+import socket
+import struct
+import sys
+from dataclasses import dataclass
+
+_LOG = logging.getLogger(__name__)
+
+SO_RXQ_OVFL = getattr(socket, 'SO_RXQ_OVFL',
+                      40 if sys.platform.startswith('linux') else None)
+_HAS_RECVMSG = hasattr(socket.socket, 'recvmsg_into')
+_ANC_SIZE = socket.CMSG_SPACE(4) if _HAS_RECVMSG else 0
+_U32 = struct.Struct('=I')
+# Linux doubles the requested buffer size (bookkeeping overhead) on report
+_REPORT_FACTOR = 2 if sys.platform.startswith('linux') else 1
+
+# Kernel memory charged per small datagram (skb truesize), not the payload.
+BYTES_PER_DATAGRAM = 1024
+MIN_RCVBUF = 256 * 1024
+MAX_RCVBUF = 16 * 1024 * 1024
+
+
+def auto_rcvbuf(fleet_size: int, headroom: float = 2.0) -> int:
+    """Receive buffer that holds one answer from every device, with headroom."""
+    want = int(fleet_size * BYTES_PER_DATAGRAM * headroom)
+    return min(max(want, MIN_RCVBUF), MAX_RCVBUF)
+
+
+@dataclass(frozen=True)
+class SocketCounters:
+    received: int         # datagrams read from the socket
+    dropped: int | None   # kernel drops (SO_RXQ_OVFL); None if unsupported
+    rcvbuf: int           # effective SO_RCVBUF, bytes
+    sndbuf: int           # effective SO_SNDBUF, bytes
+
+
+class SocketStats:
+    """Buffer sizes and counters of one UDP socket.
+
+    `received` is incremented by the owner of the socket for every datagram
+    it handles; `dropped` is refreshed from the ancillary data of datagrams
+    read through `recv_into()`/`recv()`.
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+        self.received = 0
+        self.dropped: int | None = None
+        if SO_RXQ_OVFL is not None and _HAS_RECVMSG:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+                self.dropped = 0
+            except OSError:
+                pass
+
+    def size(self, rcvbuf: int = 0, sndbuf: int = 0) -> None:
+        """Request buffer sizes in bytes (0 leaves a buffer at the OS default)."""
+        for opt, want in ((socket.SO_RCVBUF, rcvbuf), (socket.SO_SNDBUF, sndbuf)):
+            if want <= 0:
+                continue
+            try:
+                self._sock.setsockopt(socket.SOL_SOCKET, opt, want)
+                got = self._sock.getsockopt(socket.SOL_SOCKET, opt)
+            except OSError as exc:
+                _LOG.warning("cannot set socket buffer to %d: %s", want, exc)
+                continue
+            # Linux reports twice the requested value and caps it at
+            # net.core.rmem_max / wmem_max without an error.
+            got //= _REPORT_FACTOR
+            if got < want:
+                _LOG.warning("socket buffer capped at %d bytes (asked %d); "
+                             "raise net.core.rmem_max/wmem_max", got, want)
+
+    def recv_into(self, buf, flags: int = 0):
+        """`recvfrom_into` that also picks up the kernel drop counter."""
+        if self.dropped is None:
+            return self._sock.recvfrom_into(buf, 0, flags)
+        n, anc, _flags, addr = self._sock.recvmsg_into([buf], _ANC_SIZE, flags)
+        self._harvest(anc)
+        return n, addr
+
+    def recv(self, bufsize: int, flags: int = 0):
+        """`recvfrom` that also picks up the kernel drop counter."""
+        if self.dropped is None:
+            return self._sock.recvfrom(bufsize, flags)
+        data, anc, _flags, addr = self._sock.recvmsg(bufsize, _ANC_SIZE, flags)
+        self._harvest(anc)
+        return data, addr
+
+    def counters(self) -> SocketCounters:
+        try:
+            rcvbuf = self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+            sndbuf = self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        except OSError:
+            rcvbuf = sndbuf = 0  # socket already closed
+        return SocketCounters(self.received, self.dropped, rcvbuf, sndbuf)
+
+    def _harvest(self, anc) -> None:
+        for level, kind, data in anc:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(data) >= 4:
+                # Cumulative since the option was enabled.
+                self.dropped = _U32.unpack_from(data)[0]
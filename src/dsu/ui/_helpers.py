@@ -3,8 +3,10 @@
 from __future__ import annotations
 
 
-def format_status_text(online: bool) -> str:
-    return "online" if online else "offline"
+def format_status_text(online: bool, degraded: bool = False) -> str:
+    if not online:
+        return "offline"
+    return "degraded" if degraded else "online"
 
 
 def format_serial_short(s_num: str, max_chars: int = 14) -> str:
@@ -11,7 +11,10 @@ import flet as ft
 from dsu.app import Application
 from dsu.domain.events import DevLstEvent
 from dsu.domain.models import Device
+from dsu.domain.registry import ChangeSet
+from dsu.net.liveness import Health
 from dsu.net.locator import LocatorCmd
+from dsu.net.ratelimit import Lane
 from dsu.ui.confirm import show_confirm
 from dsu.ui.device_table import DeviceTable
 from dsu.ui.flash_state import FlashState
@@ -55,10 +58,12 @@ class AppView:
         self._table = DeviceTable(
             flash_state=self._flash,
             is_online=self._is_online,
+            is_degraded=self._is_degraded,
             on_select=self._on_device_selected,
         )
         self._inspector = Inspector(
             is_online=self._is_online,
+            is_degraded=self._is_degraded,
             flash_state=self._flash,
             on_action=self._on_action,
             on_apply_settings=self._on_apply_settings,
@@ -87,7 +92,8 @@ class AppView:
         app.events.bind(self._on_event_threadsafe,
                         [DevLstEvent.APPEND_DEV, DevLstEvent.REMOVE_DEV,
                          DevLstEvent.UPDATE_DEV, DevLstEvent.POLL_RESPONSE,
-                         DevLstEvent.CMD_RESPONSE, DevLstEvent.CON_FAIL])
+                         DevLstEvent.CMD_RESPONSE, DevLstEvent.CON_FAIL,
+                         DevLstEvent.CON_DEGRADED, DevLstEvent.BATCH])
 
         self._flash.subscribe(self._on_flash_changed)
 
@@ -107,9 +113,21 @@ class AppView:
     # ---- thread-safe event marshalling ------------------------------------
 
     def _on_event_threadsafe(self, event: DevLstEvent, **kw) -> None:
+        if event == DevLstEvent.BATCH:
+            changes = kw["changes"]
+            _run_on_page(self._page, lambda: self._handle_batch(changes))
+            return
         dev = kw.get("dev")
         _run_on_page(self._page, lambda: self._handle_event(event, dev))
 
+    def _handle_batch(self, changes: ChangeSet) -> None:
+        """One table refresh per discovery burst instead of one per device."""
+        with self._online_lock:
+            self._online.update(self._key(d) for d in changes.devices())
+        self._refresh_table_from_registry()
+        if changes.updated:
+            self._inspector.refresh()
+
     def _handle_event(self, event: DevLstEvent, dev: Device | None) -> None:
         if event == DevLstEvent.APPEND_DEV and dev is not None:
             with self._online_lock:
@@ -135,6 +153,10 @@ class AppView:
             show_toast(self._page,
                        f"{dev.name or dev.ip} is offline", kind="error")
             self._refresh_table_from_registry()
+        elif event == DevLstEvent.CON_DEGRADED and dev is not None:
+            self._log.add(f"{dev.name or dev.ip}: replies late, link degraded", "warn")
+            self._refresh_table_from_registry()
+            self._inspector.refresh()
         elif event == DevLstEvent.CMD_RESPONSE and dev is not None:
             self._log.add(f"{dev.name or dev.ip}: cmd ok", "info")
 
@@ -147,6 +169,9 @@ class AppView:
         with self._online_lock:
             return self._key(dev) in self._online
 
+    def _is_degraded(self, dev: Device) -> bool:
+        return self._app.controller.liveness.health(dev) is Health.DEGRADED
+
     @staticmethod
     def _key(dev: Device) -> str:
         return dev.s_num or f"{dev.ip}:{dev.port}"
@@ -215,12 +240,13 @@ class AppView:
         cmd = names[key]
 
         def do():
-            if key == "reboot":
-                self._send_eludp(dev, b"\x02")
-            elif key == "bootloader":
-                self._send_eludp(dev, b"\x06")
-            elif key == "normal":
-                self._send_eludp(dev, b"\x05")
+            codes = {"reboot": b"\x02", "bootloader": b"\x06", "normal": b"\x05"}
+            if not self._send_eludp(dev, codes[key]):
+                show_toast(self._page, f"{cmd} not sent: link busy, try again",
+                           "error")
+                self._log.add(f"{dev.name or dev.ip}: {cmd} dropped by rate limiter",
+                              "error")
+                return
             self._log.add(f"{dev.name or dev.ip}: {cmd} sent", "info")
 
         show_confirm(
@@ -230,8 +256,8 @@ class AppView:
             on_yes=do,
         )
 
-    def _send_eludp(self, dev: Device, cmd_byte: bytes) -> None:
-        self._app.controller.send_eludp(dev, cmd_byte)
+    def _send_eludp(self, dev: Device, cmd_byte: bytes) -> bool:
+        return self._app.controller.send_eludp(dev, cmd_byte, Lane.INTERACTIVE)
 
     def _on_apply_settings(self, dev: Device, form: SettingsForm) -> None:
         def do():
@@ -240,8 +266,13 @@ class AppView:
             except Exception as exc:
                 show_toast(self._page, f"Invalid settings: {exc}", "error")
                 return
-            self._app.controller.send_locator(
-                dev, LocatorCmd.SET_PRIMARY, arr)
+            if not self._app.controller.send_locator(
+                    dev, LocatorCmd.SET_PRIMARY, arr, Lane.INTERACTIVE):
+                show_toast(self._page, "Settings not sent: link busy, try again",
+                           "error")
+                self._log.add(f"{dev.name or dev.ip}: settings dropped by rate limiter",
+                              "error")
+                return
             show_toast(self._page, "Settings applied", "success")
             self._log.add(f"{dev.name or dev.ip}: settings applied", "info")
 
@@ -267,6 +298,7 @@ class AppView:
 
     def _on_flash_firmware(self, dev: Device, path: str) -> None:
         from dsu.net.firmware import Firmware
+        from dsu.net.fw_transfer import FirmwareTransfer
 
         def do():
             fw = Firmware(path)
@@ -274,18 +306,30 @@ class AppView:
                 show_toast(self._page, "Invalid firmware file", "error")
                 return
             key = self._key(dev)
-            total = fw.size
-            self._flash.start(key, total)
+            transfer = FirmwareTransfer(
+                self._app.el_udp, dev, fw, self._app.config.firmware)
+            self._flash.start(key, transfer.total_bytes)
+            last_pct = -1
+
+            def on_progress(p) -> None:
+                # Acks arrive per 32-byte block; repaint only on whole percents.
+                nonlocal last_pct
+                if p.percent != last_pct:
+                    last_pct = p.percent
+                    _run_on_page(self._page,
+                                 lambda: self._flash.update(key, p.done_bytes, p.eta))
+
+            transfer.tracker.subscribe(on_progress)
 
             def runner():
                 flash_ok = True
                 flash_err: Exception | None = None
+                stats = None
                 try:
-                    for pack in fw:
-                        self._app.controller.send_eludp(dev, pack)
-                        _run_on_page(
-                            self._page,
-                            lambda p=fw.progress(): self._flash.update(key, p))
+                    stats = transfer.run()
+                    _LOG.info("flash %s: %d bytes in %.1fs (%.0f B/s, %d resent)",
+                              key, stats.total_bytes, stats.elapsed,
+                              stats.bytes_per_s, stats.retransmits)
                 except Exception as exc:
                     flash_ok = False
                     flash_err = exc
@@ -293,11 +337,13 @@ class AppView:
                 finally:
                     _run_on_page(self._page, lambda: self._flash.finish(key))
                     if flash_ok:
+                        rate = stats.bytes_per_s / 1024
                         _run_on_page(
                             self._page,
                             lambda: show_toast(
                                 self._page,
-                                f"Flash finished for {dev.name or dev.ip}",
+                                f"Flash finished for {dev.name or dev.ip} "
+                                f"({rate:.1f} KB/s)",
                                 "success"))
                     else:
                         err_text = f"Flash failed for {dev.name or dev.ip}: {flash_err}"
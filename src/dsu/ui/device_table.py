@@ -32,9 +32,11 @@ class DeviceTable:
         flash_state: FlashState,
         is_online: Callable[[Device], bool],
         on_select: Callable[[Device], None],
+        is_degraded: Callable[[Device], bool] = lambda dev: False,
     ) -> None:
         self._flash = flash_state
         self._is_online = is_online
+        self._is_degraded = is_degraded
         self._on_select = on_select
         self._query: str = ""
         self._selected_key: str | None = None
@@ -90,8 +92,13 @@ class DeviceTable:
         flashing = self._flash.is_flashing(key)
         percent = self._flash.percent(key) if flashing else 0
 
-        dot = ft.Text("●", size=14,
-                      color="#4ade80" if online else "#666666")
+        if not online:
+            dot_color = "#666666"
+        elif self._is_degraded(dev):
+            dot_color = "#f59e0b"
+        else:
+            dot_color = "#4ade80"
+        dot = ft.Text("●", size=14, color=dot_color)
 
         name_widget: ft.Control = ft.Text(dev.name or "(unnamed)", size=12)
         if flashing:
@@ -13,6 +13,7 @@ class FlashState:
     def __init__(self) -> None:
         self._lock = threading.Lock()
         self._items: dict[str, tuple[int, int]] = {}  # key -> (current, total)
+        self._eta: dict[str, float] = {}              # key -> seconds left
         self._listeners: list[Callable[[], None]] = []
 
     @property
@@ -38,22 +39,33 @@ class FlashState:
             return 0
         return min(100, int(cur * 100 / tot))
 
+    def eta(self, key: str) -> float | None:
+        """Seconds left, when the transfer reports a rate."""
+        with self._lock:
+            return self._eta.get(key)
+
     def start(self, key: str, total: int) -> None:
         with self._lock:
             self._items[key] = (0, total)
+            self._eta.pop(key, None)
         self._notify()
 
-    def update(self, key: str, current: int) -> None:
+    def update(self, key: str, current: int, eta: float | None = None) -> None:
         with self._lock:
             if key not in self._items:
                 return
             _, tot = self._items[key]
             self._items[key] = (current, tot)
+            if eta is None:
+                self._eta.pop(key, None)
+            else:
+                self._eta[key] = eta
         self._notify()
 
     def finish(self, key: str) -> None:
         with self._lock:
             self._items.pop(key, None)
+            self._eta.pop(key, None)
         self._notify()
 
     def subscribe(self, fn: Callable[[], None]) -> None:
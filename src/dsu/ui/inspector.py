@@ -27,8 +27,10 @@ class Inspector:
         on_apply_settings: Callable[[Device, SettingsForm], None],
         on_pick_firmware: Callable[[Device, FirmwareTabState], None],
         on_flash_firmware: Callable[[Device, str], None],
+        is_degraded: Callable[[Device], bool] = lambda dev: False,
     ) -> None:
         self._is_online = is_online
+        self._is_degraded = is_degraded
         self._flash = flash_state
         self._on_action = on_action
         self._on_apply = on_apply_settings
@@ -129,7 +131,10 @@ class Inspector:
         if dev is None:
             return
         online = self._is_online(dev)
-        self._dot.color = "#4ade80" if online else "#666"
+        if not online:
+            self._dot.color = "#666"
+        else:
+            self._dot.color = "#f59e0b" if self._is_degraded(dev) else "#4ade80"
         self._title.value = dev.name or "(unnamed)"
         self._subtitle.value = f"{dev.ip}  \u00b7  {dev.model}"
         self._tabs_row.controls = self._build_tab_buttons()
@@ -174,6 +179,9 @@ class Inspector:
         cur, tot = self._flash.progress(key)
         pct = (cur / tot) if tot else 0.0
         prog_text = f"{cur} of {tot} bytes" if flashing else ""
+        eta = self._flash.eta(key) if flashing else None
+        if eta is not None:
+            prog_text += f", {eta:.0f} s left"
         return build_firmware_tab(
             dev,
             state=self._fw_state,
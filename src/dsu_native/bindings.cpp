@@ -5,13 +5,109 @@
 
 namespace py = pybind11;
 
+namespace {
+
+/// Contiguous read-only view of any bytes-like object (bytes, bytearray,
+/// memoryview) without copying it.
+struct ByteView {
+    const std::uint8_t* data;
+    std::size_t         size;
+};
+
+ByteView byte_view(const py::buffer& b, py::buffer_info& info) {
+    info = b.request();
+    if (info.ndim != 1 || info.itemsize != 1 || info.strides[0] != 1) {
+        throw py::value_error("expected a contiguous bytes-like object");
+    }
+    return {static_cast<const std::uint8_t*>(info.ptr),
+            static_cast<std::size_t>(info.size)};
+}
+
+template <std::size_t N>
+py::bytes to_bytes(const std::array<std::uint8_t, N>& a) {
+    return py::bytes(reinterpret_cast<const char*>(a.data()), N);
+}
+
+}  // namespace
+
 PYBIND11_MODULE(dsu_native, m) {
-    m.doc() = "DSU native module — firmware parsing and packet generation";
+    m.doc() = "DSU native module — firmware parsing, packet generation and locator framing";
     m.attr("__version__")  = "2.0.0";
     m.attr("HEADER_SIZE")  = static_cast<int>(dsu::HEADER_SIZE);
     m.attr("BLOCK_SIZE")   = static_cast<int>(dsu::BLOCK_SIZE);
     m.attr("CMD_FW_INFO")  = dsu::CMD_FW_INFO;
     m.attr("CMD_FW_PACK")  = dsu::CMD_FW_PACK;
+    m.attr("LOCATOR_HEADER_SIZE")  = static_cast<int>(dsu::LOCATOR_HEADER_SIZE);
+    m.attr("LOCATOR_SUMMARY_SIZE") = static_cast<int>(dsu::LOCATOR_SUMMARY_SIZE);
+
+    m.def("encode_locator_frame",
+          [](int cmd, const py::buffer& data, py::object s_num, int ver) {
+              py::buffer_info info;
+              ByteView d = byte_view(data, info);
+              std::string serial;
+              if (!s_num.is_none()) {
+                  serial = s_num.cast<std::string>();
+                  if (serial.size() != dsu::LOCATOR_SERIAL_SIZE) {
+                      throw py::value_error("s_num must be 16 bytes");
+                  }
+              }
+              auto frame = dsu::encode_locator_frame(
+                  serial.empty() ? nullptr
+                                 : reinterpret_cast<const std::uint8_t*>(serial.data()),
+                  static_cast<std::uint8_t>(ver), static_cast<std::uint8_t>(cmd),
+                  d.data, d.size);
+              return py::bytes(reinterpret_cast<const char*>(frame.data()), frame.size());
+          },
+          py::arg("cmd"), py::arg("data") = py::bytes(), py::arg("s_num") = py::none(),
+          py::arg("ver") = 1,
+          "Build a locator frame. s_num: 16 raw serial bytes in display order, "
+          "or None for broadcast.");
+
+    m.def("decode_locator_frame",
+          [](const py::buffer& buf) -> py::object {
+              py::buffer_info info;
+              ByteView b = byte_view(buf, info);
+              auto f = dsu::decode_locator_frame(b.data, b.size);
+              if (!f) return py::none();
+              // (s_num_hex, ver, cmd, data) — s_num as the display-order hex string.
+              return py::make_tuple(
+                  py::bytes(reinterpret_cast<const char*>(f->s_num.data()),
+                            f->s_num.size()).attr("hex")(),
+                  static_cast<int>(f->ver),
+                  static_cast<int>(f->cmd),
+                  py::bytes(reinterpret_cast<const char*>(f->data.data()),
+                            f->data.size()));
+          },
+          py::arg("buf"),
+          "Validate password, length and checksum of a locator frame.");
+
+    m.def("decode_locator_summaries",
+          [](const py::buffer& buf) {
+              py::buffer_info info;
+              ByteView b = byte_view(buf, info);
+              std::vector<dsu::LocatorSummary> rows;
+              {
+                  py::gil_scoped_release release;
+                  rows = dsu::decode_locator_summaries(b.data, b.size);
+              }
+              // Same field order and types as struct "<BB16s6s2s2s2s16s4s4s4s4sH64s".
+              py::list out(rows.size());
+              for (std::size_t i = 0; i < rows.size(); ++i) {
+                  const auto& s = rows[i];
+                  out[i] = py::make_tuple(
+                      static_cast<int>(s.type), static_cast<int>(s.boot_mode),
+                      to_bytes(s.s_num), to_bytes(s.mac),
+                      to_bytes(s.fw), to_bytes(s.btldr), to_bytes(s.pcb),
+                      to_bytes(s.name),
+                      to_bytes(s.ip), to_bytes(s.mask), to_bytes(s.gateway),
+                      to_bytes(s.host),
+                      static_cast<int>(s.port),
+                      to_bytes(s.comment));
+              }
+              return out;
+          },
+          py::arg("buf"),
+          "Decode consecutive 128-byte Locator_Summary records into field tuples.");
 
     py::class_<dsu::FirmwareHeader>(m, "FirmwareHeader")
         .def_readonly("crypt_mode",    &dsu::FirmwareHeader::crypt_mode)
@@ -76,4 +76,55 @@ private:
     std::optional<PacketIterator> iter_;
 };
 
+// --- Locator protocol framing --------------------------------------------
+
+constexpr std::size_t LOCATOR_HEADER_SIZE  = 27;   // LOCATOR_Header
+constexpr std::size_t LOCATOR_SERIAL_SIZE  = 16;
+constexpr std::size_t LOCATOR_MAX_DATA     = 255;
+constexpr std::size_t LOCATOR_SUMMARY_SIZE = 128;  // Locator_Summary
+
+/// Checksum byte that makes the sum of all frame bytes zero modulo 256.
+std::uint8_t locator_checksum(const std::uint8_t* data, std::size_t len);
+
+/// Build a complete frame. `s_num` is the serial in display order (the wire
+/// carries it byte-reversed) or nullptr for the broadcast serial.
+/// Throws std::length_error if `len` exceeds LOCATOR_MAX_DATA.
+std::vector<std::uint8_t> encode_locator_frame(const std::uint8_t* s_num,
+                                               std::uint8_t ver,
+                                               std::uint8_t cmd,
+                                               const std::uint8_t* data,
+                                               std::size_t len);
+
+struct LocatorFrame {
+    std::array<std::uint8_t, LOCATOR_SERIAL_SIZE> s_num;  // display order
+    std::uint8_t              ver;
+    std::uint8_t              cmd;
+    std::vector<std::uint8_t> data;
+};
+
+/// Decode a frame. Returns nullopt on a wrong password, a length that does
+/// not match the header, or a bad checksum.
+std::optional<LocatorFrame> decode_locator_frame(const std::uint8_t* buf, std::size_t len);
+
+struct LocatorSummary {
+    std::uint8_t                  type;
+    std::uint8_t                  boot_mode;
+    std::array<std::uint8_t, 16>  s_num;      // wire order
+    std::array<std::uint8_t, 6>   mac;
+    std::array<std::uint8_t, 2>   fw;
+    std::array<std::uint8_t, 2>   btldr;
+    std::array<std::uint8_t, 2>   pcb;
+    std::array<std::uint8_t, 16>  name;
+    std::array<std::uint8_t, 4>   ip;
+    std::array<std::uint8_t, 4>   mask;
+    std::array<std::uint8_t, 4>   gateway;
+    std::array<std::uint8_t, 4>   host;
+    std::uint16_t                 port;
+    std::array<std::uint8_t, 64>  comment;
+};
+
+/// Decode consecutive 128-byte Locator_Summary records. A trailing partial
+/// record is ignored.
+std::vector<LocatorSummary> decode_locator_summaries(const std::uint8_t* buf, std::size_t len);
+
 }  // namespace dsu
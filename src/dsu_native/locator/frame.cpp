@@ -0,0 +1,106 @@
+#include "dsu_native/api.hpp"
+
+#include <algorithm>
+#include <cstring>
+#include <stdexcept>
+
+namespace dsu {
+
+namespace {
+
+constexpr std::uint8_t PASSWORD[8] = {'1', '2', '3', '4', '5', '6', '7', '8'};
+
+std::uint8_t byte_sum(const std::uint8_t* data, std::size_t len) {
+    unsigned s = 0;
+    for (std::size_t i = 0; i < len; ++i) {
+        s += data[i];
+    }
+    return static_cast<std::uint8_t>(s & 0xFF);
+}
+
+template <std::size_t N>
+const std::uint8_t* take(std::array<std::uint8_t, N>& dst, const std::uint8_t* p) {
+    std::memcpy(dst.data(), p, N);
+    return p + N;
+}
+
+}  // namespace
+
+std::uint8_t locator_checksum(const std::uint8_t* data, std::size_t len) {
+    return static_cast<std::uint8_t>(-byte_sum(data, len) & 0xFF);
+}
+
+std::vector<std::uint8_t> encode_locator_frame(const std::uint8_t* s_num,
+                                               std::uint8_t ver,
+                                               std::uint8_t cmd,
+                                               const std::uint8_t* data,
+                                               std::size_t len) {
+    if (len > LOCATOR_MAX_DATA) {
+        throw std::length_error("locator data longer than 255 bytes");
+    }
+    std::vector<std::uint8_t> frame(LOCATOR_HEADER_SIZE + len + 1);
+    std::memcpy(frame.data(), PASSWORD, sizeof(PASSWORD));
+    for (std::size_t i = 0; i < LOCATOR_SERIAL_SIZE; ++i) {
+        frame[8 + i] = s_num ? s_num[LOCATOR_SERIAL_SIZE - 1 - i] : 0xFF;
+    }
+    frame[24] = ver;
+    frame[25] = cmd;
+    frame[26] = static_cast<std::uint8_t>(len);
+    if (len) {
+        std::memcpy(frame.data() + LOCATOR_HEADER_SIZE, data, len);
+    }
+    frame.back() = locator_checksum(frame.data(), frame.size() - 1);
+    return frame;
+}
+
+std::optional<LocatorFrame> decode_locator_frame(const std::uint8_t* buf, std::size_t len) {
+    if (buf == nullptr || len < LOCATOR_HEADER_SIZE + 1) {
+        return std::nullopt;
+    }
+    if (std::memcmp(buf, PASSWORD, sizeof(PASSWORD)) != 0) {
+        return std::nullopt;
+    }
+    const std::size_t data_len = buf[26];
+    if (len != LOCATOR_HEADER_SIZE + data_len + 1) {
+        return std::nullopt;
+    }
+    if (byte_sum(buf, len) != 0) {
+        return std::nullopt;
+    }
+    LocatorFrame f{};
+    std::reverse_copy(buf + 8, buf + 8 + LOCATOR_SERIAL_SIZE, f.s_num.begin());
+    f.ver = buf[24];
+    f.cmd = buf[25];
+    f.data.assign(buf + LOCATOR_HEADER_SIZE, buf + LOCATOR_HEADER_SIZE + data_len);
+    return f;
+}
+
+std::vector<LocatorSummary> decode_locator_summaries(const std::uint8_t* buf, std::size_t len) {
+    std::vector<LocatorSummary> out;
+    if (buf == nullptr) {
+        return out;
+    }
+    const std::size_t count = len / LOCATOR_SUMMARY_SIZE;
+    out.resize(count);
+    for (std::size_t i = 0; i < count; ++i) {
+        const std::uint8_t* p = buf + i * LOCATOR_SUMMARY_SIZE;
+        LocatorSummary& s = out[i];
+        s.type      = p[0];
+        s.boot_mode = p[1];
+        p = take(s.s_num, p + 2);
+        p = take(s.mac, p);
+        p = take(s.fw, p);
+        p = take(s.btldr, p);
+        p = take(s.pcb, p);
+        p = take(s.name, p);
+        p = take(s.ip, p);
+        p = take(s.mask, p);
+        p = take(s.gateway, p);
+        p = take(s.host, p);
+        s.port = static_cast<std::uint16_t>(p[0] | (p[1] << 8));
+        take(s.comment, p + 2);
+    }
+    return out;
+}
+
+}  // namespace dsu
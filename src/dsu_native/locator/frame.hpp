@@ -0,0 +1,3 @@
+#pragma once
+
+#include "dsu_native/api.hpp"
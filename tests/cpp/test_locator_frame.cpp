@@ -0,0 +1,95 @@
+#include <catch2/catch_test_macros.hpp>
+
+#include <array>
+#include <numeric>
+#include <vector>
+
+#include "dsu_native/api.hpp"
+
+namespace {
+
+std::array<std::uint8_t, dsu::LOCATOR_SERIAL_SIZE> make_serial() {
+    std::array<std::uint8_t, dsu::LOCATOR_SERIAL_SIZE> s{};
+    std::iota(s.begin(), s.end(), std::uint8_t{1});
+    return s;
+}
+
+}  // namespace
+
+TEST_CASE("encode_locator_frame lays out header, data and checksum") {
+    auto serial = make_serial();
+    std::array<std::uint8_t, 3> data = {0xAA, 0xBB, 0xCC};
+    auto f = dsu::encode_locator_frame(serial.data(), 1, 0x02, data.data(), data.size());
+
+    REQUIRE(f.size() == dsu::LOCATOR_HEADER_SIZE + data.size() + 1);
+    REQUIRE(f[0] == '1');
+    REQUIRE(f[7] == '8');
+    REQUIRE(f[8] == 16);      // serial goes out byte-reversed
+    REQUIRE(f[23] == 1);
+    REQUIRE(f[24] == 1);      // ver
+    REQUIRE(f[25] == 0x02);   // cmd
+    REQUIRE(f[26] == 3);      // len
+    REQUIRE(f[27] == 0xAA);
+    unsigned sum = std::accumulate(f.begin(), f.end(), 0u);
+    REQUIRE((sum & 0xFF) == 0);
+}
+
+TEST_CASE("encode_locator_frame uses broadcast serial for nullptr") {
+    auto f = dsu::encode_locator_frame(nullptr, 1, 0x01, nullptr, 0);
+    REQUIRE(f.size() == dsu::LOCATOR_HEADER_SIZE + 1);
+    for (std::size_t i = 8; i < 24; ++i) {
+        REQUIRE(f[i] == 0xFF);
+    }
+}
+
+TEST_CASE("encode_locator_frame rejects oversized data") {
+    std::vector<std::uint8_t> data(dsu::LOCATOR_MAX_DATA + 1);
+    REQUIRE_THROWS_AS(
+        dsu::encode_locator_frame(nullptr, 1, 0x02, data.data(), data.size()),
+        std::length_error);
+}
+
+TEST_CASE("decode_locator_frame round-trips encode") {
+    auto serial = make_serial();
+    std::array<std::uint8_t, 2> data = {0x01, 0x02};
+    auto f = dsu::encode_locator_frame(serial.data(), 1, 0x0B, data.data(), data.size());
+
+    auto d = dsu::decode_locator_frame(f.data(), f.size());
+    REQUIRE(d.has_value());
+    REQUIRE(d->s_num == serial);
+    REQUIRE(d->ver == 1);
+    REQUIRE(d->cmd == 0x0B);
+    REQUIRE(d->data == std::vector<std::uint8_t>(data.begin(), data.end()));
+}
+
+TEST_CASE("decode_locator_frame rejects bad password, length and checksum") {
+    auto f = dsu::encode_locator_frame(nullptr, 1, 0x01, nullptr, 0);
+
+    auto bad_pw = f;
+    bad_pw[0] = '0';
+    REQUIRE_FALSE(dsu::decode_locator_frame(bad_pw.data(), bad_pw.size()).has_value());
+
+    REQUIRE_FALSE(dsu::decode_locator_frame(f.data(), f.size() - 1).has_value());
+
+    auto bad_sum = f;
+    bad_sum.back() ^= 0x01;
+    REQUIRE_FALSE(dsu::decode_locator_frame(bad_sum.data(), bad_sum.size()).has_value());
+}
+
+TEST_CASE("decode_locator_summaries splits a contiguous buffer") {
+    std::vector<std::uint8_t> buf(2 * dsu::LOCATOR_SUMMARY_SIZE + 5);
+    buf[0] = 3;                                         // type of record 0
+    buf[dsu::LOCATOR_SUMMARY_SIZE] = 4;                 // type of record 1
+    buf[dsu::LOCATOR_SUMMARY_SIZE + 1] = 1;             // boot_mode of record 1
+    buf[dsu::LOCATOR_SUMMARY_SIZE + 62] = 0xDB;         // port LE = 1755
+    buf[dsu::LOCATOR_SUMMARY_SIZE + 63] = 0x06;
+    buf[dsu::LOCATOR_SUMMARY_SIZE + 46] = 192;          // ip[0]
+
+    auto rows = dsu::decode_locator_summaries(buf.data(), buf.size());
+    REQUIRE(rows.size() == 2);
+    REQUIRE(rows[0].type == 3);
+    REQUIRE(rows[1].type == 4);
+    REQUIRE(rows[1].boot_mode == 1);
+    REQUIRE(rows[1].ip[0] == 192);
+    REQUIRE(rows[1].port == 1755);
+}
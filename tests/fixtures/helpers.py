@@ -1,7 +1,7 @@
 """Helpers for tests — not exercised by production code."""
 
 from dsu.domain.events import EventBus
-from dsu.domain.models import Device
+from dsu.domain.models import LOCATOR_PAYLOAD_SIZE, Device
 from dsu.domain.registry import DeviceRegistry
 
 
@@ -19,3 +19,15 @@ def populated_registry(*serials: str) -> tuple[DeviceRegistry, EventBus]:
     for i, s in enumerate(serials):
         reg.add(make_device(serial=s, ip=f"10.0.0.{100 + i}"))
     return reg, bus
+
+
+def make_locator_frame(serial: bytes, cmd: int = 0x01, payload: bytes | None = None) -> bytes:
+    """Build a device → host locator frame. REQUEST replies get a summary payload."""
+    if payload is None:
+        summary = bytearray(LOCATOR_PAYLOAD_SIZE)
+        summary[2:18] = serial[::-1]
+        payload = bytes(summary)
+    frame = bytearray(b"12345678") + serial[::-1]
+    frame += bytes([1, cmd, len(payload)]) + payload
+    frame.append(-sum(frame) & 0xFF)
+    return bytes(frame)
@@ -0,0 +1,57 @@
+import struct
+
+import pytest
+
+import dsu_native
+from dsu.domain.models import LOCATOR_PAYLOAD_SIZE, Device
+from dsu.net.frames import FrameBuilder
+from dsu.net.locator import LocatorCmd
+
+SERIAL = "0102030405060708090a0b0c0d0e0f10"
+
+
+def _summary(i: int) -> bytes:
+    return struct.pack(
+        "<BB16s6s2s2s2s16s4s4s4s4sH64s",
+        1, 1, bytes([i]) * 16, b"\x00\x11\x22\x33\x44\x55",
+        b"\x03\x02", b"\x01\x01", b"\x00\x01", f"dev{i}".encode(),
+        bytes([10, 0, 0, i]), bytes([255, 255, 255, 0]), bytes([10, 0, 0, 1]),
+        bytes(4), 1775, b"comment",
+    )
+
+
+def test_constants():
+    assert dsu_native.LOCATOR_HEADER_SIZE == 27
+    assert dsu_native.LOCATOR_SUMMARY_SIZE == LOCATOR_PAYLOAD_SIZE
+
+
+@pytest.mark.parametrize("s_num", [SERIAL, None])
+def test_encode_matches_python_builder(s_num):
+    data = bytes(range(98))
+    raw = bytes.fromhex(s_num) if s_num else None
+    native = dsu_native.encode_locator_frame(LocatorCmd.SET_PRIMARY.value, data, raw)
+    assert native == bytes(FrameBuilder().build(LocatorCmd.SET_PRIMARY, data, s_num))
+
+
+def test_encode_rejects_oversized_data():
+    with pytest.raises(ValueError):
+        dsu_native.encode_locator_frame(2, bytes(256))
+
+
+def test_decode_frame_round_trip_from_memoryview():
+    frame = bytearray(FrameBuilder().build(LocatorCmd.GET_USER, b"\xAA", SERIAL))
+    assert dsu_native.decode_locator_frame(memoryview(frame)) == \
+        (SERIAL, 1, LocatorCmd.GET_USER.value, b"\xAA")
+    frame[-1] ^= 1
+    assert dsu_native.decode_locator_frame(frame) is None
+
+
+def test_decode_summaries_matches_struct():
+    buf = b"".join(_summary(i) for i in range(1, 6)) + b"\x00" * 7
+    native = [Device.from_summary_fields(f)
+              for f in dsu_native.decode_locator_summaries(buf)]
+    assert native == Device.from_locator_payloads(buf)
+    assert [d.to_dict() for d in native] == \
+        [d.to_dict() for d in Device.from_locator_payloads(buf)]
+    assert native[2].ip == "10.0.0.3"
+    assert native[2].fw == "2.3"
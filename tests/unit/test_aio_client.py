@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from dsu.net.aio_client import AsyncCommandClient, CommandError, CommandTimeout
+from dsu.net.locator import LocatorCmd, LocatorErrorCode, LocatorResult
+from dsu.net.pending import PendingTable
+from tests.fixtures.helpers import make_device
+
+
+class FakeLocator:
+    """Answers on the loop after *delay*; `answers` maps cmd -> reply payload."""
+
+    def __init__(self, answers, delay=0.01, lose=0):
+        self.pending = PendingTable()
+        self.answers = answers
+        self.delay = delay
+        self.lose = lose          # first N sends go unanswered
+        self.sent = []
+
+    def send_pack(self, cmd, data, dev):
+        self.sent.append((dev.s_num, cmd, data))
+        if len(self.sent) <= self.lose:
+            return True
+        loop = asyncio.get_running_loop()
+        loop.call_later(self.delay, self.pending.dispatch,
+                        dev.s_num, cmd, dev, self.answers[cmd])
+        return True
+
+
+def _client(fake, timeout=0.5):
+    return AsyncCommandClient(fake.send_pack, fake.pending, timeout=timeout)
+
+
+def test_read_settings_returns_payload():
+    fake = FakeLocator({LocatorCmd.READ_SETTINGS: b"\x10" * 98})
+    dev = make_device(serial="0a0b")
+
+    reply = asyncio.run(_client(fake).read_settings(dev))
+
+    assert reply.cmd is LocatorCmd.READ_SETTINGS
+    assert reply.pack == b"\x10" * 98
+    assert reply.result is LocatorResult.OK
+    assert reply.attempts == 1
+    assert len(fake.pending) == 0
+
+
+def test_error_result_raises_command_error():
+    fake = FakeLocator({LocatorCmd.SET_PRIMARY: bytes([0x02, 0xff])})
+    dev = make_device(serial="0a0b")
+
+    with pytest.raises(CommandError) as err:
+        asyncio.run(_client(fake).set_primary(dev, b"\x00" * 98))
+
+    assert err.value.result is LocatorResult.ERROR
+    assert err.value.error is LocatorErrorCode.DEFAULT
+
+
+def test_lost_frames_are_retried_then_time_out():
+    fake = FakeLocator({LocatorCmd.GET_MAP: b"\x07"}, lose=1)
+    dev = make_device(serial="0a0b")
+    reply = asyncio.run(_client(fake, timeout=0.05).get_map(dev))
+    assert reply.attempts == 2
+
+    fake = FakeLocator({LocatorCmd.GET_MAP: b"\x07"}, lose=99)
+    with pytest.raises(CommandTimeout) as err:
+        asyncio.run(_client(fake, timeout=0.02).get_map(dev))
+    assert err.value.attempts == 3
+    assert len(fake.sent) == 3
+    assert len(fake.pending) == 0
+
+
+def test_many_devices_in_flight_from_one_loop():
+    fake = FakeLocator({LocatorCmd.GET_USER: b"\x01\x02"}, delay=0.05)
+    client = _client(fake)
+    devs = [make_device(serial=f"{i:04x}") for i in range(500)]
+
+    async def main():
+        return await asyncio.gather(*(client.get_user(d) for d in devs))
+
+    replies = asyncio.run(main())
+
+    assert [r.pack for r in replies] == [b"\x01\x02"] * 500
+    assert max(r.rtt for r in replies) < 0.5   # not serialised
+
+
+def test_same_command_to_one_device_waits_its_turn():
+    fake = FakeLocator({LocatorCmd.GET_LOG: b"\x09"})
+    client = _client(fake)
+    dev = make_device(serial="0a0b")
+
+    async def main():
+        return await asyncio.gather(client.get_log(dev), client.get_log(dev))
+
+    replies = asyncio.run(main())
+
+    assert [r.attempts for r in replies] == [1, 1]
+    assert len(fake.sent) == 2
+    assert client._slots == {}
+
+
+def test_client_records_metrics():
+    from dsu.net.metrics import CommandMetrics
+
+    metrics = CommandMetrics()
+    dev = make_device(serial="0a0b")
+    fake = FakeLocator({LocatorCmd.GET_MAP: b"\x07"}, lose=1)
+    client = AsyncCommandClient(fake.send_pack, fake.pending, timeout=0.05,
+                                metrics=metrics)
+    asyncio.run(client.get_map(dev))
+
+    fake = FakeLocator({LocatorCmd.GET_MAP: b"\x07"}, lose=99)
+    client = AsyncCommandClient(fake.send_pack, fake.pending, timeout=0.01,
+                                metrics=metrics)
+    with pytest.raises(CommandTimeout):
+        asyncio.run(client.get_map(dev))
+
+    stats = metrics.cmd(LocatorCmd.GET_MAP)
+    assert (stats.commands, stats.sends, stats.timeouts) == (2, 5, 1)
+    assert stats.wait_mean is not None
+
+
+def test_rtt_starts_when_the_paced_send_returns():
+    pending = PendingTable()
+    dev = make_device(serial="0a0b")
+
+    def paced_send(cmd, data, dev):
+        # runs in the executor: held back by the pacer, answered 10 ms later
+        time.sleep(0.2)
+        threading.Timer(0.01, pending.dispatch, (dev.s_num, cmd, dev, b"\x05" * 8)).start()
+        return True
+
+    client = AsyncCommandClient(paced_send, pending, blocking_send=True)
+    reply = asyncio.run(client.get_map(dev))
+
+    assert reply.rtt < 0.1
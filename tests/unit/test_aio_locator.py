@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from dsu.config.settings import RateLimitConfig
+from dsu.domain.events import DevLstEvent, EventBus
+from dsu.domain.registry import DeviceRegistry
+from dsu.net.aio_locator import AsyncLocator
+from dsu.net.ratelimit import Pacer
+from tests.fixtures.helpers import make_device, make_locator_frame
+
+
+def test_serve_and_shutdown_are_fast():
+    loc = AsyncLocator(DeviceRegistry(EventBus()), EventBus())
+    thr = threading.Thread(target=loc.run, daemon=True)
+    thr.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    loc.shutdown()
+    thr.join(timeout=1)
+
+    assert not thr.is_alive()
+    assert time.monotonic() - started < 0.5
+
+
+def test_datagram_reaches_registry_as_batch():
+    bus = EventBus()
+    seen = []
+    bus.bind(lambda e, changes, **_: seen.extend(d.s_num for d in changes.appended),
+             DevLstEvent.BATCH)
+    loc = AsyncLocator(DeviceRegistry(bus), bus)
+    try:
+        loc._ingest(make_locator_frame(bytes(range(1, 17))), ("203.0.113.7", 1770))
+    finally:
+        loc.sock.close()
+
+    assert seen == [bytes(range(1, 17)).hex()]
+
+
+def test_paced_probe_reserves_one_frame_at_a_time():
+    pacer = Pacer(RateLimitConfig(interface_rate=200.0, interface_burst=1,
+                                  max_delay=0.0))
+    loc = AsyncLocator(DeviceRegistry(EventBus()), EventBus(), pacer=pacer)
+    devs = [make_device(serial=f"{i:032x}", ip=f"10.1.0.{i}") for i in range(1, 6)]
+    sent = []
+
+    async def main():
+        loc._loop = asyncio.get_running_loop()
+        loc._transport_send = lambda pack, addr: sent.append(addr[0])
+        loc.probe(devs)
+        await asyncio.sleep(0)
+        # the interface budget is not booked ahead for the whole sweep
+        assert pacer.stats().queued <= 2
+        await loc._probe_task
+
+    try:
+        asyncio.run(main())
+    finally:
+        loc.sock.close()
+
+    assert sent == [d.ip for d in devs]
+    assert pacer.stats().dropped == 0
+    assert loc.poll_metrics().probes_per_minute == 5
+
+
+def test_paced_sweep_is_timed_from_the_frame_leaving():
+    pacer = Pacer(RateLimitConfig(interface_rate=10.0, interface_burst=1,
+                                  max_delay=1.0))
+    loc = AsyncLocator(DeviceRegistry(EventBus()), EventBus(), pacer=pacer)
+    loc.ai = [{"broadcast": "10.1.255.255"}]
+    sent = []
+
+    async def main():
+        loc._loop = asyncio.get_running_loop()
+        loc._transport_send = lambda pack, addr: sent.append(time.monotonic())
+        loc.request()                     # uses the burst
+        loc.request()                     # paced ~0.1 s later
+        assert loc._sweep[0] is None      # not stamped before it is sent
+        await asyncio.sleep(0.2)
+
+    try:
+        asyncio.run(main())
+    finally:
+        loc.sock.close()
+
+    assert len(sent) == 2
+    assert loc._sweep[0] == pytest.approx(sent[1], abs=0.01)
@@ -0,0 +1,103 @@
+import asyncio
+
+from dsu.net.aio_client import AsyncCommandClient, CommandError
+from dsu.net.bulk import BulkScheduler, PlanStep
+from dsu.net.locator import LocatorCmd
+from dsu.net.pending import PendingTable
+from tests.fixtures.helpers import make_device
+
+SETTINGS = b"\x10" * 98
+
+
+class FakeLocator:
+    """Answers after *delay*; tracks how many devices are mid-command."""
+
+    def __init__(self, delay=0.01, failing=()):
+        self.pending = PendingTable()
+        self.delay = delay
+        self.failing = set(failing)
+        self.sent = []
+        self.active = set()
+        self.peak = 0
+
+    def send_pack(self, cmd, data, dev):
+        self.sent.append((dev.s_num, cmd, data))
+        self.active.add(dev.s_num)
+        self.peak = max(self.peak, len(self.active))
+        if cmd is LocatorCmd.READ_SETTINGS:
+            pack = SETTINGS
+        else:
+            pack = b"\x02\xff" if dev.s_num in self.failing else b"\x01"
+        asyncio.get_running_loop().call_later(self.delay, self._answer, dev, cmd, pack)
+        return True
+
+    def _answer(self, dev, cmd, pack):
+        self.active.discard(dev.s_num)
+        self.pending.dispatch(dev.s_num, cmd, dev, pack)
+
+
+def _plan():
+    return [PlanStep(LocatorCmd.READ_SETTINGS),
+            PlanStep(LocatorCmd.SET_PRIMARY,
+                     lambda dev, replies: replies[0].pack[:4] + dev.s_num.encode())]
+
+
+def test_plan_runs_in_order_within_concurrency_limit():
+    fake = FakeLocator()
+    bulk = BulkScheduler(AsyncCommandClient(fake.send_pack, fake.pending, timeout=0.5),
+                         concurrency=8)
+    devs = [make_device(serial=f"{i:04x}") for i in range(50)]
+
+    result = asyncio.run(bulk.run(devs, _plan()))
+
+    assert fake.peak <= 8
+    assert len(result.succeeded) == 50 and result.failed == []
+    assert [o.dev for o in result.outcomes] == devs
+    per_dev = [(c, d) for s, c, d in fake.sent if s == "0007"]
+    assert per_dev == [(LocatorCmd.READ_SETTINGS, b""),
+                       (LocatorCmd.SET_PRIMARY, SETTINGS[:4] + b"0007")]
+    assert bulk.tracker.snapshot().done_cmds == 50
+    assert all(o.elapsed > 0 for o in result.outcomes)
+
+
+def test_failed_device_stops_alone():
+    fake = FakeLocator(failing={"0001"})
+    bulk = BulkScheduler(AsyncCommandClient(fake.send_pack, fake.pending, timeout=0.5),
+                         concurrency=2)
+    devs = [make_device(serial=f"{i:04x}") for i in range(3)]
+    done = []
+
+    result = asyncio.run(bulk.run(devs, _plan(), on_done=done.append))
+
+    outcome = result.by_serial()["0001"]
+    assert isinstance(outcome.error, CommandError)
+    assert outcome.failed_step == 1 and len(outcome.replies) == 1
+    assert len(result.succeeded) == 2 and len(done) == 3
+
+
+def test_unexpected_error_is_recorded_per_device():
+    fake = FakeLocator()
+    send_pack = fake.send_pack
+
+    def flaky_send(cmd, data, dev):
+        if dev.s_num == "0002":
+            raise OSError("network unreachable")
+        return send_pack(cmd, data, dev)
+
+    def payload(dev, replies):
+        if dev.s_num == "0001":
+            raise KeyError("missing setting")
+        return replies[0].pack[:4]
+
+    bulk = BulkScheduler(AsyncCommandClient(flaky_send, fake.pending, timeout=0.5))
+    plan = [PlanStep(LocatorCmd.READ_SETTINGS), PlanStep(LocatorCmd.SET_PRIMARY, payload)]
+    devs = [make_device(serial=f"{i:04x}") for i in range(4)]
+
+    result = asyncio.run(bulk.run(devs, plan))
+
+    by_serial = result.by_serial()
+    assert isinstance(by_serial["0001"].error, KeyError)
+    assert by_serial["0001"].failed_step == 1
+    assert isinstance(by_serial["0002"].error, OSError)
+    assert by_serial["0002"].failed_step == 0
+    assert len(result.succeeded) == 2
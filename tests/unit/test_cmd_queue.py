@@ -0,0 +1,292 @@
+import threading
+import time
+
+from dsu.domain.events import DevLstEvent, EventBus
+from dsu.net.cmd_queue import CmdQueue, QueueResult
+from dsu.net.locator import LocatorCmd
+from tests.fixtures.helpers import make_device
+
+OK = b"\x01"
+
+
+def _queue(send_pack, timeout=1.0, results=None):
+    dev = make_device(serial="0a0b")
+    results = [] if results is None else results
+    return CmdQueue(dev, EventBus(), send_pack, cbs=results.append,
+                    timeout=timeout), dev, results
+
+
+def test_response_sent_back_immediately_is_not_lost():
+    # The reply may land before the queue starts waiting for it.
+    holder = {}
+
+    def send_pack(cmd, _data):
+        holder["q"].response_processing(DevLstEvent.CMD_RESPONSE, holder["dev"],
+                                        cmd=cmd, pack=OK)
+
+    q, dev, results = _queue(send_pack)
+    holder.update(q=q, dev=dev)
+    q.append(LocatorCmd.SET_PRIMARY)
+    q.append(LocatorCmd.SET_PRIMARY)
+    q.run()
+    q.queue_thr.join(timeout=2)
+
+    assert results == [QueueResult.OK]
+
+
+def test_waiting_queue_does_not_burn_cpu():
+    q, _dev, results = _queue(lambda cmd, data: None, timeout=5.0)
+    q.append(LocatorCmd.GET_MAP)
+    cpu = time.process_time()
+    q.run()
+    time.sleep(0.3)
+    q.stop()
+
+    assert time.process_time() - cpu < 0.1
+    assert not q.queue_thr.is_alive()
+    assert results == []
+
+
+def test_timeout_retries_then_reports():
+    sent = []
+    done = threading.Event()
+    q, _dev, results = _queue(lambda cmd, data: sent.append(cmd), timeout=0.02)
+    q.cbs = lambda r: (results.append(r), done.set())
+    q.append(LocatorCmd.GET_USER)
+    q.run()
+
+    assert done.wait(2)
+    q.queue_thr.join(timeout=2)
+    assert results == [QueueResult.TIMEOUT]
+    assert sent == [LocatorCmd.GET_USER] * CmdQueue.MAX_ATTEMPT_NUM
+
+
+def test_progress_counts_bytes_and_survives_reads():
+    holder = {}
+
+    def send_pack(cmd, _data):
+        holder["q"].response_processing(DevLstEvent.CMD_RESPONSE, holder["dev"],
+                                        cmd=cmd, pack=OK)
+
+    q, dev, results = _queue(send_pack)
+    holder.update(q=q, dev=dev)
+    seen = []
+    q.subscribe_progress(lambda p: seen.append(p.done_bytes))
+    q.append(LocatorCmd.SET_PRIMARY, b"\x00" * 30)
+    q.append(LocatorCmd.SET_PRIMARY, b"\x00" * 70)
+    q.run()
+    q.queue_thr.join(timeout=2)
+
+    assert results == [QueueResult.OK]
+    assert seen == [30, 100]
+    assert q.progress() == 100
+    assert q.progress() == 100      # reading no longer resets it
+    info = q.progress_info()
+    assert (info.done_bytes, info.total_bytes) == (100, 100)
+    assert (info.done_cmds, info.total_cmds) == (2, 2)
+
+    q.append(LocatorCmd.SET_PRIMARY, b"\x00" * 10)  # a new run starts over
+    assert q.progress() == 0
+
+
+def test_adaptive_timeout_retries_fast_and_samples_first_sends_only():
+    from dsu.net.rtt import RttTable
+
+    rtt = RttTable()
+    for _ in range(3):
+        rtt.sample("0a0b", 0.005)
+    sent = []
+    holder = {}
+
+    def send_pack(cmd, _data):
+        sent.append(time.monotonic())
+        if len(sent) == 2:   # first send lost, the retry is answered
+            holder["q"].response_processing(DevLstEvent.CMD_RESPONSE, holder["dev"],
+                                            cmd=cmd, pack=OK)
+
+    dev = make_device(serial="0a0b")
+    results = []
+    q = CmdQueue(dev, EventBus(), send_pack, cbs=results.append, timeout=2, rtt=rtt)
+    holder.update(q=q, dev=dev)
+    q.append(LocatorCmd.SET_PRIMARY)
+    q.run()
+    q.queue_thr.join(timeout=2)
+
+    assert results == [QueueResult.OK]
+    assert sent[1] - sent[0] < 0.5           # not the fixed 2 s
+    assert rtt.stats("0a0b").samples == 3    # the retried answer is ambiguous
+
+
+def test_pipelined_commands_complete_out_of_order():
+    # Replies come back in reverse order; each reaches its own callback.
+    delays = {LocatorCmd.READ_SETTINGS: 0.15, LocatorCmd.GET_USER: 0.1,
+              LocatorCmd.GET_MAP: 0.05}
+    replies = {LocatorCmd.READ_SETTINGS: b"\x10" * 98,
+               LocatorCmd.GET_USER: b"\x01\x02", LocatorCmd.GET_MAP: b"\x07"}
+    holder = {}
+    sent, got = [], []
+
+    def send_pack(cmd, _data):
+        sent.append(cmd)
+        threading.Timer(delays[cmd], holder["q"].response_processing,
+                        (DevLstEvent.CMD_RESPONSE, holder["dev"]),
+                        {"cmd": cmd, "pack": replies[cmd]}).start()
+
+    dev = make_device(serial="0a0b")
+    results = []
+    q = CmdQueue(dev, EventBus(), send_pack, cbs=results.append, timeout=1.0,
+                 depth=3)
+    holder.update(q=q, dev=dev)
+    for cmd in delays:
+        q.append(cmd, cbs=lambda r, cmd=cmd, **kw: got.append((cmd, r, kw["pack"])))
+    start = time.monotonic()
+    q.run()
+    q.queue_thr.join(timeout=2)
+
+    assert results == [QueueResult.OK]
+    assert time.monotonic() - start < 0.25           # one round trip, not three
+    assert sent == list(delays)
+    assert got == [(cmd, QueueResult.OK, replies[cmd]) for cmd in reversed(delays)]
+    assert q.progress_info().done_cmds == 3
+
+
+def test_pipeline_depth_and_same_code_are_respected():
+    holder = {"outstanding": 0, "peak": 0}
+    sent = []
+
+    def answer(cmd):
+        holder["outstanding"] -= 1
+        holder["q"].response_processing(DevLstEvent.CMD_RESPONSE, holder["dev"],
+                                        cmd=cmd, pack=b"\x05")
+
+    def send_pack(cmd, _data):
+        sent.append(cmd)
+        holder["outstanding"] += 1
+        holder["peak"] = max(holder["peak"], holder["outstanding"])
+        threading.Timer(0.03, answer, (cmd,)).start()
+
+    dev = make_device(serial="0a0b")
+    results = []
+    q = CmdQueue(dev, EventBus(), send_pack, cbs=results.append, timeout=1.0,
+                 depth=2)
+    holder.update(q=q, dev=dev)
+    for cmd in (LocatorCmd.GET_LOG, LocatorCmd.GET_LOG, LocatorCmd.GET_MAP,
+                LocatorCmd.GET_USER):
+        q.append(cmd)
+    q.run()
+    q.queue_thr.join(timeout=2)
+
+    assert results == [QueueResult.OK]
+    assert len(sent) == 4
+    assert holder["peak"] == 2
+
+
+def test_failed_command_stops_the_pipeline():
+    holder = {}
+    sent = []
+
+    def send_pack(cmd, _data):
+        sent.append(cmd)
+        if cmd == LocatorCmd.SET_PRIMARY:
+            holder["q"].response_processing(DevLstEvent.CMD_RESPONSE, holder["dev"],
+                                            cmd=cmd, pack=bytes([0x02, 0xff]))
+
+    dev = make_device(serial="0a0b")
+    results = []
+    q = CmdQueue(dev, EventBus(), send_pack, cbs=results.append, timeout=1.0,
+                 depth=4)
+    holder.update(q=q, dev=dev)
+    q.append(LocatorCmd.GET_MAP)             # never answered, abandoned
+    q.append(LocatorCmd.SET_PRIMARY)
+    q.append(LocatorCmd.GET_USER)            # never sent
+    q.run()
+    q.queue_thr.join(timeout=2)
+
+    assert results == [QueueResult.FAIL]
+    assert sent == [LocatorCmd.GET_MAP, LocatorCmd.SET_PRIMARY]
+    assert q._inflight == {}
+
+
+def test_queue_records_latency_retries_and_stale_replies():
+    from dsu.net.metrics import CommandMetrics
+
+    metrics = CommandMetrics()
+    holder = {}
+    sent = []
+
+    def send_pack(cmd, _data):
+        sent.append(cmd)
+        q, dev = holder["q"], holder["dev"]
+        if cmd == LocatorCmd.GET_MAP:
+            q.response_processing(DevLstEvent.CMD_RESPONSE, dev, cmd=cmd, pack=b"\x07")
+            q.response_processing(DevLstEvent.CMD_RESPONSE, dev, cmd=cmd, pack=b"\x07")
+        elif sent.count(cmd) == 2:      # GET_USER: first send lost
+            q.response_processing(DevLstEvent.CMD_RESPONSE, dev, cmd=cmd, pack=b"\x01")
+
+    dev = make_device(serial="0a0b")
+    results = []
+    q = CmdQueue(dev, EventBus(), send_pack, cbs=results.append, timeout=0.05,
+                 metrics=metrics)
+    holder.update(q=q, dev=dev)
+    q.append(LocatorCmd.GET_MAP)
+    q.append(LocatorCmd.GET_USER)
+    q.run()
+    q.queue_thr.join(timeout=2)
+
+    assert results == [QueueResult.OK]
+    get_map, get_user = metrics.cmd(LocatorCmd.GET_MAP), metrics.cmd(LocatorCmd.GET_USER)
+    assert (get_map.commands, get_map.sends, get_map.stale) == (1, 1, 1)
+    assert sum(get_map.rtt_buckets) == 1
+    assert (get_user.commands, get_user.sends, get_user.retries) == (1, 2, 1)
+    assert sum(get_user.rtt_buckets) == 0       # only a retry was answered
+    assert get_user.wait_mean is not None
+    assert metrics.device(dev).commands == 2
+
+
+def test_slow_retransmit_does_not_block_the_scheduler():
+    from dsu.net.scheduler import Scheduler
+
+    sched = Scheduler()
+    sent, threads = [], []
+
+    def send_pack(cmd, _data):
+        threads.append(threading.current_thread().name)
+        if sent:
+            time.sleep(0.3)               # a paced retransmit
+        sent.append(cmd)
+
+    q = CmdQueue(make_device(serial="0a0b"), EventBus(), send_pack, timeout=0.02,
+                 scheduler=sched)
+    q.append(LocatorCmd.GET_USER)
+    q.run()
+    time.sleep(0.05)                      # first timeout fired, retransmit sleeping
+    started = time.monotonic()
+    fired = threading.Event()
+    sched.schedule(0.0, fired.set)
+
+    assert fired.wait(2)
+    assert time.monotonic() - started < 0.1
+    q.stop()
+    sched.shutdown()
+    assert "dsu timers" not in threads
+
+
+def test_pacer_delay_is_not_counted_as_rtt():
+    from dsu.net.rtt import RttTable
+
+    holder = {}
+
+    def send_pack(cmd, _data):
+        time.sleep(0.2)                   # held back by the pacer
+        threading.Timer(0.01, holder["q"].response_processing,
+                        (DevLstEvent.CMD_RESPONSE, holder["dev"]),
+                        {"cmd": cmd, "pack": OK}).start()
+
+    dev = make_device(serial="0a0b")
+    q = CmdQueue(dev, EventBus(), send_pack, rtt=RttTable())
+    holder.update(q=q, dev=dev)
+    q.append(LocatorCmd.SET_PRIMARY)
+    q.run()
+    q.queue_thr.join(timeout=2)
+
+    assert q._rtt.stats("0a0b").srtt < 0.1
@@ -0,0 +1,110 @@
+import socket
+import threading
+
+import pytest
+
+from dsu.domain.models import Device
+from dsu.net.eludp import ElUDP
+
+
+@pytest.fixture
+def el_udp(monkeypatch):
+    # Keep the dispatch table under test, without real sockets/threads.
+    udp = ElUDP()
+    monkeypatch.setattr(udp, "_open_port",
+                        lambda port: udp.sockets.__setitem__(port, (object(), None)))
+    monkeypatch.setattr(udp, "_close_port", lambda port: udp.sockets.pop(port))
+    return udp
+
+
+def test_dispatch_calls_only_subscribers_of_sender(el_udp):
+    a = Device.from_address("10.0.0.1", 1775)
+    b = Device.from_address("10.0.0.2", 1775)
+    got = []
+    el_udp.bind(a, lambda d: got.append(("a1", d)))
+    el_udp.bind(a, lambda d: got.append(("a2", d)))
+    el_udp.bind(b, lambda d: got.append(("b", d)))
+
+    el_udp._dispatch(b"x", ("10.0.0.1", 1775))
+    el_udp._dispatch(b"y", ("10.0.0.9", 1775))
+
+    assert got == [("a1", b"x"), ("a2", b"x")]
+
+
+def test_unbind_publishes_new_snapshot(el_udp):
+    dev = Device.from_address("10.0.0.1", 1775)
+    cb1, cb2 = (lambda d: None), (lambda d: None)
+    el_udp.bind(dev, cb1)
+    el_udp.bind(dev, cb2)
+    before = el_udp._routes
+
+    el_udp.unbind(dev, cb1)
+
+    assert before[dev.addr] == (cb1, cb2)          # old snapshot untouched
+    assert el_udp._routes[dev.addr] == (cb2,)
+    el_udp.unbind(dev)
+    assert dev.addr not in el_udp._routes
+    assert el_udp.sockets == {}
+
+
+def test_dispatch_while_binding_from_another_thread(el_udp):
+    devs = [Device.from_address(f"10.0.{i // 250}.{i % 250 + 1}", 1775)
+            for i in range(500)]
+    cb = lambda d: None
+    stop = threading.Event()
+    errors = []
+
+    def churn():
+        try:
+            while not stop.is_set():
+                for dev in devs:
+                    el_udp.bind(dev, cb)
+                for dev in devs:
+                    el_udp.unbind(dev, cb)
+        except (KeyError, RuntimeError) as exc:  # pragma: no cover - failure path
+            errors.append(exc)
+
+    thr = threading.Thread(target=churn)
+    thr.start()
+    try:
+        # A torn route table shows up here as KeyError / RuntimeError.
+        for _ in range(20000):
+            el_udp._dispatch(b"", ("10.0.0.7", 1775))
+    finally:
+        stop.set()
+        thr.join()
+    assert errors == []
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("", 0))
+        return s.getsockname()[1]
+
+
+def test_rebind_right_after_unbind_reopens_port():
+    udp = ElUDP()
+    dev = Device.from_address("127.0.0.1", _free_port())
+    cb = lambda d: None
+    try:
+        for _ in range(3):
+            udp.bind(dev, cb)
+            listener = udp.sockets[dev.port][1]
+            udp.unbind(dev, cb)
+            assert not listener.is_alive()
+        udp.bind(dev, cb)
+        assert dev.addr in udp.devices
+    finally:
+        udp.close()
+    assert udp.sockets == {} and udp.devices == {}
+
+
+def test_failed_port_open_leaves_no_device_entry():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as busy:
+        busy.bind(("", 0))
+        dev = Device.from_address("10.0.0.1", busy.getsockname()[1])
+        udp = ElUDP()
+        with pytest.raises(OSError):
+            udp.bind(dev, lambda d: None)
+    assert udp.devices == {} and udp.sockets == {}
+    assert dev.addr not in udp._routes
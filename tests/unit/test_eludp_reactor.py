@@ -0,0 +1,112 @@
+import socket
+import threading
+import time
+
+from dsu.domain.models import Device
+from dsu.net.eludp_reactor import ReactorElUDP
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("", 0))
+        return s.getsockname()[1]
+
+
+def _registered(reactor: ReactorElUDP) -> int:
+    # The wakeup socket is always registered.
+    return len(reactor._selector.get_map()) - 1
+
+
+def _wait_for(predicate, timeout=1.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_bind_and_unbind_update_registrations_live():
+    reactor = ReactorElUDP()
+    thr = threading.Thread(target=reactor.run, daemon=True)
+    thr.start()
+    try:
+        port = _free_port()
+        a = Device.from_address("10.0.0.1", port)
+        b = Device.from_address("10.0.0.2", port)
+        cb = lambda data: None
+
+        reactor.bind(a, cb)
+        reactor.bind(b, cb)
+        assert _wait_for(lambda: _registered(reactor) == 1)
+
+        reactor.unbind(a)
+        assert list(reactor.sockets) == [port]
+        reactor.unbind(b)
+        assert reactor.sockets == {}
+        assert _wait_for(lambda: _registered(reactor) == 0)
+    finally:
+        reactor.shutdown()
+        thr.join(timeout=1)
+    assert not thr.is_alive()
+
+
+def test_single_thread_serves_all_ports():
+    reactor = ReactorElUDP()
+    before = threading.active_count()
+    for i in range(5):
+        reactor.bind(Device.from_address(f"10.0.0.{i}", _free_port()),
+                     lambda data: None)
+    assert threading.active_count() == before
+    assert len(reactor.sockets) == 5
+    reactor.shutdown()
+    reactor.run()  # applies pending registrations, then tears down
+    assert reactor.sockets == {}
+
+
+def test_dispatch_routes_to_subscribers():
+    reactor = ReactorElUDP()
+    got = []
+    dev = Device.from_address("10.0.0.9", _free_port())
+    reactor.bind(dev, got.append)
+    reactor._dispatch(b"\x02", dev.addr)
+    reactor._dispatch(b"\x03", ("10.0.0.10", dev.port))
+    reactor.shutdown()
+    reactor.run()
+    assert got == [b"\x02"]
+
+
+def test_rebind_before_deferred_close_reuses_socket():
+    reactor = ReactorElUDP()
+    thr = threading.Thread(target=reactor.run, daemon=True)
+    thr.start()
+    try:
+        dev = Device.from_address("10.0.0.1", _free_port())
+        cb = lambda data: None
+        for _ in range(5):
+            reactor.bind(dev, cb)
+            reactor.unbind(dev, cb)
+        reactor.bind(dev, cb)
+        assert dev.addr in reactor.devices
+        assert _wait_for(lambda: _registered(reactor) == 1)
+        sock = reactor.sockets[dev.port][0]
+        assert sock.fileno() >= 0
+    finally:
+        reactor.shutdown()
+        thr.join(timeout=1)
+
+
+def test_close_unregisters_and_closes_sockets():
+    reactor = ReactorElUDP()
+    dev = Device.from_address("10.0.0.1", _free_port())
+    reactor.bind(dev, lambda data: None)
+    reactor._apply_pending()
+    sock = reactor.sockets[dev.port][0]
+    assert _registered(reactor) == 1
+
+    reactor.close()
+
+    assert _registered(reactor) == 0
+    assert sock.fileno() == -1
+    reactor.shutdown()
+    reactor.run()
@@ -4,7 +4,7 @@ from dsu.domain.events import DevLstEvent, EventBus
 def test_event_enum_members():
     assert {e.name for e in DevLstEvent} == {
         "APPEND_DEV", "REMOVE_DEV", "UPDATE_DEV",
-        "POLL_RESPONSE", "CMD_RESPONSE", "CON_FAIL",
+        "POLL_RESPONSE", "CMD_RESPONSE", "CON_FAIL", "CON_DEGRADED", "BATCH",
     }
 
 
@@ -65,3 +65,13 @@ def test_raising_listener_does_not_block_others():
     s.subscribe(lambda: calls.append("ok"))
     s.start("dev", total=1)
     assert calls == ["ok"]  # second listener still ran
+
+
+def test_update_carries_eta_until_finish():
+    s = FlashState()
+    s.start("dev1", total=1000)
+    assert s.eta("dev1") is None
+    s.update("dev1", current=500, eta=4.0)
+    assert s.eta("dev1") == 4.0
+    s.finish("dev1")
+    assert s.eta("dev1") is None
@@ -0,0 +1,47 @@
+import pytest
+
+from dsu.net.frames import FrameBuilder
+from dsu.net.locator import Locator, LocatorCmd
+
+SERIAL = "0102030405060708090a0b0c0d0e0f10"
+
+
+def _reference(cmd: int, data: bytes, s_num: str | None) -> bytes:
+    """The frame as the original per-byte send_pack assembled it."""
+    s_n = bytes.fromhex(s_num) if s_num else bytes([0xFF] * 16)
+    pack = bytearray(b"12345678") + s_n[::-1]
+    pack += bytes([1, cmd, len(data)]) + data
+    pack.append(Locator.check_sum(pack))
+    return bytes(pack)
+
+
+def test_broadcast_request_is_precompiled():
+    fb = FrameBuilder()
+    assert fb.request_frame == _reference(0x01, b"", None)
+    assert fb.build(LocatorCmd.REQUEST).obj is fb.request_frame
+
+
+@pytest.mark.parametrize("cmd,data", [
+    (LocatorCmd.SET_PRIMARY, bytes(range(98))),
+    (LocatorCmd.READ_SETTINGS, b""),
+    (LocatorCmd.GET_LOG, b"\xff" * 255),
+])
+def test_addressed_frames_match_reference(cmd, data):
+    fb = FrameBuilder()
+    assert bytes(fb.build(cmd, data, SERIAL)) == _reference(cmd.value, data, SERIAL)
+    # second build hits the prefix cache and must be identical
+    assert bytes(fb.build(cmd, data, SERIAL)) == _reference(cmd.value, data, SERIAL)
+
+
+def test_frames_verify():
+    fb = FrameBuilder()
+    frame = fb.build(LocatorCmd.SET_USER, b"\x10\x20", SERIAL)
+    assert Locator.verify_sum(frame)
+    s_num, cmd, length = Locator.parse_header(frame)
+    assert s_num.hex() == SERIAL
+    assert (cmd, length) == (LocatorCmd.SET_USER, 2)
+
+
+def test_oversized_data_rejected():
+    with pytest.raises(ValueError):
+        FrameBuilder().build(LocatorCmd.SET_USER, bytes(256), SERIAL)
@@ -0,0 +1,89 @@
+import pytest
+
+from dsu.config.settings import FirmwareConfig
+from dsu.net.fw_transfer import FirmwareTransfer, TransferError, packet_key, parse_ack
+from tests.fixtures.helpers import make_device
+
+
+def _packets(blocks: int) -> list[bytes]:
+    info = b"\x03" + bytes(20)
+    return [info] + [b"\x04" + (i * 8).to_bytes(2, "little") + bytes(32)
+                     for i in range(blocks)]
+
+
+class FakeElUdp:
+    """Acks every packet synchronously unless told to drop it."""
+
+    def __init__(self, drop_once=(), dead=False):
+        self.cb = None
+        self.sent = []
+        self._drop_once = set(drop_once)
+        self._dead = dead
+
+    def bind(self, dev, cb):
+        self.cb = cb
+
+    def unbind(self, dev, cb=None):
+        self.cb = None
+
+    def send_pack(self, dev, pack, device_pacing=True):
+        self.sent.append(packet_key(pack))
+        key = packet_key(pack)
+        if self._dead or key in self._drop_once:
+            self._drop_once.discard(key)
+            return True   # lost on the wire, not refused by the sender
+        self.cb(pack[:3] if pack[0] == 0x04 else pack[:1])
+        return True
+
+
+def test_parse_ack_matches_packet_key():
+    for pack in _packets(3):
+        ack = pack[:3] if pack[0] == 0x04 else pack[:1]
+        assert parse_ack(ack) == packet_key(pack)
+    assert parse_ack(b"") is None
+    assert parse_ack(b"\x04\x01") is None
+
+
+def test_lossless_transfer_sends_each_block_once():
+    udp = FakeElUdp()
+    progress = []
+    t = FirmwareTransfer(udp, make_device(), _packets(40),
+                         FirmwareConfig(window=4, max_window=16),
+                         on_progress=lambda done, total: progress.append(done))
+
+    stats = t.run()
+
+    assert stats.total_bytes == 40 * 32 == t.total_bytes
+    assert stats.sent == 41 and stats.retransmits == 0
+    assert udp.sent[0] == (0x03, 0)
+    assert progress[-1] == 40 * 32
+    snap = t.tracker.snapshot()
+    assert (snap.done_bytes, snap.total_bytes) == (40 * 32, 40 * 32)
+    assert (snap.done_cmds, snap.total_cmds) == (41, 41)
+    assert 4 < stats.window <= 16
+    assert udp.cb is None
+
+
+def test_only_missing_blocks_are_retransmitted_and_window_shrinks():
+    udp = FakeElUdp(drop_once={(0x04, 8), (0x04, 16)})
+    t = FirmwareTransfer(udp, make_device(), _packets(10),
+                         FirmwareConfig(window=8, ack_timeout=0.02))
+
+    stats = t.run()
+
+    assert stats.retransmits == 2
+    assert sorted(k for k in udp.sent if udp.sent.count(k) > 1) == \
+        [(0x04, 8), (0x04, 8), (0x04, 16), (0x04, 16)]
+    assert stats.total_bytes == 10 * 32
+    assert stats.window < 8 + 10 / 8  # halved at least once on the way
+
+
+def test_silent_device_fails_after_max_retries():
+    udp = FakeElUdp(dead=True)
+    t = FirmwareTransfer(udp, make_device(), _packets(4),
+                         FirmwareConfig(ack_timeout=0.01, max_retries=2))
+
+    with pytest.raises(TransferError):
+        t.run()
+    assert udp.sent == [(0x03, 0)] * 3
+    assert udp.cb is None
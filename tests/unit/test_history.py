@@ -0,0 +1,77 @@
+import math
+
+import pytest
+
+from dsu.config.settings import HistoryConfig
+from dsu.net.history import LinkHistory, Ring, quantile
+
+
+class Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_ring_keeps_last_items_in_constant_space():
+    ring = Ring("f", 4)
+    size = ring.times.buffer_info()[1], ring.values.buffer_info()[1]
+    for i in range(10):
+        ring.append(float(i), i / 10)
+
+    assert len(ring) == 4
+    assert [t for t, _ in ring.items()] == [6.0, 7.0, 8.0, 9.0]
+    assert [t for t, _ in ring.items(since=8.0)] == [8.0, 9.0]
+    assert ring.last() == pytest.approx(0.9)
+    assert (ring.times.buffer_info()[1], ring.values.buffer_info()[1]) == size
+
+
+def test_rtt_percentiles_and_loss_over_last_polls():
+    history = LinkHistory(HistoryConfig(polls=100), clock=Clock())
+    for i in range(150):                  # the first 50 fall out of the ring
+        history.record_rtt("a", 1.0 if i < 50 else (i - 49) / 1000)
+    for _ in range(25):
+        history.record_missed("a")
+
+    stats = history.stats("a")
+    assert (stats.polls, stats.missed, stats.loss) == (100, 25, 0.25)
+    assert stats.rtt_p50 == pytest.approx(0.063)
+    assert stats.rtt_p99 == pytest.approx(0.100)
+    assert history.rtt_quantile("a", 0.95) == stats.rtt_p95
+    assert history.stats("unknown") is None
+    assert quantile([], 0.5) is None
+    assert math.isnan(history._devices["a"].polls.last())
+
+
+def test_flapping_counts_transitions_in_window():
+    clock = Clock()
+    history = LinkHistory(HistoryConfig(flap_window=60.0, flap_threshold=4), clock=clock)
+    for online in (True, False, True, False, True):
+        history.record_state("flappy", online)
+        clock.t += 10
+    history.record_state("stable", True)
+    history.record_state("stable", True)  # repeats are not transitions
+
+    assert history.flapping() == ["flappy"]
+    assert history.stats("flappy").flapping and history.stats("flappy").online
+    assert len(history.transitions("stable")) == 1
+
+    clock.t += 30                         # the first two fall out of the window
+    assert history.flapping() == []
+    assert history.flapping(window=120) == ["flappy"]
+
+
+def test_worst_ranks_links():
+    history = LinkHistory(clock=Clock())
+    for key, rtt, missed in (("a", 0.01, 0), ("b", 0.2, 1), ("c", 0.05, 3)):
+        for _ in range(10):
+            history.record_rtt(key, rtt)
+        for _ in range(missed):
+            history.record_missed(key)
+    history.record_missed("d")            # never answered
+
+    assert [s.key for s in history.worst(2, by="loss")] == ["d", "c"]
+    assert [s.key for s in history.worst(by="rtt_p95")] == ["b", "c", "a"]
+    with pytest.raises(ValueError):
+        history.worst(by="jitter")
@@ -0,0 +1,227 @@
+import threading
+
+from dsu.config.settings import LivenessConfig
+from dsu.domain.events import DevLstEvent
+from dsu.net.controller import DeviceController
+from dsu.net.liveness import Health, LivenessTracker
+from dsu.net.pending import PendingTable
+from tests.fixtures.helpers import make_device, populated_registry
+
+
+class Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+class ManualScheduler:
+    """Keeps timers until the test runs them."""
+
+    def __init__(self):
+        self.timers = []
+
+    def schedule(self, delay, fn, *args):
+        handle = _Handle(fn, args)
+        self.timers.append(handle)
+        return handle
+
+    def run_due(self):
+        timers, self.timers = self.timers, []
+        for handle in timers:
+            if not handle.cancelled:
+                handle.fn(*handle.args)
+
+
+class _Handle:
+    def __init__(self, fn, args):
+        self.fn, self.args, self.cancelled = fn, args, False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def _tracker(**config):
+    clock, sched, expired, degraded = Clock(), ManualScheduler(), [], []
+    tracker = LivenessTracker(expired.append, LivenessConfig(**config), sched, clock,
+                              on_degraded=lambda dev, phi: degraded.append((dev, phi)))
+    return tracker, clock, sched, expired, degraded
+
+
+def _advance(clock, sched, seconds, step=0.5):
+    for _ in range(round(seconds / step)):
+        clock.t += step
+        sched.run_due()
+
+
+def _heartbeats(tracker, clock, sched, dev, intervals):
+    tracker.touch(dev)
+    for interval in intervals:
+        _advance(clock, sched, interval)
+        tracker.touch(dev)
+
+
+def test_phi_grows_with_silence_until_expiry():
+    tracker, clock, sched, expired, _ = _tracker()
+    dev = make_device(serial="000a")
+    _heartbeats(tracker, clock, sched, dev, [1.0] * 10)
+
+    phis = []
+    for _ in range(6):
+        phis.append(tracker.phi(dev))
+        _advance(clock, sched, 1.0)
+
+    assert phis == sorted(phis) and phis[0] < 1 < phis[-1]
+    assert tracker.health(dev) is Health.DEGRADED
+    assert expired == []
+    _advance(clock, sched, 2.0)
+    assert expired == [dev]
+    assert tracker.health(dev) is Health.OFFLINE and dev not in tracker
+    _advance(clock, sched, 60.0)
+    assert expired == [dev]
+
+
+def test_steady_device_expires_sooner_than_jittery_one():
+    tracker, clock, sched, expired, _ = _tracker()
+    steady, jittery = make_device(serial="000a"), make_device(serial="000b")
+    tracker.touch(steady)
+    tracker.touch(jittery)
+    for i in range(20):
+        _advance(clock, sched, 0.5)
+        if i % 2:
+            tracker.touch(steady)         # every 1 s
+        if i % 5 == 4:
+            tracker.touch(jittery)        # every 2.5 s ...
+        if i % 5 == 0 and i:
+            tracker.touch(jittery)        # ... then 0.5 s later
+
+    assert tracker.timeout(steady) < tracker.timeout(jittery)
+    gone = {}
+    for _ in range(40):
+        _advance(clock, sched, 0.5)
+        for dev in expired:
+            gone.setdefault(dev.s_num, clock.t)
+    assert gone["000a"] < gone["000b"]
+
+
+def test_degraded_is_reported_once_before_offline_and_cleared_by_a_reply():
+    tracker, clock, sched, expired, degraded = _tracker()
+    dev = make_device(serial="000a")
+    _heartbeats(tracker, clock, sched, dev, [1.0] * 10)
+
+    _advance(clock, sched, 6.0)
+    assert [d for d, _ in degraded] == [dev]
+    assert degraded[0][1] >= 3.0
+    assert expired == []
+
+    tracker.touch(dev)                    # back to normal
+    assert tracker.health(dev) is Health.ONLINE
+    # The long gap widened the model; silent again, it degrades once more first
+    while not expired:
+        _advance(clock, sched, 0.5)
+    assert [d for d, _ in degraded] == [dev, dev]
+
+
+def test_command_replies_keep_device_alive_without_skewing_intervals():
+    tracker, clock, sched, expired, _ = _tracker()
+    dev = make_device(serial="000a")
+    _heartbeats(tracker, clock, sched, dev, [1.0] * 10)
+    timeout = tracker.timeout(dev)
+
+    for _ in range(20):
+        _advance(clock, sched, 0.5)
+        tracker.touch(dev, heartbeat=False)
+
+    assert tracker.timeout(dev) == timeout
+    assert expired == [] and tracker.health(dev) is Health.ONLINE
+
+
+def test_touch_is_a_store_and_postpones_expiry():
+    tracker, clock, sched, expired, _ = _tracker()
+    devs = [make_device(serial=f"{i:04x}") for i in range(1000)]
+    for dev in devs:
+        tracker.touch(dev)
+    pending = len(sched.timers)
+
+    for _ in range(20):
+        _advance(clock, sched, 1.0)
+        for dev in devs[1:]:
+            tracker.touch(dev)
+
+    assert expired == [devs[0]]
+    assert len(tracker) == 999
+    assert pending == 1 and len(sched.timers) == 1     # one sweeper timer
+
+
+def test_forgotten_device_never_expires_and_idle_wheel_stops():
+    tracker, clock, sched, expired, _ = _tracker()
+    dev = make_device(serial="000a")
+    tracker.touch(dev)
+    tracker.forget(dev)
+
+    _advance(clock, sched, 15)
+
+    assert expired == []
+    assert sched.timers == []
+    tracker.touch(dev)                    # tracked again: sweeper restarts
+    assert len(sched.timers) == 1
+
+
+def test_silence_is_capped_by_max_silence():
+    tracker, clock, sched, expired, _ = _tracker(max_silence=5.0)
+    dev = make_device(serial="000a")
+    _heartbeats(tracker, clock, sched, dev, [0.5, 4.0, 0.5, 4.0])
+
+    assert tracker.timeout(dev) == 5.0
+    _advance(clock, sched, 5.0)
+    assert expired == [dev]
+
+
+class _Locator:
+    def __init__(self):
+        self.pending = PendingTable()
+        self.rtt = None
+        self.liveness = None
+
+
+def test_controller_reports_degraded_and_expires_devices():
+    reg, bus = populated_registry("000a", "000b")
+    a, b = reg.find_by_serial("000a"), reg.find_by_serial("000b")
+    clock, sched = Clock(), ManualScheduler()
+    locator = _Locator()
+    ctl = DeviceController(reg, bus, locator, None, sched)
+    ctl.liveness = LivenessTracker(ctl._on_timeout, LivenessConfig(), sched, clock,
+                                   on_degraded=ctl._on_degraded)
+    locator.liveness = ctl.liveness
+    seen = []
+    bus.bind(lambda e, dev, **kw: seen.append((e, dev.s_num, kw.get("phi"))),
+             [DevLstEvent.CON_DEGRADED, DevLstEvent.CON_FAIL])
+    for dev in (a, b):
+        ctl.liveness.touch(dev)
+
+    for _ in range(6):
+        _advance(clock, sched, 2.0)
+        locator.liveness.touch(b, heartbeat=False)   # what Locator._on_response does
+
+    assert [(e, s) for e, s, _ in seen] == [(DevLstEvent.CON_DEGRADED, "000a"),
+                                            (DevLstEvent.CON_FAIL, "000a")]
+    assert seen[0][2] >= 3.0
+    assert reg.find_by_serial("000a") is None
+    assert a not in ctl.liveness and b in ctl.liveness
+    assert [online for _, online in ctl.history.transitions("000a")] == [False]
+    assert not bus.has_subscribers(DevLstEvent.CMD_RESPONSE)
+
+
+def test_real_scheduler_fires_expiry():
+    from dsu.net.scheduler import Scheduler
+
+    sched = Scheduler()
+    done = threading.Event()
+    config = LivenessConfig(first_interval=0.02, min_std=0.005, acceptable_pause=0.0,
+                            max_silence=1.0, resolution=0.01)
+    tracker = LivenessTracker(lambda dev: done.set(), config, sched)
+    tracker.touch(make_device(serial="000a"))
+
+    assert done.wait(2)
+    sched.shutdown()
@@ -0,0 +1,312 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from dsu.config.settings import RateLimitConfig
+from dsu.domain.events import DevLstEvent, EventBus
+from dsu.domain.registry import DeviceRegistry
+from dsu.net.history import LinkHistory
+from dsu.net.locator import Locator, LocatorCmd
+from dsu.net.ratelimit import Pacer
+from dsu.net.scheduler import Scheduler
+from tests.fixtures.helpers import make_device, make_locator_frame
+
+SERIAL = bytes(range(1, 17))
+PEER = ("203.0.113.7", 1770)
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+@pytest.fixture
+def locator(bus):
+    loc = Locator(DeviceRegistry(bus), bus)
+    yield loc
+    loc.sock.close()
+
+
+def test_parse_header_in_place():
+    frame = bytearray(make_locator_frame(SERIAL, cmd=LocatorCmd.GET_MAP.value,
+                                         payload=b"\x01\x02"))
+    s_num, cmd, length = Locator.parse_header(memoryview(frame))
+    assert s_num.hex() == SERIAL.hex()
+    assert cmd is LocatorCmd.GET_MAP
+    assert length == 2
+
+
+def test_parse_header_rejects_bad_password_and_unknown_cmd():
+    frame = bytearray(make_locator_frame(SERIAL))
+    frame[0] = ord("0")
+    assert Locator.parse_header(frame) is None
+    assert Locator.parse_header(make_locator_frame(SERIAL, cmd=0x7F)) is None
+    assert Locator.parse_header(b"1234") is None
+
+
+def test_verify_sum():
+    frame = bytearray(make_locator_frame(SERIAL))
+    assert Locator.verify_sum(frame)
+    frame[30] ^= 0xFF
+    assert not Locator.verify_sum(frame)
+
+
+def test_check_header_keeps_dict_shape():
+    h = Locator.check_header(make_locator_frame(SERIAL))
+    assert h == {"s_num": SERIAL.hex(), "ver": 1,
+                 "cmd": LocatorCmd.REQUEST, "len": 128}
+
+
+def test_receive_buffer_view_adds_device(locator, bus):
+    seen = []
+    bus.bind(lambda e, changes, **_: seen.extend(d.s_num for d in changes.appended),
+             DevLstEvent.BATCH)
+    frame = make_locator_frame(SERIAL)
+    locator._buf[:len(frame)] = frame
+
+    locator._ingest(locator._view[:len(frame)], PEER)
+
+    assert seen == [SERIAL.hex()]
+
+
+def test_bad_checksum_is_dropped(locator, bus):
+    seen = []
+    bus.bind(lambda e, **_: seen.append(e), DevLstEvent.BATCH)
+    frame = bytearray(make_locator_frame(SERIAL))
+    frame[-1] ^= 0x01
+    locator._ingest(frame, PEER)
+    assert seen == []
+
+
+def test_own_address_is_ignored(locator, bus):
+    seen = []
+    bus.bind(lambda e, **_: seen.append(e), DevLstEvent.BATCH)
+    for own in locator._local_addrs:
+        locator._ingest(make_locator_frame(SERIAL), (own, 1770))
+    assert seen == []
+
+
+def test_response_payload_outlives_buffer(locator, bus):
+    locator._registry.add(make_device(serial=SERIAL.hex()))
+    got = []
+    bus.bind(lambda e, **kw: got.append((kw["cmd"], kw["pack"])),
+             DevLstEvent.CMD_RESPONSE)
+    frame = make_locator_frame(SERIAL, cmd=LocatorCmd.GET_USER.value,
+                               payload=b"\xAA\xBB")
+    locator._buf[:len(frame)] = frame
+
+    locator._ingest(locator._view[:len(frame)], PEER)
+    locator._buf[:len(frame)] = bytes(len(frame))
+
+    assert got == [(LocatorCmd.GET_USER, b"\xAA\xBB")]
+
+
+def test_response_routed_to_pending_waiter_without_bus(locator, bus):
+    dev = make_device(serial=SERIAL.hex())
+    locator._registry.add(dev)
+    got = []
+    locator.pending.register(SERIAL.hex(), LocatorCmd.GET_USER,
+                             lambda e, d, **kw: got.append((d, kw["pack"])))
+    emitted = []
+    orig_emit = bus.emit
+    bus.emit = lambda e, **kw: (emitted.append(e), orig_emit(e, **kw))
+
+    locator._ingest(make_locator_frame(SERIAL, cmd=LocatorCmd.GET_USER.value,
+                                       payload=b"\x01"), PEER)
+
+    assert got == [(dev, b"\x01")]
+    assert DevLstEvent.CMD_RESPONSE not in emitted
+
+
+def test_unwaited_response_is_ignored(locator, bus):
+    locator._registry.add(make_device(serial=SERIAL.hex()))
+    locator._ingest(make_locator_frame(SERIAL, cmd=LocatorCmd.GET_USER.value,
+                                       payload=b"\x01"), PEER)
+    assert len(locator.pending) == 0
+
+
+def test_socket_stats_count_received_datagrams(locator):
+    locator._registry.add(make_device(serial=SERIAL.hex()))
+    locator._ingest(make_locator_frame(SERIAL, cmd=LocatorCmd.GET_USER.value,
+                                       payload=b"\x01"), PEER)
+
+    counters = locator.socket_stats()
+    assert counters.received == 1
+    assert counters.rcvbuf > 0
+
+
+def test_burst_is_drained_into_one_batch(locator, bus, monkeypatch):
+    monkeypatch.setattr(locator, "_local_addrs", frozenset())
+    batches = []
+    bus.bind(lambda e, changes, **_: batches.append(len(changes.appended)),
+             DevLstEvent.BATCH)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as peer:
+        for i in range(20):
+            peer.sendto(make_locator_frame(bytes([i + 1]) * 16),
+                        ("127.0.0.1", locator.port))
+        time.sleep(0.05)
+        n, addr = locator.sock.recvfrom_into(locator._buf)
+        locator._ingest(locator._view[:n], addr)
+
+    assert batches == [20]
+    assert len(locator._registry) == 20
+
+
+def test_probe_unicasts_request_to_known_devices(locator, monkeypatch):
+    sent = []
+    monkeypatch.setattr(locator, "_sendto", lambda pack, addr: sent.append((bytes(pack), addr)))
+    locator._registry.add(make_device(serial=SERIAL.hex(), ip="10.1.0.5"))
+    locator._registry.add(make_device(ip="10.1.0.6"))        # seeded, no serial yet
+    locator._registry.add(make_device(serial="ff", ip="0.0.0.0"))
+
+    locator.probe()
+
+    assert [addr for _, addr in sent] == [("10.1.0.5", locator.port),
+                                          ("10.1.0.6", locator.port)]
+    assert all(pack == locator.frames.request_frame for pack, _ in sent)
+    assert locator.poll_metrics().probes_per_minute == 2
+
+
+def test_paced_probe_delays_instead_of_dropping(locator, monkeypatch):
+    sent, later = [], []
+    monkeypatch.setattr(locator, "_sendto", lambda pack, addr: sent.append(addr))
+    monkeypatch.setattr(locator, "_sendto_later",
+                        lambda delay, pack, addr, on_sent=None: later.append((delay, addr)))
+    locator.pacer = Pacer(RateLimitConfig(device_rate=1.0, device_burst=1,
+                                          max_delay=0.0))
+    dev = make_device(serial=SERIAL.hex(), ip="10.1.0.5")
+
+    locator.probe([dev, dev])
+
+    assert sent == [("10.1.0.5", locator.port)]
+    assert [addr for _, addr in later] == [("10.1.0.5", locator.port)]
+    assert later[0][0] == pytest.approx(1.0, abs=0.05)
+    assert locator.pacer.stats().dropped == 0
+    assert locator.poll_metrics().probes_per_minute == 2
+
+
+def test_paced_command_drop_is_reported_to_caller(locator, monkeypatch):
+    monkeypatch.setattr(locator, "_sendto", lambda pack, addr: None)
+    monkeypatch.setattr(locator, "ai", [{"broadcast": "10.1.255.255"}])
+    locator.pacer = Pacer(RateLimitConfig(device_rate=1.0, device_burst=1,
+                                          max_delay=0.0))
+    dev = make_device(serial=SERIAL.hex(), ip="10.1.0.5")
+
+    assert locator.send_pack(LocatorCmd.READ_SETTINGS, dev=dev) is True
+    assert locator.send_pack(LocatorCmd.READ_SETTINGS, dev=dev) is False
+    assert locator.pacer.stats().dropped == 1
+
+
+def test_directed_tick_probes_between_sweeps(bus, monkeypatch):
+    from dsu.config.settings import LocatorConfig
+    loc = Locator(DeviceRegistry(bus), bus,
+                  LocatorConfig(poll_mode="directed", burst_count=1))
+    try:
+        calls = []
+        monkeypatch.setattr(loc, "request", lambda: (calls.append("sweep"),
+                                                     loc.poller.on_request_sent()))
+        monkeypatch.setattr(loc, "probe", lambda devs=None: calls.append("probe"))
+        for _ in range(3):
+            loc.poller.next_delay()
+            loc._poll_tick()
+        assert calls == ["sweep", "probe", "probe"]
+    finally:
+        loc.sock.close()
+
+
+def test_scheduler_drives_polling_and_shutdown_wakes_run(bus, monkeypatch):
+    sched = Scheduler()
+    loc = Locator(DeviceRegistry(bus), bus, scheduler=sched)
+    ticks = threading.Semaphore(0)
+    tick_threads = []
+
+    def tick():
+        tick_threads.append(threading.current_thread().name)
+        ticks.release()
+
+    monkeypatch.setattr(loc, "_poll_tick", tick)
+    thr = threading.Thread(target=loc.run)
+    thr.start()
+    try:
+        assert ticks.acquire(timeout=2)   # first burst slot fires at once
+        assert ticks.acquire(timeout=2)   # ...and the next one is re-armed
+    finally:
+        loc.shutdown()
+        thr.join(timeout=2)
+        sched.shutdown()
+    assert not thr.is_alive()
+    # probes and paced sends never run on the shared timer thread
+    assert set(tick_threads) == {"Locator poll thread"}
+
+
+def test_probe_and_sweep_replies_feed_rtt(locator, monkeypatch):
+    monkeypatch.setattr(locator, "_sendto", lambda pack, addr: None)
+    monkeypatch.setattr(locator, "ai", [{"broadcast": "10.1.255.255"}])
+    dev = make_device(serial=SERIAL.hex(), ip="10.1.0.5")
+    locator.probe([dev])
+    locator._ingest(make_locator_frame(SERIAL), ("10.1.0.5", 1770))
+    assert locator.rtt.stats(SERIAL.hex()).samples == 1
+
+    other = bytes(range(2, 18))
+    locator.request()
+    locator._ingest(make_locator_frame(other), ("10.1.0.6", 1770))
+    locator._ingest(make_locator_frame(other), ("10.1.0.6", 1770))
+    assert locator.rtt.stats(other.hex()).samples == 1   # first answer per sweep
+
+
+def test_unanswered_probes_and_sweeps_are_recorded_as_missed(locator, monkeypatch):
+    monkeypatch.setattr(locator, "_sendto", lambda pack, addr: None)
+    monkeypatch.setattr(locator, "ai", [{"broadcast": "10.1.255.255"}])
+    locator.history = LinkHistory()
+    dev = make_device(serial=SERIAL.hex(), ip="10.1.0.5")
+    locator.probe([dev])
+    locator._ingest(make_locator_frame(SERIAL), ("10.1.0.5", 1770))
+    locator.probe([dev])
+    locator.probe([dev])                  # the previous probe went unanswered
+
+    other = bytes(range(2, 18))
+    locator.request()
+    locator._ingest(make_locator_frame(other), ("10.1.0.6", 1770))
+    locator.request()                     # SERIAL missed the first sweep
+
+    stats = locator.history.stats(SERIAL.hex())
+    assert (stats.polls, stats.missed) == (3, 2)
+    assert stats.rtt_p50 is not None
+    stats = locator.history.stats(other.hex())
+    assert (stats.polls, stats.missed) == (1, 0)
+
+
+def test_reply_racing_the_sweep_send_counts_for_the_new_sweep(locator, monkeypatch):
+    monkeypatch.setattr(locator, "ai", [{"broadcast": "10.1.255.255"}])
+    locator.history = LinkHistory()
+    monkeypatch.setattr(locator, "_sendto", lambda pack, addr: None)
+    locator.request()
+    time.sleep(0.2)                       # SERIAL misses this sweep
+
+    def answer_at_once(pack, addr):
+        # the receive thread handles the reply before request() returns
+        locator._ingest(make_locator_frame(SERIAL), ("10.1.0.5", 1770))
+    monkeypatch.setattr(locator, "_sendto", answer_at_once)
+    locator.request()
+    monkeypatch.setattr(locator, "_sendto", lambda pack, addr: None)
+    locator.request()
+
+    stats = locator.rtt.stats(SERIAL.hex())
+    assert stats.samples == 1 and stats.srtt < 0.1
+    # answered the second sweep: it started LinkHistory with no missed poll
+    stats = locator.history.stats(SERIAL.hex())
+    assert (stats.polls, stats.missed) == (1, 0)
+
+
+def test_refresh_sends_first_request_in_interactive_lane(locator, monkeypatch):
+    monkeypatch.setattr(locator, "_sendto", lambda pack, addr: None)
+    monkeypatch.setattr(locator, "ai", [{"broadcast": "10.1.255.255"}])
+    locator.pacer = Pacer(RateLimitConfig())
+
+    locator.refresh()
+    locator.request()
+    locator.request()
+
+    assert locator.pacer.stats().interactive == 1
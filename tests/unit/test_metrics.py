@@ -0,0 +1,59 @@
+from dsu.net.locator import LocatorCmd
+from dsu.net.metrics import BUCKETS, CommandMetrics, Histogram, subnet
+from tests.fixtures.helpers import make_device
+
+
+def test_histogram_buckets_and_quantiles():
+    h = Histogram()
+    for v in [0.003] * 90 + [0.04] * 9 + [7.0]:
+        h.record(v)
+
+    assert h.count() == 100
+    assert h.counts[BUCKETS.index(0.005)] == 90
+    assert h.counts[-1] == 1                    # overflow bucket
+    assert h.quantile(0.5) == 0.005
+    assert h.quantile(0.95) == 0.05
+    assert h.quantile(1.0) == float("inf")
+    assert abs(h.mean() - (0.27 + 0.36 + 7.0) / 100) < 1e-9
+    assert Histogram().quantile(0.5) is None
+
+
+def test_outcomes_are_counted_per_cmd_and_per_device():
+    m = CommandMetrics()
+    a, b = make_device(serial="000a"), make_device(serial="000b")
+    m.record_wait(a, LocatorCmd.GET_MAP, 0.2)
+    m.record_reply(a, LocatorCmd.GET_MAP, 0.004, 1)
+    m.record_reply(a, LocatorCmd.GET_MAP, None, 2)       # answered a retry
+    m.record_failure(b, LocatorCmd.GET_MAP, 0.01, 1)
+    m.record_timeout(b, LocatorCmd.SET_PRIMARY, 3)
+    m.record_stale(b, LocatorCmd.GET_MAP)
+
+    cmd = m.cmd(LocatorCmd.GET_MAP)
+    assert (cmd.commands, cmd.sends, cmd.retries) == (3, 4, 1)
+    assert (cmd.failures, cmd.timeouts, cmd.stale) == (1, 0, 1)
+    assert sum(cmd.rtt_buckets) == 2
+    assert cmd.wait_p95 == 0.2
+
+    dev_b = m.device(b)
+    assert (dev_b.commands, dev_b.sends, dev_b.timeouts) == (2, 4, 1)
+    assert set(m.by_cmd()) == {LocatorCmd.GET_MAP, LocatorCmd.SET_PRIMARY}
+    assert set(m.by_device()) == {"000a", "000b"}
+
+
+def test_group_merges_devices_by_model_and_subnet():
+    m = CommandMetrics()
+    fast = [make_device(serial=f"00{i:02x}", ip=f"10.0.1.{i}") for i in range(1, 4)]
+    slow = make_device(serial="00ff", ip="10.0.2.9")
+    slow.model = "CP-18"
+    for dev in fast:
+        m.record_reply(dev, LocatorCmd.GET_USER, 0.002, 1)
+    m.record_reply(slow, LocatorCmd.GET_USER, 0.4, 1)
+    idle = make_device(serial="0100")            # no statistics: skipped
+
+    by_model = m.group(fast + [slow, idle], lambda d: d.model)
+    by_net = m.group(fast + [slow, idle], subnet)
+
+    assert by_model["CP-18"].rtt_p50 == 0.5
+    assert by_net["10.0.1.0/24"].commands == 3
+    assert by_net["10.0.2.0/24"].rtt_p95 == 0.5
+
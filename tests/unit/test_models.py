@@ -47,6 +47,14 @@ def test_parses_known_fields():
     assert dev.comment == ""
 
 
+def test_from_locator_payloads_decodes_batch():
+    buf = (_build_payload(s_num=b"\x01" * 16) + _build_payload(s_num=b"\x02" * 16)
+           + b"\x00" * 5)
+    devs = Device.from_locator_payloads(buf)
+    assert [d.s_num for d in devs] == ["01" * 16, "02" * 16]
+    assert devs[1].ip == "192.168.0.16"
+
+
 def test_unknown_model_falls_back_to_default():
     dev = Device.from_locator_payload(_build_payload(type_=99))
     assert dev.model == DevModel[0]            # "НЕИЗВ."
@@ -0,0 +1,75 @@
+import threading
+
+from dsu.domain.events import DevLstEvent, EventBus
+from dsu.net.cmd_queue import CmdQueue, QueueResult
+from dsu.net.locator import LocatorCmd
+from dsu.net.pending import PendingTable
+from tests.fixtures.helpers import make_device
+
+SERIAL = "0102"
+
+
+def test_dispatch_reaches_registered_handler_only():
+    table = PendingTable()
+    got = []
+    table.register(SERIAL, LocatorCmd.GET_MAP, lambda e, d, **kw: got.append((e, kw)))
+
+    assert not table.dispatch(SERIAL, LocatorCmd.GET_USER, None, b"")
+    assert not table.dispatch("ffff", LocatorCmd.GET_MAP, None, b"")
+    assert table.dispatch(SERIAL, LocatorCmd.GET_MAP, None, b"\x07")
+    assert got == [(DevLstEvent.CMD_RESPONSE,
+                    {"cmd": LocatorCmd.GET_MAP, "pack": b"\x07"})]
+
+
+def test_unregister_keeps_newer_handler():
+    table = PendingTable()
+    old, new = (lambda *a, **k: None), (lambda *a, **k: None)
+    table.register(SERIAL, LocatorCmd.GET_MAP, old)
+    table.register(SERIAL, LocatorCmd.GET_MAP, new)
+    table.unregister(SERIAL, LocatorCmd.GET_MAP, old)
+    assert table.get(SERIAL, LocatorCmd.GET_MAP) is new
+    table.unregister(SERIAL, LocatorCmd.GET_MAP)
+    assert len(table) == 0
+
+
+def test_same_command_waiters_are_served_in_order():
+    table = PendingTable()
+    got = []
+
+    def waiter(name):
+        def handler(_e, _d, *, pack, **_kw):
+            got.append((name, pack))
+            table.unregister(SERIAL, LocatorCmd.GET_MAP, handler)
+        return handler
+
+    first, second = waiter("first"), waiter("second")
+    table.register(SERIAL, LocatorCmd.GET_MAP, first)
+    table.register(SERIAL, LocatorCmd.GET_MAP, second)
+    table.register(SERIAL, LocatorCmd.GET_MAP, first)      # not queued twice
+
+    assert table.dispatch(SERIAL, LocatorCmd.GET_MAP, None, b"\x01")
+    assert table.dispatch(SERIAL, LocatorCmd.GET_MAP, None, b"\x02")
+    assert not table.dispatch(SERIAL, LocatorCmd.GET_MAP, None, b"\x03")
+    assert got == [("first", b"\x01"), ("second", b"\x02")]
+    assert len(table) == 0
+
+
+def test_cmd_queue_completes_through_pending_table():
+    bus = EventBus()
+    table = PendingTable()
+    dev = make_device(serial=SERIAL)
+    results = []
+
+    def send_pack(cmd, _data):
+        threading.Timer(0.05, table.dispatch,
+                        args=(SERIAL, cmd, dev, b"\x01")).start()
+
+    queue = CmdQueue(dev, bus, send_pack, cbs=results.append, timeout=1,
+                     pending=table)
+    queue.append(LocatorCmd.SET_PRIMARY, b"\x00")
+    queue.run()
+    queue.queue_thr.join(timeout=5)
+
+    assert results == [QueueResult.OK]
+    assert not bus.has_subscribers(DevLstEvent.CMD_RESPONSE)
+    assert len(table) == 0
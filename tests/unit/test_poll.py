@@ -0,0 +1,96 @@
+import pytest
+
+from dsu.config.settings import LocatorConfig
+from dsu.net.poll import PollScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _sched(clock=None, rng=lambda: 0.5, **cfg):
+    return PollScheduler(LocatorConfig(**cfg), clock=clock or Clock(), rng=rng)
+
+
+def test_startup_burst_then_steady():
+    s = _sched(burst_count=3, burst_spacing=0.1, poll_interval=2.0)
+    delays = [s.next_delay() for _ in range(5)]
+    assert delays[:3] == [0.0, pytest.approx(0.1), pytest.approx(0.1)]
+    assert delays[3:] == [pytest.approx(2.0), pytest.approx(2.0)]
+
+
+def test_refresh_restarts_burst():
+    s = _sched(burst_count=2)
+    for _ in range(3):
+        s.next_delay()
+    assert not s.metrics().bursting
+    s.start_burst()
+    assert s.metrics().bursting
+    assert s.next_delay() == 0.0
+
+
+def test_steady_interval_grows_with_fleet_and_is_capped():
+    s = _sched(burst_count=0, poll_interval=2.0, max_poll_interval=5.0,
+               reply_budget=1000.0)
+    assert s.next_delay(fleet_size=100) == pytest.approx(2.0)
+    assert s.next_delay(fleet_size=3000) == pytest.approx(3.0)
+    assert s.next_delay(fleet_size=50_000) == pytest.approx(5.0)
+
+
+def test_observed_replies_stretch_interval():
+    s = _sched(burst_count=0, reply_budget=1000.0, max_poll_interval=10.0)
+    for _ in range(30):
+        s.on_replies(6000)
+    assert s.next_delay(fleet_size=10) > 5.0
+
+
+def test_jitter_bounds():
+    low = _sched(burst_count=0, poll_jitter=0.1, rng=lambda: 0.0)
+    high = _sched(burst_count=0, poll_jitter=0.1, rng=lambda: 1.0)
+    assert low.next_delay() == pytest.approx(1.8)
+    assert high.next_delay() == pytest.approx(2.2)
+
+
+def test_convergence_and_rates():
+    clock = Clock()
+    s = _sched(clock=clock)
+    s.on_request_sent(frames=2)
+    clock.now += 0.05
+    s.on_replies(10, new=10)
+    clock.now += 0.25
+    s.on_request_sent(frames=2)
+    s.on_replies(10, new=0)
+
+    m = s.metrics()
+    assert m.convergence_time == pytest.approx(0.05)
+    assert m.requests_per_minute == 4
+    assert m.replies_per_minute == 20
+
+    clock.now += 61
+    m = s.metrics()
+    assert m.requests_per_minute == 0
+    assert m.replies_per_minute == 0
+
+
+def test_broadcast_mode_always_sweeps():
+    s = _sched(burst_count=0)
+    s.on_request_sent()
+    assert s.sweep_due()
+
+
+def test_directed_mode_sweeps_rarely():
+    clock = Clock()
+    s = _sched(clock=clock, burst_count=1, poll_mode="directed", sweep_interval=30.0)
+    s.next_delay()                 # burst slot → broadcast
+    assert s.sweep_due()
+    s.on_request_sent()
+    s.next_delay()
+    assert not s.sweep_due()
+    s.on_probe_sent(50)
+    clock.now += 30
+    assert s.sweep_due()
+    assert s.metrics().probes_per_minute == 50
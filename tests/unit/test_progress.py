@@ -0,0 +1,64 @@
+import pytest
+
+from dsu.net.progress import ProgressTracker
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_counts_commands_and_bytes():
+    clock = Clock()
+    tracker = ProgressTracker(clock=clock)
+    tracker.add(2, 300)
+    tracker.start()
+    clock.t = 1.0
+    tracker.advance(100, 1)
+
+    p = tracker.snapshot()
+    assert (p.done_cmds, p.total_cmds) == (1, 2)
+    assert (p.done_bytes, p.total_bytes) == (100, 300)
+    assert p.rate == pytest.approx(100.0)
+    assert p.eta == pytest.approx(2.0)
+    assert p.percent == 33
+
+
+def test_reading_does_not_reset():
+    tracker = ProgressTracker(clock=Clock())
+    tracker.add(1, 10)
+    tracker.advance(10, 1)
+    assert tracker.snapshot().percent == 100
+    assert tracker.snapshot().percent == 100
+    assert tracker.snapshot().eta == 0.0
+
+
+def test_rate_follows_a_slower_link():
+    clock = Clock()
+    tracker = ProgressTracker(clock=clock, smoothing=0.5, interval=1.0)
+    tracker.add(1, 10_000)
+    tracker.start()
+    for _ in range(3):
+        clock.t += 1.0
+        tracker.advance(1000)
+    fast = tracker.snapshot().rate
+    for _ in range(3):
+        clock.t += 1.0
+        tracker.advance(100)
+    assert fast == pytest.approx(1000.0)
+    assert tracker.snapshot().rate < 300
+
+
+def test_subscribers_are_pushed_updates():
+    tracker = ProgressTracker(clock=Clock())
+    seen = []
+    unsubscribe = tracker.subscribe(lambda p: seen.append(p.done_bytes))
+    tracker.add(3, 30)
+    tracker.advance(10, 1)
+    tracker.advance(10, 1)
+    unsubscribe()
+    tracker.advance(10, 1)
+    assert seen == [10, 20]
@@ -0,0 +1,105 @@
+import ipaddress
+
+import pytest
+
+from dsu.config.settings import RateLimitConfig
+from dsu.net.ratelimit import DEFAULT_IFACE, Lane, Pacer
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _pacer(clock, **kw):
+    cfg = RateLimitConfig(**{"interface_rate": 1000.0, "interface_burst": 100,
+                             "device_rate": 10.0, "device_burst": 2,
+                             "max_delay": 0.25, **kw})
+    return Pacer(cfg, [ipaddress.IPv4Network("10.0.0.0/24")], clock=clock)
+
+
+def test_device_bucket_delays_after_burst():
+    clock = Clock()
+    pacer = _pacer(clock)
+    assert pacer.reserve(dev="a", ip="10.0.0.5") == 0.0
+    assert pacer.reserve(dev="a", ip="10.0.0.5") == 0.0
+    assert pacer.reserve(dev="a", ip="10.0.0.5") == pytest.approx(0.1)
+    # another device has its own bucket
+    assert pacer.reserve(dev="b", ip="10.0.0.6") == 0.0
+
+
+def test_frames_beyond_max_delay_are_dropped_and_counted():
+    clock = Clock()
+    pacer = _pacer(clock)
+    delays = [pacer.reserve(dev="a") for _ in range(6)]
+    assert delays[:2] == [0.0, 0.0]
+    assert None in delays
+    stats = pacer.stats()
+    assert stats.queued == 6
+    assert stats.dropped == delays.count(None)
+    assert stats.delayed == sum(1 for d in delays if d)
+
+
+def test_undroppable_frames_are_delayed_past_max_delay():
+    clock = Clock()
+    pacer = _pacer(clock)
+    delays = [pacer.reserve(dev="a", drop=False) for _ in range(6)]
+    assert None not in delays
+    assert delays[-1] == pytest.approx(0.4)
+    assert pacer.stats().dropped == 0
+
+
+def test_tokens_refill_with_time():
+    clock = Clock()
+    pacer = _pacer(clock)
+    for _ in range(2):
+        pacer.reserve(dev="a")
+    clock.t += 0.2
+    assert pacer.reserve(dev="a") == 0.0
+
+
+def test_interface_bucket_is_shared_by_devices():
+    clock = Clock()
+    pacer = _pacer(clock, interface_rate=10.0, interface_burst=1, device_rate=0)
+    assert pacer.reserve(dev="a", ip="10.0.0.5") == 0.0
+    assert pacer.reserve(dev="b", ip="10.0.0.6") == pytest.approx(0.1)
+
+
+def test_interface_of_maps_unicast_to_local_network():
+    pacer = _pacer(Clock())
+    assert pacer.interface_of("10.0.0.77") == "10.0.0.255"
+    assert pacer.interface_of("192.168.1.1") == DEFAULT_IFACE
+
+
+def test_disabled_pacer_never_delays():
+    pacer = _pacer(Clock(), enabled=False)
+    assert all(pacer.reserve(dev="a") == 0.0 for _ in range(50))
+    assert pacer.stats().queued == 0
+
+
+
+def test_interactive_frames_skip_the_bulk_backlog():
+    clock = Clock()
+    pacer = _pacer(clock, interface_rate=100.0, interface_burst=1, device_rate=0,
+                   max_delay=10.0)
+    bulk = [pacer.reserve(ip="10.0.0.5") for _ in range(200)]   # ~2 s of backlog
+    assert bulk[-1] == pytest.approx(1.99)
+
+    assert pacer.reserve(ip="10.0.0.6", lane=Lane.INTERACTIVE) == 0.0
+    # the bulk backlog moved back by the interactive frame's token
+    assert pacer.reserve(ip="10.0.0.5") == pytest.approx(2.01)
+    assert pacer.stats().interactive == 1
+
+
+def test_interactive_lane_is_capped_so_bulk_is_not_starved():
+    clock = Clock()
+    pacer = _pacer(clock, interface_rate=100.0, interface_burst=1, device_rate=0,
+                   interactive_share=0.25, max_delay=10.0)
+    hi = [pacer.reserve(ip="10.0.0.6", lane=Lane.INTERACTIVE) for _ in range(3)]
+    # interactive frames are paced at a quarter of the rate...
+    assert hi == [0.0, pytest.approx(0.04), pytest.approx(0.08)]
+    # ...and bulk frames only wait for the tokens those used
+    assert pacer.reserve(ip="10.0.0.5") == pytest.approx(0.03)
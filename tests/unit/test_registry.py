@@ -1,3 +1,5 @@
+import pytest
+
 from dsu.domain.events import DevLstEvent, EventBus
 from dsu.domain.models import Device
 from dsu.domain.registry import DeviceRegistry
@@ -124,3 +126,67 @@ def test_clear_removes_all_silently():
     assert len(reg) == 0
     # clear() is intentionally silent — no events fired.
     assert seen == []
+
+
+def test_add_many_emits_single_batch():
+    bus = EventBus()
+    seen = []
+    bus.bind(lambda e, **kw: seen.append((e, kw)), None)
+    reg = DeviceRegistry(bus)
+    reg.add(_dev("a", ip="10.0.0.1"))
+    seen.clear()
+
+    changes = reg.add_many([_dev("a", ip="10.0.0.9"), _dev("b"), _dev("c")])
+
+    assert [e for e, _ in seen] == [DevLstEvent.BATCH]
+    assert seen[0][1]["changes"] is changes
+    assert [d.s_num for d in changes.appended] == ["b", "c"]
+    assert [d.ip for d in changes.updated] == ["10.0.0.9"]
+    assert [d.s_num for d in changes.polled] == ["a"]
+    assert reg.find_by_serial("a").ip == "10.0.0.9"
+    assert len(reg) == 3
+
+
+def test_add_many_without_changes_is_silent():
+    bus = EventBus()
+    seen = []
+    bus.bind(lambda e, **_: seen.append(e), None)
+    reg = DeviceRegistry(bus)
+
+    changes = reg.add_many([])
+
+    assert not changes
+    assert seen == []
+
+
+def test_add_many_duplicate_in_burst_counts_as_poll():
+    reg = DeviceRegistry(EventBus())
+    changes = reg.add_many([_dev("a"), _dev("a")])
+    assert len(changes.appended) == 1
+    assert len(changes.polled) == 1
+    assert len(reg) == 1
+
+
+def test_serial_update_keeps_position():
+    reg = DeviceRegistry(EventBus())
+    reg.add(_dev("a"))
+    reg.add(_dev("b"))
+    reg.add(_dev("a", ip="10.0.0.7"))
+    assert [d.s_num for d in reg] == ["a", "b"]
+
+
+
+def test_select_filters_by_fields_and_predicate():
+    reg = DeviceRegistry(EventBus())
+    a = _dev(serial="01", ip="10.1.0.1")
+    b = _dev(serial="02", ip="10.2.0.1")
+    b.model = "CP-18"
+    reg.add(a)
+    reg.add(b)
+
+    assert reg.select() == [a, b]
+    assert reg.select(lambda d: d.ip.startswith("10.2.")) == [b]
+    assert reg.select(model="CP-18") == [b]
+    assert reg.select(model="CP-18", ip="10.1.0.1") == []
+    with pytest.raises(TypeError):
+        reg.select(colour="red")
@@ -0,0 +1,43 @@
+import pytest
+
+from dsu.config.settings import RttConfig
+from dsu.net.rtt import RttTable
+
+
+def test_unknown_device_keeps_the_fixed_timeout():
+    table = RttTable()
+    assert table.timeout("a") == 2.0
+    assert table.stats("a").samples == 0
+
+
+def test_fast_lan_device_gets_floor_timeout():
+    table = RttTable()
+    for _ in range(5):
+        table.sample("a", 0.003)
+    stats = table.stats("a")
+    assert stats.srtt == pytest.approx(0.003)
+    assert table.timeout("a") == RttConfig().min_timeout
+
+
+def test_first_sample_and_smoothing_follow_rfc6298():
+    table = RttTable(RttConfig(min_timeout=0.0, granularity=0.0))
+    table.sample("a", 0.2)
+    s = table.stats("a")
+    assert (s.srtt, s.rttvar) == (pytest.approx(0.2), pytest.approx(0.1))
+    assert s.rto == pytest.approx(0.2 + 4 * 0.1)
+    table.sample("a", 0.4)
+    s = table.stats("a")
+    assert s.rttvar == pytest.approx(0.75 * 0.1 + 0.25 * 0.2)
+    assert s.srtt == pytest.approx(0.875 * 0.2 + 0.125 * 0.4)
+
+
+def test_backoff_doubles_up_to_max_until_next_sample():
+    table = RttTable()
+    table.sample("a", 0.1)
+    rto = table.timeout("a")
+    assert table.backoff("a") == pytest.approx(2 * rto)
+    for _ in range(10):
+        table.backoff("a")
+    assert table.timeout("a") == RttConfig().max_timeout
+    table.sample("a", 0.1)
+    assert table.timeout("a") < 1.0
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from dsu.net.scheduler import Scheduler
+from tests.fixtures.helpers import make_device
+
+
+def _collect(n):
+    done = threading.Event()
+    fired = []
+
+    def fire(tag):
+        fired.append(tag)
+        if len(fired) == n:
+            done.set()
+    return fired, done, fire
+
+
+def test_timers_fire_in_deadline_order_on_one_thread():
+    sched = Scheduler()
+    fired, done, fire = _collect(3)
+    threads = set()
+    for delay, tag in ((0.06, "c"), (0.0, "a"), (0.03, "b")):
+        sched.schedule(delay, lambda t=tag: (threads.add(threading.get_ident()), fire(t)))
+
+    assert done.wait(2)
+    sched.shutdown()
+    assert fired == ["a", "b", "c"]
+    assert len(threads) == 1 and threading.get_ident() not in threads
+
+
+def test_cancelled_timer_does_not_fire():
+    sched = Scheduler()
+    fired, done, fire = _collect(1)
+    handle = sched.schedule(0.02, fire, "cancelled")
+    sched.schedule(0.05, fire, "kept")
+    handle.cancel()
+
+    assert done.wait(2)
+    time.sleep(0.02)
+    sched.shutdown()
+    assert fired == ["kept"]
+
+
+def test_earlier_timer_wakes_a_sleeping_scheduler():
+    sched = Scheduler()
+    fired, done, fire = _collect(1)
+    sched.schedule(10.0, fire, "late")
+    start = time.monotonic()
+    sched.schedule(0.01, fire, "early")
+
+    assert done.wait(2)
+    assert time.monotonic() - start < 1.0
+    sched.shutdown()
+    assert fired == ["early"]
+
+
+def test_failing_callback_does_not_stop_the_thread():
+    sched = Scheduler()
+    _, done, fire = _collect(1)
+    sched.schedule(0.0, lambda: 1 / 0)
+    sched.schedule(0.01, fire, "after")
+
+    assert done.wait(2)
+    sched.shutdown()
+
+
+def test_shutdown_drops_pending_timers():
+    sched = Scheduler()
+    handle = sched.schedule(5.0, lambda: None)
+    sched.shutdown()
+    assert handle.cancelled and len(sched) == 0
+    assert sched.schedule(0.0, lambda: None).cancelled
+
+
+def test_app_parts_share_the_app_scheduler():
+    from dsu.app import create_app
+
+    app = create_app()
+    try:
+        assert len(app.scheduler) == 0    # an idle scheduler is still used
+        assert app.controller._scheduler is app.scheduler
+        assert app.controller.liveness._scheduler is app.scheduler
+        queue = app.controller.make_queue(make_device(serial="000a"))
+        assert queue._scheduler is app.scheduler
+    finally:
+        app.shutdown()
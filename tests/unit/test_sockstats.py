@@ -0,0 +1,88 @@
+import socket
+
+import pytest
+
+from dsu.net.sockstats import MAX_RCVBUF, MIN_RCVBUF, SocketStats, auto_rcvbuf
+
+
+@pytest.fixture
+def udp_pair():
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rx.bind(("127.0.0.1", 0))
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    tx.bind(("127.0.0.1", 0))
+    yield rx, tx
+    rx.close()
+    tx.close()
+
+
+def _drain(stats):
+    while True:
+        try:
+            stats.recv(1024, socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return
+
+
+def test_auto_rcvbuf_scales_with_fleet_and_is_clamped():
+    assert auto_rcvbuf(0) == MIN_RCVBUF
+    assert auto_rcvbuf(3000) == 3000 * 1024 * 2
+    assert auto_rcvbuf(10 ** 6) == MAX_RCVBUF
+
+
+def test_recv_returns_data_and_sender(udp_pair):
+    rx, tx = udp_pair
+    stats = SocketStats(rx)
+    tx.sendto(b"hello", rx.getsockname())
+
+    data, addr = stats.recv(1024)
+    buf = bytearray(16)
+    tx.sendto(b"abc", rx.getsockname())
+    n, addr2 = stats.recv_into(buf)
+
+    assert data == b"hello" and buf[:n] == b"abc"
+    assert addr == addr2 == tx.getsockname()
+
+
+def test_kernel_drops_are_reported(udp_pair):
+    rx, tx = udp_pair
+    stats = SocketStats(rx)
+    if stats.dropped is None:
+        pytest.skip("SO_RXQ_OVFL not supported on this platform")
+    stats.size(rcvbuf=4096)
+    for _ in range(200):
+        tx.sendto(bytes(512), rx.getsockname())
+
+    # The counter is stamped on each datagram as it is queued, so the
+    # drops show up on one queued after the overflow: make room for it.
+    _drain(stats)
+    tx.sendto(b"late", rx.getsockname())
+    _drain(stats)
+
+    counters = stats.counters()
+    assert counters.dropped > 0
+    assert counters.rcvbuf > 0
+
+
+class _CappedSocket:
+    """Linux-like SO_RCVBUF: capped at *cap*, reported doubled."""
+
+    def __init__(self, cap):
+        self.cap, self.value = cap, 0
+
+    def setsockopt(self, level, opt, value):
+        if opt == socket.SO_RCVBUF:
+            self.value = min(value, self.cap)
+
+    def getsockopt(self, level, opt):
+        return 2 * self.value
+
+
+def test_capped_buffer_is_reported_despite_doubling(monkeypatch, caplog):
+    monkeypatch.setattr("dsu.net.sockstats._REPORT_FACTOR", 2)
+    stats = SocketStats(_CappedSocket(cap=212992))
+
+    stats.size(rcvbuf=200 * 1024)
+    assert "capped" not in caplog.text
+    stats.size(rcvbuf=256 * 1024)
+    assert "capped at 212992 bytes" in caplog.text
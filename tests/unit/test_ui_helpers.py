@@ -10,6 +10,11 @@ def test_format_status_text():
     assert format_status_text(False) == "offline"
 
 
+def test_format_status_text_degraded_only_when_online():
+    assert format_status_text(True, degraded=True) == "degraded"
+    assert format_status_text(False, degraded=True) == "offline"
+
+
 def test_format_serial_short_long_serial_truncates():
     long = "0102030405060708090a0b0c0d0e0f10"
     assert format_serial_short(long) == "01020304050607…"